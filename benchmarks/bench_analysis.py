@@ -0,0 +1,86 @@
+"""
+Post-scan analysis of an alignment loop (many short scans of a Gaussian peak with noise): time
+of the previous path, the py4syn growing lists converted to arrays and fitted with SciPy (if
+installed), and of jupy4syn.analysis on array views of the scan data. Also prints the peak
+center error of each method.
+
+Usage: python benchmarks/bench_analysis.py [points] [scans]
+"""
+import sys
+import time
+
+import numpy as np
+
+from jupy4syn.analysis import analyze
+from jupy4syn.ScanDataSource import InMemoryScanSource
+
+
+CENTER = 0.37
+
+
+def scan_lists(points, seed):
+    # py4syn keeps the scan data in Python lists
+    rng = np.random.default_rng(seed)
+    x = np.linspace(-3, 3, points)
+    y = 1000 * np.exp(-0.5 * ((x - CENTER) / 0.5) ** 2) + 50 + rng.normal(0, 10, points)
+
+    return {"points": list(range(points)), "samx": x.tolist(), "I0": y.tolist()}
+
+
+def previous(data):
+    from scipy.optimize import curve_fit
+
+    x = np.array(data["samx"])
+    y = np.array(data["I0"])
+
+    def gaussian(x, amplitude, center, sigma, offset):
+        return amplitude * np.exp(-0.5 * ((x - center) / sigma) ** 2) + offset
+
+    i = np.argmax(y)
+    parameters, _ = curve_fit(gaussian, x, y, p0=(y[i] - y.min(), x[i], (x[-1] - x[0]) / 10, y.min()))
+    com = np.sum((y - y.min()) * x) / np.sum(y - y.min())
+
+    return parameters[1], com
+
+
+def timed(name, scans, function):
+    started = time.perf_counter()
+    centers = [function(data) for data in scans]
+    elapsed = (time.perf_counter() - started) / len(scans)
+
+    print("%-40s %8.3f ms/scan, center error %.4f" % (name, 1e3 * elapsed, np.max(np.abs(np.array(centers) - CENTER))))
+
+
+def main():
+    points = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    number_scans = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+
+    scans = [scan_lists(points, seed) for seed in range(number_scans)]
+    print("%d scans of %d points" % (number_scans, points))
+
+    try:
+        timed("previous (lists -> arrays, SciPy fit)", scans, lambda data: previous(data)[0])
+    except ImportError:
+        print("%-40s %8s" % ("previous (lists -> arrays, SciPy fit)", "no scipy"))
+
+    # The scan data source is filled point by point while the scan runs, the analysis uses its views
+    sources = []
+    for data in scans:
+        source = InMemoryScanSource(lambda data=data: data, ["samx", "I0"])
+        source.poll()
+        sources.append(source)
+
+    def numpy_analysis(methods, key):
+        def run(source):
+            results = analyze(source.column(0), source.column(1), methods)
+            return key(results)
+        return run
+
+    timed("analysis: peak, fwhm, com", sources, numpy_analysis(("peak", "fwhm", "com"), lambda r: r["peak"][0]))
+    timed("analysis: peak, fwhm, com, gaussian", sources,
+          numpy_analysis(("peak", "fwhm", "com", "gaussian"), lambda r: r["gaussian"]["center"]))
+    timed("analysis: lorentzian", sources, numpy_analysis(("lorentzian",), lambda r: r["lorentzian"]["center"]))
+
+
+if __name__ == '__main__':
+    main()
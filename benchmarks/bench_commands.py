@@ -0,0 +1,77 @@
+"""
+Measures the import time of jupy4syn.commandDict (and which scan_utils modules it imports),
+and the memory and time of creating the command dictionaries of N command buttons, with the
+previous approach (every command instantiated for every button) and with the lazy CommandRegistry.
+
+Usage: python benchmarks/bench_commands.py [buttons]
+"""
+import subprocess
+import sys
+import time
+import tracemalloc
+
+
+def import_report():
+    code = ("import sys, time; t = time.perf_counter(); import jupy4syn.commandDict; "
+            "print(time.perf_counter() - t); "
+            "print(' '.join(sorted(m for m in sys.modules if m.startswith('scan_utils'))))")
+    result = subprocess.run([sys.executable, "-c", code], stdout=subprocess.PIPE, universal_newlines=True)
+
+    if result.returncode != 0:
+        return None, None
+
+    lines = result.stdout.splitlines() + [""]
+    return float(lines[0]), lines[1]
+
+
+def measure(create, buttons):
+    tracemalloc.start()
+    t = time.perf_counter()
+
+    dicts = [create() for i in range(buttons)]
+
+    seconds = time.perf_counter() - t
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return seconds, current, len(dicts)
+
+
+def main():
+    buttons = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    seconds, scan_utils_modules = import_report()
+    if seconds is None:
+        print("import jupy4syn.commandDict failed")
+    else:
+        print("import jupy4syn.commandDict: %.3f s, scan_utils modules: %s" % (seconds, scan_utils_modules or "none"))
+
+    from jupy4syn.Configuration import default_configuration
+    from jupy4syn.CommandRegistry import COMMANDS, CommandRegistry
+    from jupy4syn.commandDict import commandDict
+
+    config = default_configuration()
+
+    # Previous behaviour: every button builds all the commands
+    eager_registry = CommandRegistry(use_entry_points=False)
+
+    def eager():
+        return {name: eager_registry._instantiate(spec, config) for name, spec in COMMANDS.items() if spec.shared}
+
+    # A button using a single command
+    def lazy():
+        command_dict = commandDict(config)
+        command_dict.show_text_box("scan_gui", "")
+
+        return command_dict
+
+    # Import everything before measuring, so only instances are counted
+    eager()
+
+    for name, create in (("eager", eager), ("lazy", lazy)):
+        seconds, memory, count = measure(create, buttons)
+        print("%-6s %d buttons: %.4f s, %.1f KiB" % (name, count, seconds, memory / 1024))
+
+
+if __name__ == '__main__':
+    main()
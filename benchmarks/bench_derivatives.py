@@ -0,0 +1,83 @@
+"""
+Derivatives of synthetic XANES spectra (arctan edge plus a white line, with noise) on a
+non-uniform energy grid: time of the previous DataFrame.diff approach (if pandas is
+installed) and of jupy4syn.derivatives, edge (E0) error with and without Savitzky-Golay
+smoothing, and time of the incremental DerivativeTracker while points arrive.
+
+Usage: python benchmarks/bench_derivatives.py [points] [noise]
+"""
+import sys
+import timeit
+
+import numpy as np
+
+from jupy4syn.derivatives import DerivativeTracker, derivatives, find_edge
+
+
+E0 = 7112.0
+
+
+def energy_grid(points):
+    # Coarse pre-edge, fine edge region, coarse post-edge, as energy scans are usually defined
+    pre = np.linspace(E0 - 150, E0 - 20, points // 5, endpoint=False)
+    edge = np.linspace(E0 - 20, E0 + 30, 3 * points // 5, endpoint=False)
+    post = np.linspace(E0 + 30, E0 + 400, points - len(pre) - len(edge))
+
+    return np.concatenate((pre, edge, post))
+
+
+def xanes(energy, noise, seed=0):
+    rng = np.random.default_rng(seed)
+
+    mu = 0.5 + np.arctan((energy - E0) / 1.5) / np.pi
+    mu += 0.4 * np.exp(-0.5 * ((energy - E0 - 8.0) / 3.0) ** 2)
+
+    return mu + rng.normal(0.0, noise, len(energy))
+
+
+def previous(energy, mu):
+    import pandas as pd
+
+    df = pd.DataFrame({0: energy, 1: mu})
+    diff_df = df.diff().dropna()
+    diff_diff_df = diff_df.diff().dropna()
+
+    return (diff_df[1] / diff_df[0]).values, (diff_diff_df[1] / diff_df[0]).values
+
+
+def main():
+    points = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    noise = float(sys.argv[2]) if len(sys.argv) > 2 else 0.002
+    repeat = 200
+
+    energy = energy_grid(points)
+    mu = xanes(energy, noise)
+
+    try:
+        seconds = timeit.timeit(lambda: previous(energy, mu), number=repeat) / repeat
+        print("%-28s %8.1f us" % ("previous (pandas diff)", 1e6 * seconds))
+    except ImportError:
+        print("%-28s %8s" % ("previous (pandas diff)", "no pandas"))
+
+    for name, window in (("finite differences", None), ("Savitzky-Golay, window 9", 9)):
+        seconds = timeit.timeit(lambda: derivatives(energy, mu, window), number=repeat) / repeat
+        first, second = derivatives(energy, mu, window)
+        print("%-28s %8.1f us, E0 error %.3f eV" % (name, 1e6 * seconds, find_edge(energy, first) - E0))
+
+    # Points arriving 10 at a time during the scan
+    for name, window in (("incremental, no smoothing", None), ("incremental, window 9", 9)):
+        def incremental():
+            tracker = DerivativeTracker(window)
+            for start in range(0, points, 10):
+                tracker.append(energy[start:start + 10], mu[start:start + 10])
+
+        def full():
+            for end in range(10, points + 10, 10):
+                derivatives(energy[:end], mu[:end], window)
+
+        print("%-28s %8.1f ms (recomputing everything: %.1f ms)" %
+              (name, 1e3 * timeit.timeit(incremental, number=5) / 5, 1e3 * timeit.timeit(full, number=5) / 5))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Measures the import time of Jupy4Syn modules with "python -X importtime", in a fresh
+interpreter for each module, and the time of creating the first Configuration.
+
+Usage: python benchmarks/bench_import.py [module ...]
+"""
+import subprocess
+import sys
+
+
+MODULES = [
+    "jupy4syn.Configuration",
+    "jupy4syn.utils",
+    "jupy4syn.PVMonitor",
+    "jupy4syn.ScanGUI",
+    "jupy4syn.commandButton",
+]
+
+
+def import_time(module):
+    # Last line of -X importtime output is the module itself, with the cumulative time in us
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module],
+                            stderr=subprocess.PIPE, universal_newlines=True)
+
+    lines = [line for line in result.stderr.splitlines() if line.startswith("import time:")]
+    if result.returncode != 0 or not lines:
+        return None
+
+    cumulative = lines[-1].split("|")[1]
+    return int(cumulative) / 1e6
+
+
+def configuration_time():
+    code = ("import time; from jupy4syn.Configuration import Configuration; "
+            "t = time.perf_counter(); Configuration(); print(time.perf_counter() - t)")
+    result = subprocess.run([sys.executable, "-c", code], stdout=subprocess.PIPE, universal_newlines=True)
+
+    return float(result.stdout) if result.returncode == 0 else None
+
+
+def main():
+    modules = sys.argv[1:] or MODULES
+
+    for module in modules:
+        seconds = import_time(module)
+        print("%-26s %s" % (module, "import failed" if seconds is None else "%.3f s" % seconds))
+
+    seconds = configuration_time()
+    print("%-26s %s" % ("Configuration()", "failed" if seconds is None else "%.3f s" % seconds))
+
+
+if __name__ == '__main__':
+    main()
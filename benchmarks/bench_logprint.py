@@ -0,0 +1,62 @@
+"""
+Compares the cost of a logprint call with the previous implementation (open, append and
+close the daily log file on every call) and with the background LogWriter.
+
+Usage: python benchmarks/bench_logprint.py [calls]
+"""
+import os
+from pathlib import Path
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+
+from jupy4syn.LogWriter import get_logger, log_message
+
+
+class _Checkbox():
+    value = False
+
+
+class _Config():
+    config = {"log_cell": _Checkbox()}
+
+
+def previous_logprint(string, mode="[INFO]", config=_Config()):
+    ts = time.gmtime()
+
+    year_month_day = time.strftime("%Y-%m-%d", ts)
+    file_name = Path('.logs/' + year_month_day + '-log.txt')
+
+    if not file_name.parent.is_dir():
+        file_name.parent.mkdir()
+
+    time_stamp = time.strftime("%Y-%m-%d %H:%M:%S", ts)
+
+    with open(str(file_name), "a") as f:
+        f.write(time_stamp + ' | ' + mode + ' ' + string + '\n')
+
+    if config.config['log_cell'].value:
+        print(time_stamp + ' | ' + mode + ' ' + string)
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    config = _Config()
+
+    directory = tempfile.mkdtemp()
+    os.chdir(directory)
+
+    get_logger()
+
+    for name, function in (("previous", previous_logprint), ("LogWriter", log_message)):
+        seconds = timeit.timeit(lambda: function("Monitoring PV IOC:m1.RBV", "[INFO]", config), number=calls)
+        print("%-10s %.2f us/call" % (name, 1e6 * seconds / calls))
+
+    os.chdir("/")
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+PV broker fan-out with simulated PVs (no IOC needed): a broker serving K kernels that watch the
+same M PVs keeps M connections instead of K * M, and this measures the latency from a PV monitor
+update in the broker to its callback in every kernel.
+
+Usage: python benchmarks/bench_pv_broker.py [kernels] [pvs] [updates]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from jupy4syn.PVBroker import BrokerClient, PVBroker
+
+
+class SimulatedPV():
+    # Minimal epics.PV stand-in: connects right away and sends the values given to update()
+    instances = []
+
+    def __init__(self, pvname, callback=None, connection_callback=None):
+        self.pvname = pvname
+        self.callback = callback
+        self.type = "double"
+        self.count = 1
+        self.precision = 3
+        self.units = ""
+        self.enum_strs = None
+        self.connected = True
+
+        SimulatedPV.instances.append(self)
+        connection_callback(pvname=pvname, conn=True, pv=self)
+
+    def get_ctrlvars(self):
+        return {}
+
+    def put(self, value, wait=False, timeout=30.0):
+        self.update(value)
+        return 1
+
+    def update(self, value):
+        self.callback(pvname=self.pvname, value=value, char_value=str(value), timestamp=time.time(), severity=0)
+
+
+def main():
+    kernels = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    number_pvs = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    updates = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    socket_path = os.path.join(tempfile.mkdtemp(), "broker.sock")
+    broker = PVBroker(socket_path, pv_factory=SimulatedPV, get_many=lambda pvnames, **kw: [None] * len(pvnames))
+    broker.start()
+
+    pvnames = ["SIM:m%d.RBV" % i for i in range(number_pvs)]
+    latencies = []
+    received = threading.Semaphore(0)
+
+    def callback(value=None, **kw):
+        latencies.append(time.perf_counter() - value)
+        received.release()
+
+    clients = [BrokerClient(socket_path) for _ in range(kernels)]
+    for client in clients:
+        for pvname in pvnames:
+            pv = client.pv(pvname)
+            pv.wait_for_connection(5.0)
+            pv.add_callback(callback)
+
+    print("%d kernels x %d PVs: %d PV connections in the broker (%d without it)" %
+          (kernels, number_pvs, len(SimulatedPV.instances), kernels * number_pvs))
+
+    started = time.perf_counter()
+    for _ in range(updates):
+        for pv in SimulatedPV.instances:
+            pv.update(time.perf_counter())
+
+        for _ in range(kernels * number_pvs):
+            received.acquire()
+    elapsed = time.perf_counter() - started
+
+    latencies = 1e3 * np.array(latencies)
+    print("%d callbacks in %.2f s, latency median %.2f ms, p99 %.2f ms" %
+          (len(latencies), elapsed, np.median(latencies), np.percentile(latencies, 99)))
+
+    for client in clients:
+        client.close()
+    broker.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Load time of complete scan files: text parsing (pandas read_csv as the previous loaders did,
+if pandas is installed, and ScanFileTail), first load_scan (parsing and writing the binary
+sidecar) and cached load_scan (memory-mapped sidecar), with and without touching every value.
+
+Usage: python benchmarks/bench_scan_cache.py [points] [columns] [files]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from jupy4syn.ScanFileCache import load_scan, sidecar_paths
+from jupy4syn.ScanFileTail import ScanFileTail
+
+
+def write_scan(file_name, points, columns, seed):
+    rng = np.random.default_rng(seed)
+    labels = ["motor"] + ["counter%d" % i for i in range(1, columns)]
+
+    with open(file_name, "w") as scan_file:
+        scan_file.write("#S 1 scan\n#M %d\n#N %d\n#L %s\n" % (points, columns, " ".join(labels)))
+        np.savetxt(scan_file, rng.normal(size=(points, columns)), fmt="%.10g")
+
+
+def read_pandas(file_name):
+    import pandas as pd
+
+    return pd.read_csv(file_name, sep=' ', comment='#', header=None).values
+
+
+def read_tail(file_name):
+    tail = ScanFileTail(file_name)
+    tail.poll(final=True)
+    tail.close()
+
+    return tail
+
+
+def timed(name, files, load, touch=False):
+    started = time.perf_counter()
+    for file_name in files:
+        data = load(file_name)
+        if touch:
+            float(np.sum(data.data))
+    seconds = (time.perf_counter() - started) / len(files)
+
+    print("%-36s %9.2f ms/file" % (name, 1e3 * seconds))
+
+
+def main():
+    points = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    columns = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    number_files = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    with tempfile.TemporaryDirectory() as directory:
+        files = [os.path.join(directory, "scan_%04d" % i) for i in range(number_files)]
+        for seed, file_name in enumerate(files):
+            write_scan(file_name, points, columns, seed)
+
+        print("%d files, %d points x %d columns, %.1f MB of text each" %
+              (number_files, points, columns, os.path.getsize(files[0]) / 1e6))
+
+        try:
+            timed("text, pandas read_csv", files, read_pandas)
+        except ImportError:
+            print("%-36s %9s" % ("text, pandas read_csv", "no pandas"))
+
+        timed("text, ScanFileTail", files, read_tail)
+        timed("first load_scan (parse + sidecar)", files, load_scan)
+        timed("cached load_scan (mmap)", files, load_scan)
+        timed("cached load_scan, all values read", files, load_scan, touch=True)
+
+        npy_path, _ = sidecar_paths(files[0])
+        print("sidecar size %.1f MB" % (os.path.getsize(npy_path) / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Scan catalog: backfill time of synthetic ScanGUI scanlogs (one file per day, several years)
+and query times of the catalog compared to reading and searching every scanlog file.
+
+Usage: python benchmarks/bench_scan_catalog.py [years] [scans per day]
+"""
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+from jupy4syn.ScanCatalog import ScanCatalog
+
+
+CONFIGURATIONS = ["default", "energy", "xafs", "align", "mapping"]
+MOTORS = ["mono", "samx", "samy", "slit1", "gap2", "theta"]
+
+
+def write_scanlogs(directory, years, scans_per_day, seed=0):
+    rng = random.Random(seed)
+    start = time.time() - years * 365 * 24 * 3600
+
+    for day in range(years * 365):
+        day_start = start + day * 24 * 3600
+        name = time.strftime("%Y-%m-%d", time.gmtime(day_start)) + "-scanlog.txt"
+
+        with open(os.path.join(directory, name), "w") as log_file:
+            for i in range(scans_per_day):
+                ts = time.gmtime(day_start + i * 60)
+                motor = rng.choice(MOTORS)
+                configuration = rng.choice(CONFIGURATIONS)
+                output = "./scans/scan_%d_%d_0001" % (day, i)
+                log_file.write(time.strftime("%Y-%m-%d %H:%M:%S", ts) + " UTC-0| [SCAN]:\n" +
+                               "Scan with command: 'scan -c " + configuration + " --motor " + motor +
+                               " --start 0 --end 1 --step-or-points 100 --time 0.1' repeated 1 times\n" +
+                               "Scan configuration: '" + configuration + "'\n" +
+                               "Scan data saved in: '" + output + "'\n" +
+                               "Jupyter Scan plot saved in: '" + output + "-jupy.png'\n" +
+                               "PyQtGraph Scan plot saved in: '" + output + ".png'\n\n")
+
+
+def grep_scanlogs(directory, configuration, since):
+    found = []
+    for name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, name)) as log_file:
+            for block in log_file.read().split("\n\n"):
+                if "Scan configuration: '" + configuration + "'" in block:
+                    stamp = re.match(r"(\S+ \S+) UTC-0", block)
+                    if stamp and time.mktime(time.strptime(stamp.group(1), "%Y-%m-%d %H:%M:%S")) >= since:
+                        found.append(block)
+
+    return found
+
+
+def timed(name, function, repeat=20):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    elapsed = (time.perf_counter() - started) / repeat
+
+    print("%-44s %9.2f ms (%d scans)" % (name, 1e3 * elapsed, len(result)))
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    scans_per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    with tempfile.TemporaryDirectory() as directory:
+        logs = os.path.join(directory, "scanlogs")
+        os.mkdir(logs)
+        write_scanlogs(logs, years, scans_per_day)
+
+        catalog = ScanCatalog(os.path.join(directory, "catalog.sqlite3"))
+
+        started = time.perf_counter()
+        imported = catalog.backfill(logs)
+        print("backfill of %d scans: %.2f s" % (imported, time.perf_counter() - started))
+
+        week = time.time() - 7 * 24 * 3600
+        timed("grep scanlogs, configuration, last week", lambda: grep_scanlogs(logs, "energy", week), repeat=1)
+        timed("catalog, configuration, last week", lambda: catalog.find(configuration="energy", since=week))
+        timed("catalog, motor, last week", lambda: catalog.find(motor="mono", since=week))
+        timed("catalog, configuration and motor, all time",
+              lambda: catalog.find(configuration="energy", motor="mono", limit=1000))
+        timed("catalog, command text, all time", lambda: catalog.find(command="--motor gap2", limit=1000))
+
+        catalog.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Measures the delay between scan-gui writing its save file and the notebook parsing
+the first point of the scan, for the old polling hand-off and the FileWatcher hand-off.
+
+Usage: python benchmarks/bench_scan_handoff.py [repetitions]
+"""
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from jupy4syn.FileWatcher import FileWatcher
+from jupy4syn.ScanFileTail import ScanFileTail
+
+
+def fake_scan_writer(directory, start_delay, created):
+    time.sleep(start_delay)
+
+    save_path = os.path.join(directory, "scan_gui.temp")
+    with open(save_path + ".part", "w") as file:
+        json.dump({"editFilename": {"value": "test"}}, file)
+    os.rename(save_path + ".part", save_path)
+    created.append(time.monotonic())
+
+    # scan-utils creates the data file a few milliseconds later and writes the first point
+    time.sleep(0.05)
+    with open(os.path.join(directory, "test_0001"), "w") as file:
+        file.write("#M 10\n#L m1 I0\n0.0 1.0\n")
+
+
+def first_point(file_name):
+    tail = ScanFileTail(file_name)
+    while tail.points == 0:
+        tail.poll()
+    tail.close()
+
+
+def last_scan_name(file_name):
+    cont = 1
+    while os.path.isfile(file_name + "_" + str(cont).zfill(4)):
+        cont += 1
+
+    return file_name + "_" + str(cont - 1).zfill(4)
+
+
+def polling_handoff(directory):
+    save_path = os.path.join(directory, "scan_gui.temp")
+    file_name = os.path.join(directory, "test")
+
+    while not os.path.isfile(save_path):
+        time.sleep(0.5)
+
+    os.remove(save_path)
+    # Sleeps of monitor_save_file and get_scan_name_js
+    time.sleep(1.0)
+    time.sleep(1.0)
+
+    first_point(last_scan_name(file_name))
+
+
+def watcher_handoff(directory):
+    save_path = os.path.join(directory, "scan_gui.temp")
+    file_name = os.path.join(directory, "test")
+
+    watcher = FileWatcher(poll_interval=0.5)
+    watcher.add_file(save_path)
+    while not os.path.isfile(save_path):
+        watcher.wait()
+    watcher.close()
+
+    os.remove(save_path)
+
+    watcher = FileWatcher(poll_interval=0.1)
+    watcher.add_prefix(file_name + "_")
+    if not os.path.isfile(file_name + "_0001"):
+        watcher.wait(timeout=1.0)
+    watcher.close()
+
+    first_point(last_scan_name(file_name))
+
+
+def measure(handoff, repetitions):
+    delays = []
+
+    for i in range(repetitions):
+        directory = tempfile.mkdtemp()
+        created = []
+
+        writer = threading.Thread(target=fake_scan_writer, args=(directory, 0.1 * (i % 5), created))
+        writer.start()
+        handoff(directory)
+        delays.append(time.monotonic() - created[0])
+
+        writer.join()
+        shutil.rmtree(directory)
+
+    return delays
+
+
+def main():
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    for name, handoff in (("polling", polling_handoff), ("watcher", watcher_handoff)):
+        delays = measure(handoff, repetitions)
+        print("%-8s median %.3f s  min %.3f s  max %.3f s" % (name, statistics.median(delays),
+                                                            min(delays), max(delays)))
+
+
+if __name__ == '__main__':
+    main()
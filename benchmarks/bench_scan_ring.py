@@ -0,0 +1,96 @@
+"""
+Live scan latency: a writer process publishes points at a fixed rate to a scan file (buffered,
+as scan-utils without --sync) and to a shared memory ring buffer, and this measures the delay
+from each point being produced to it being read by ScanFileTail and by ScanRingSource, both
+polled every 50 ms.
+
+Usage: python benchmarks/bench_scan_ring.py [points] [period in ms] [columns]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from jupy4syn.ScanFileTail import ScanFileTail
+from jupy4syn.ScanRingBuffer import ScanRingSource, ScanRingWriter
+
+
+POLL_INTERVAL = 0.05
+
+
+def writer(file_name, points, period, columns):
+    labels = ["motor", "timestamp"] + ["counter%d" % i for i in range(2, columns)]
+    ring = ScanRingWriter(file_name, labels, expected_points=points)
+
+    with open(file_name, "w") as scan_file:
+        scan_file.write("#S 1 scan\n#M %d\n#N %d\n#L %s\n" % (points, columns, " ".join(labels)))
+
+        row = np.zeros(columns)
+        for i in range(points):
+            time.sleep(period)
+            row[0] = i
+            row[1] = time.time()
+            row[2:] = np.random.normal(size=columns - 2)
+
+            scan_file.write(" ".join("%.10g" % value for value in row) + "\n")
+            ring.append(row)
+
+    # Keep the ring until the reader has seen the last point
+    time.sleep(1.0)
+    ring.close()
+
+
+def latencies(source, points):
+    # Delay of each point, from the writer timestamp to the poll that read it
+    delays = np.full(points, np.nan)
+
+    started = time.time()
+    while source.points < points and time.time() - started < 60:
+        read = source.points
+        source.poll()
+        if source.points > read:
+            now = time.time()
+            delays[read:source.points] = now - source.column(1, read)
+
+        time.sleep(POLL_INTERVAL)
+
+    return 1e3 * delays[~np.isnan(delays)]
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "writer":
+        writer(sys.argv[2], int(sys.argv[3]), float(sys.argv[4]), int(sys.argv[5]))
+        return
+
+    points = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    period = float(sys.argv[2]) / 1e3 if len(sys.argv) > 2 else 0.01
+    columns = int(sys.argv[3]) if len(sys.argv) > 3 else 12
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, "scan_0001")
+
+        for name, source in (("scan file (ScanFileTail)", lambda: ScanFileTail(file_name)),
+                             ("shared memory (ScanRingSource)", lambda: ScanRingSource(file_name))):
+            if os.path.exists(file_name):
+                os.remove(file_name)
+
+            # A separate interpreter, as the scan writer is
+            process = subprocess.Popen([sys.executable, __file__, "writer", file_name, str(points), str(period),
+                                        str(columns)])
+            while not os.path.exists(file_name):
+                time.sleep(0.001)
+
+            reader = source()
+            delays = latencies(reader, points)
+            reader.close()
+            process.wait()
+
+            print("%-32s %5d/%d points, latency median %8.1f ms, p99 %8.1f ms, max %8.1f ms" %
+                  (name, len(delays), points, np.median(delays), np.percentile(delays, 99), np.max(delays)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,291 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import contextlib
+import importlib
+import multiprocessing
+import sys
+import threading
+import time
+
+# Jupy4Syn
+from jupy4syn.utils import logprint
+
+
+# Execution modes of ICommand.exec
+THREAD = "thread"
+PROCESS = "process"
+
+
+class StdoutRouter():
+    def __init__(self, stream):
+        """
+        **Constructor**
+
+        Replacement of ``sys.stdout`` that sends what is printed by a thread to the writer
+        registered for that thread (e.g. the ``append_stdout`` of a widget ``Output``).
+        Other threads print to the original stream.
+
+        Parameters
+        ----------
+        stream : :obj:`io.TextIOBase`
+            Original stdout
+        """
+        self.stream = stream
+        self._writers = {}
+
+    def write(self, text):
+        writer = self._writers.get(threading.get_ident())
+        if writer is None:
+            return self.stream.write(text)
+
+        writer(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+    @contextlib.contextmanager
+    def redirect(self, writer):
+        """
+        Context manager sending what the current thread prints to ``writer``.
+        """
+        ident = threading.get_ident()
+        previous = self._writers.get(ident)
+        self._writers[ident] = writer
+
+        try:
+            yield
+        finally:
+            if previous is None:
+                del self._writers[ident]
+            else:
+                self._writers[ident] = previous
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def stdout_router():
+    """
+    Returns the :py:class:`StdoutRouter` installed as ``sys.stdout``, installing it if needed.
+    There is a single router, always printing to the original stdout. While something else
+    replaces ``sys.stdout`` (e.g. an output capture), the router is not installed again: the
+    replacement receives the prints until it restores the router, and the redirections of the
+    threads are kept.
+    """
+    global _router
+
+    with _router_lock:
+        if _router is None:
+            _router = StdoutRouter(sys.stdout)
+            sys.stdout = _router
+
+        return _router
+
+
+class _QueueWriter():
+    def __init__(self, queue):
+        self.queue = queue
+
+    def write(self, text):
+        if text:
+            self.queue.put(text)
+
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def _run_in_process(module, class_name, parameters, queue):
+    # Runs in a worker process: a new command instance is created, its prints are sent back through queue
+    command = getattr(importlib.import_module(module), class_name)()
+
+    stdout = sys.stdout
+    sys.stdout = _QueueWriter(queue)
+
+    try:
+        return command.exec(parameters)
+    finally:
+        sys.stdout = stdout
+
+
+class CommandExecutor():
+    def __init__(self, max_workers=4, max_processes=2):
+        """
+        **Constructor**
+
+        Runs :py:class:`ICommand <jupy4syn.commands.ICommand.ICommand>` executions without blocking the
+        notebook. Each run is submitted to a thread pool and returns a :obj:`concurrent.futures.Future`.
+        In the "process" mode, the command is executed in a process pool (a new instance of the command
+        is created in the worker process) and the submitting thread only streams its output.
+
+        What the command prints is streamed to the ``write`` function given for the run (e.g. the
+        ``append_stdout`` of the button ``Output``). The queue depth at submission and the run time
+        of every command are logged and kept in :py:meth:`stats`.
+
+        Parameters
+        ----------
+        max_workers : :obj:`int`, optional
+            Number of commands running at the same time, by default 4
+        max_processes : :obj:`int`, optional
+            Number of worker processes of the "process" mode, by default 2
+
+        Examples
+        --------
+        >>> executor = get_command_executor()
+        >>> future = executor.submit("wm", wmCommand(), "IOC:m1", write=output.append_stdout)
+        >>> future.result()
+        >>> executor.stats()["wm"]
+        {'runs': 1, 'errors': 0, 'last_time': 0.52, 'total_time': 0.52, 'last_queue_depth': 0}
+        """
+        self.max_workers = max_workers
+        self.max_processes = max_processes
+
+        self._threads = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jupy4syn-command")
+        self._processes = None
+        self._manager = None
+
+        self._queued = 0
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    @property
+    def queue_depth(self):
+        """
+        Number of submitted commands that are waiting for a free worker.
+        """
+        return self._queued
+
+    def submit(self, name, command, parameters, mode=THREAD, write=None, config=None):
+        """
+        Submit ``command.exec(parameters)``.
+
+        Parameters
+        ----------
+        name : :obj:`str`
+            Command name, used in logs and statistics
+        command : :py:class:`ICommand <jupy4syn.commands.ICommand.ICommand>`
+            Command to be executed
+        parameters : :obj:`str` or :obj:`list`
+            Parameters of ``command.exec``
+        mode : :obj:`str`, optional
+            "thread" or "process", by default "thread"
+        write : :obj:`callable`, optional
+            Function receiving the text printed by the command, by default None (printed in the notebook)
+        config : :py:class:`Configuration <jupy4syn.Configuration.Configuration>`, optional
+            Configuration used in logs, by default None
+
+        Returns
+        -------
+        out : :obj:`concurrent.futures.Future`
+            Future with the value returned by ``command.exec``
+        """
+        if mode not in (THREAD, PROCESS):
+            raise ValueError("Invalid execution mode " + str(mode) + ", must be \"thread\" or \"process\"")
+
+        if mode == PROCESS and hasattr(command, "config"):
+            raise ValueError("Command " + name + " needs a Configuration and can't be executed in a process")
+
+        with self._lock:
+            queue_depth = self._queued
+            self._queued += 1
+
+        return self._threads.submit(self._run, name, command, parameters, mode, write, config, queue_depth, time.monotonic())
+
+    def stats(self):
+        """
+        Returns, for each command name, the number of runs and errors, the last and total run
+        times in seconds and the queue depth found by the last submission.
+        """
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+    def shutdown(self, wait=True):
+        self._threads.shutdown(wait=wait)
+
+        if self._processes is not None:
+            self._processes.shutdown(wait=wait)
+            self._manager.shutdown()
+
+    def _process_pool(self):
+        with self._lock:
+            if self._processes is None:
+                # EPICS Channel Access contexts don't survive a fork
+                context = multiprocessing.get_context("spawn")
+
+                self._manager = context.Manager()
+                self._processes = ProcessPoolExecutor(max_workers=self.max_processes, mp_context=context)
+
+            return self._processes
+
+    def _run(self, name, command, parameters, mode, write, config, queue_depth, submitted):
+        with self._lock:
+            self._queued -= 1
+
+        if write is None:
+            return self._execute(name, command, parameters, mode, write, config, queue_depth, submitted)
+
+        with stdout_router().redirect(write):
+            return self._execute(name, command, parameters, mode, write, config, queue_depth, submitted)
+
+    def _execute(self, name, command, parameters, mode, write, config, queue_depth, submitted):
+        started = time.monotonic()
+        logprint("Executing command " + name + " (" + mode + ", queue depth " + str(queue_depth) + ", waited " +
+                 "{:.3f}".format(started - submitted) + " s)", config=config)
+
+        error = False
+        try:
+            if mode == PROCESS:
+                return self._execute_in_process(command, parameters)
+
+            return command.exec(parameters)
+        except Exception:
+            error = True
+            raise
+        finally:
+            run_time = time.monotonic() - started
+
+            with self._lock:
+                stats = self._stats.setdefault(name, {"runs": 0, "errors": 0, "last_time": 0.0, "total_time": 0.0, "last_queue_depth": 0})
+                stats["runs"] += 1
+                stats["errors"] += int(error)
+                stats["last_time"] = run_time
+                stats["total_time"] += run_time
+                stats["last_queue_depth"] = queue_depth
+
+            logprint("Command " + name + " run time: " + "{:.3f}".format(run_time) + " s", config=config)
+
+    def _execute_in_process(self, command, parameters):
+        pool = self._process_pool()
+        queue = self._manager.Queue()
+
+        future = pool.submit(_run_in_process, type(command).__module__, type(command).__name__, parameters, queue)
+        future.add_done_callback(lambda f: queue.put(None))
+
+        # Stream the worker prints until it finishes
+        for text in iter(queue.get, None):
+            sys.stdout.write(text)
+
+        return future.result()
+
+
+# Executor shared by all command buttons
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_command_executor():
+    """
+    Returns the :py:class:`CommandExecutor` shared by all Jupy4Syn command buttons.
+    """
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = CommandExecutor()
+
+        return _executor
@@ -0,0 +1,228 @@
+from collections.abc import Mapping
+import importlib
+import inspect
+import threading
+
+
+# Entry point group of commands registered by other packages, e.g. in their setup.py:
+# entry_points={"jupy4syn.commands": ["my_command = my_package.commands:myCommand"]}
+ENTRY_POINT_GROUP = "jupy4syn.commands"
+
+
+class CommandSpec():
+    def __init__(self, module, class_name, needs_config=True, shared=True):
+        """
+        **Constructor**
+
+        Where a command is defined and how it is instantiated.
+
+        Parameters
+        ----------
+        module : :obj:`str`
+            Module of the command class (e.g. "jupy4syn.commands.ctCommand")
+        class_name : :obj:`str`
+            Command class name (e.g. "ctCommand")
+        needs_config : :obj:`bool`, optional
+            If the command is constructed with a Configuration, by default True. If None, it is
+            constructed with the Configuration if its constructor has any parameter
+        shared : :obj:`bool`, optional
+            If the same instance can be used by all buttons. Commands keeping state from their
+            ``args`` (e.g. the PV of get and put) are instantiated for each button, by default True
+        """
+        self.module = module
+        self.class_name = class_name
+        self.needs_config = needs_config
+        self.shared = shared
+
+    def load(self):
+        return getattr(importlib.import_module(self.module), self.class_name)
+
+
+def _builtin(class_name, needs_config=True, shared=True):
+    return CommandSpec("jupy4syn.commands." + class_name, class_name, needs_config, shared)
+
+
+# Command name -> CommandSpec of the Jupy4Syn commands
+COMMANDS = {
+    "": _builtin("userCommand"),
+    "ct": _builtin("ctCommand", needs_config=False),
+    "wa": _builtin("waCommand", needs_config=False),
+    "wm": _builtin("wmCommand", needs_config=False),
+    "move": _builtin("moveCommand", needs_config=False),
+    "scaler": _builtin("scalerCommand"),
+    "scan_gui": _builtin("scanCommand"),
+    "energy_scan_gui": _builtin("energyscanCommand"),
+    "vortex": _builtin("vortexCommand"),
+    "pymca": _builtin("pymcaCommand"),
+    "put": _builtin("putCommand", shared=False),
+    "get": _builtin("getCommand", shared=False),
+    "slits": _builtin("slitsCommand"),
+    "motors": _builtin("motorsCommand"),
+    "xpra_scaler": _builtin("xpra_scalerCommand"),
+    "xpra_scan_gui": _builtin("xpra_scanCommand"),
+    "xpra_energy_scan_gui": _builtin("xpra_energyscanCommand"),
+    "xpra_vortex": _builtin("xpra_vortexCommand"),
+    "xpra_slits": _builtin("xpra_slitsCommand"),
+    "xpra_pymca": _builtin("xpra_pymcaCommand"),
+    "xpra_motors": _builtin("xpra_motorsCommand"),
+}
+
+
+class CommandRegistry():
+    def __init__(self, specs=None, use_entry_points=True):
+        """
+        **Constructor**
+
+        Maps command names to their classes. A command module is imported and the command is
+        instantiated on first use only. Shared commands are instantiated once per Configuration
+        and used by every button.
+
+        Parameters
+        ----------
+        specs : :obj:`dict`, optional
+            Command name -> :py:class:`CommandSpec`, by default None (Jupy4Syn commands)
+        use_entry_points : :obj:`bool`, optional
+            Also load the commands registered in the "jupy4syn.commands" entry point group, by default True
+
+        Examples
+        --------
+        >>> registry = get_command_registry()
+        >>> registry.register("my_command", CommandSpec("my_package.commands", "myCommand"))
+        >>> registry.create("ct", config)
+        <jupy4syn.commands.ctCommand.ctCommand object at 0x7f...>
+        """
+        self._specs = dict(COMMANDS if specs is None else specs)
+        self._entry_points_loaded = not use_entry_points
+
+        # (command name, Configuration) -> shared instance
+        self._instances = {}
+        self._lock = threading.RLock()
+
+    def register(self, name, spec):
+        """
+        Register (or replace) the command ``name``.
+        """
+        with self._lock:
+            self._specs[name] = spec
+            for key in [key for key in self._instances if key[0] == name]:
+                del self._instances[key]
+
+    def names(self):
+        self._load_entry_points()
+
+        return list(self._specs)
+
+    def spec(self, name):
+        if name not in self._specs:
+            self._load_entry_points()
+
+        return self._specs[name]
+
+    def create(self, name, config):
+        """
+        Returns the command ``name`` for ``config``: the shared instance, or a new one if the command isn't shared.
+
+        Raises
+        ------
+        KeyError
+            If there is no command with this name
+        """
+        spec = self.spec(name)
+
+        if not spec.shared:
+            return self._instantiate(spec, config)
+
+        with self._lock:
+            key = (name, config)
+            if key not in self._instances:
+                self._instances[key] = self._instantiate(spec, config)
+
+            return self._instances[key]
+
+    def loaded(self):
+        """
+        Returns the names of the commands already instantiated.
+        """
+        with self._lock:
+            return sorted({name for name, config in self._instances})
+
+    def _instantiate(self, spec, config):
+        command_class = spec.load()
+
+        needs_config = spec.needs_config
+        if needs_config is None:
+            needs_config = len(inspect.signature(command_class).parameters) > 0
+
+        if needs_config:
+            return command_class(config)
+
+        return command_class()
+
+    def _load_entry_points(self):
+        with self._lock:
+            if self._entry_points_loaded:
+                return
+
+            self._entry_points_loaded = True
+
+            try:
+                from importlib.metadata import entry_points
+            except ImportError:
+                return
+
+            found = entry_points()
+            if hasattr(found, "select"):
+                found = found.select(group=ENTRY_POINT_GROUP)
+            else:
+                found = found.get(ENTRY_POINT_GROUP, [])
+
+            for entry_point in found:
+                if entry_point.name in self._specs:
+                    continue
+
+                module, _, class_name = entry_point.value.partition(":")
+                self._specs[entry_point.name] = CommandSpec(module.strip(), class_name.strip(), needs_config=None)
+
+
+class CommandMapping(Mapping):
+    def __init__(self, registry, config):
+        """
+        **Constructor**
+
+        Read only mapping (command name -> command) of a button, instantiating commands on first access.
+        """
+        self.registry = registry
+        self.config = config
+        self._commands = {}
+
+    def __getitem__(self, name):
+        command = self._commands.get(name)
+        if command is None:
+            command = self.registry.create(name, self.config)
+            self._commands[name] = command
+
+        return command
+
+    def __iter__(self):
+        return iter(self.registry.names())
+
+    def __len__(self):
+        return len(self.registry.names())
+
+
+# Registry shared by all command buttons
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_command_registry():
+    """
+    Returns the :py:class:`CommandRegistry` shared by all Jupy4Syn command buttons.
+    """
+    global _registry
+
+    with _registry_lock:
+        if _registry is None:
+            _registry = CommandRegistry()
+
+        return _registry
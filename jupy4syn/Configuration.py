@@ -1,12 +1,118 @@
 import yaml
 import os
+import threading
 
 # Widgets
 import ipywidgets as widgets
 from IPython.display import display
 
-# scan-utils
-import scan_utils.configuration as scan_utils
+
+USERS_DISPLAYS_FILE = "/etc/jupyterhub-displays/users_displays.yml"
+
+# Parsed YAML files shared by all Configuration instances, path -> (mtime, data)
+_yaml_cache = {}
+_scan_utils_configuration = None
+_default_configuration = None
+_lock = threading.Lock()
+
+
+def load_yaml(path):
+    """
+    Returns the parsed contents of a YAML file. Files are parsed once and memoized by path and
+    modification time, so the same file isn't parsed again unless it changes.
+
+    Parameters
+    ----------
+    path : :obj:`str`
+        Path of the YAML file
+
+    Returns
+    -------
+    out : :obj:`dict`
+        Parsed file, an empty dict if the file is empty
+    """
+    mtime = os.stat(path).st_mtime_ns
+
+    with _lock:
+        cached = _yaml_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+    with open(path, "r") as file:
+        data = yaml.safe_load(file)
+
+        # yaml.safe_load returns a NoneType object if the file is empty
+        if data is None:
+            data = {}
+
+    with _lock:
+        _yaml_cache[path] = (mtime, data)
+
+    return data
+
+
+def _scan_utils_configuration_path(configuration, module):
+    # config.yml read by scan-utils: a YAML path held by the configuration or its module,
+    # else the config.yml of the working directory
+    candidates = list(vars(configuration).values()) if hasattr(configuration, "__dict__") else []
+    candidates += list(vars(module).values()) + ["config.yml"]
+
+    for value in candidates:
+        if isinstance(value, str) and value.endswith((".yml", ".yaml")) and os.path.isfile(value):
+            return os.path.abspath(value)
+
+    return None
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def scan_utils_configuration():
+    """
+    Returns the scan-utils configuration (config.yml motors and counters), loaded on first use
+    and shared by all Jupy4Syn widgets. It is memoized by the config.yml modification time, so
+    an edited config.yml is loaded again on the next call.
+    """
+    global _scan_utils_configuration
+
+    with _lock:
+        previous = None
+        if _scan_utils_configuration is not None:
+            configuration, previous, mtime = _scan_utils_configuration
+            if previous is None or _mtime(previous) == mtime:
+                return configuration
+
+            # Read before parsing, so an edit made while the file is parsed is loaded next time
+            mtime = _mtime(previous)
+
+        import scan_utils.configuration as scan_utils
+
+        configuration = scan_utils.Configuration()
+        path = _scan_utils_configuration_path(configuration, scan_utils)
+        if path != previous:
+            mtime = _mtime(path) if path is not None else None
+
+        _scan_utils_configuration = (configuration, path, mtime)
+
+        return configuration
+
+
+def default_configuration():
+    """
+    Returns the Configuration used by widgets created without a ``config`` argument.
+    It is created on first use, not when Jupy4Syn modules are imported.
+    """
+    global _default_configuration
+
+    with _lock:
+        if _default_configuration is None:
+            _default_configuration = Configuration()
+
+        return _default_configuration
 
 
 class Configuration():
@@ -17,7 +123,21 @@ class Configuration():
         - Printing log in the output cell
         - Notebook's name
         - Display settings
-        - Plot information
+        - Plot information (e.g. ``plot_max_fps``, the maximum number of live plot updates sent to the browser per second,
+          and ``plot_max_points``, the number of points of each trace sent to the browser)
+        - Monitors refresh rate (``monitor_refresh_rate``, the maximum number of PVMonitor and
+          MotorsMonitor widget refreshes per second)
+        - Commands execution mode (``command_modes``, command name -> "thread" or "process",
+          commands not in it are executed in a thread)
+        - Binary cache of completed scans (``scan_cache``, off by default, ScanGUI and EnergyScanButton
+          write a ``.npy``/``.json`` sidecar of each scan file they follow in a ``.jupy4syn-cache``
+          directory next to it, used by :py:func:`jupy4syn.ScanFileCache.load_scan`)
+        - Live scan data from shared memory (``scan_shared_memory``, ScanGUI reads the points from the
+          ring buffer published by the scan writer, see :py:mod:`jupy4syn.ScanRingBuffer`, instead of
+          the scan files; set ``plot_max_fps`` to 10 or more for a sub-100 ms plot latency)
+
+        config.yml motors and counters (``yml_motors``, ``yml_counters``) and the display
+        number (``display_number``) are loaded on first access.
         """
         self.checkbox_logprint_in_cell = widgets.Checkbox(
             value=False,
@@ -36,34 +156,45 @@ class Configuration():
 
         self.config = {"log_cell": self.checkbox_logprint_in_cell}
         self.plots_list = []
+        self.plot_max_fps = 2.0
+        self.plot_max_points = 2000
+        self.monitor_refresh_rate = 10.0
+        self.command_modes = {}
+        self.scan_cache = False
+        self.scan_shared_memory = False
 
         self.output = widgets.Output()
 
-        self.yml_motors = scan_utils.Configuration()['motors']
-        self.yml_counters = scan_utils.Configuration()['counters']
+        self._display_number = None
+
+    @property
+    def yml_motors(self):
+        return scan_utils_configuration()['motors']
+
+    @property
+    def yml_counters(self):
+        return scan_utils_configuration()['counters']
+
+    @property
+    def display_number(self):
+        if self._display_number is not None:
+            return self._display_number
 
         # Test if execution is in a JupyterHub environment, a local Jupyter environment
-        if 'JUPYTERHUB_USER' in os.environ.keys():
-            user = os.environ['JUPYTERHUB_USER']
-            jupyterhub = True
-        else:
-            jupyterhub = False
-
-        if jupyterhub:
-            with open("/etc/jupyterhub-displays/users_displays.yml", "r") as file:
-                data = yaml.safe_load(file)
-                
-                # yaml.safe_load returns a NoneType object if the file is empty
-                if data is None:
-                    data = {}
-            try:
-                self.display_number = str(data[user])
-            except KeyError as e:
-                raise("User '" + user + "' not defined in display users. Please, contact support.\n" + str(e))
-
-        else:
-            self.display_number = ':0.0'
+        if 'JUPYTERHUB_USER' not in os.environ.keys():
+            return ':0.0'
+
+        user = os.environ['JUPYTERHUB_USER']
+        data = load_yaml(USERS_DISPLAYS_FILE)
+
+        try:
+            return str(data[user])
+        except KeyError as e:
+            raise KeyError("User '" + user + "' not defined in display users. Please, contact support.\n" + str(e))
 
+    @display_number.setter
+    def display_number(self, value):
+        self._display_number = value
 
     def display(self):
         """
@@ -0,0 +1,142 @@
+import numpy as np
+
+
+def minmax_indices(y, max_points):
+    """
+    Indices of the minimum and maximum of ``y`` in each of ``max_points / 2`` buckets,
+    plus the first and last points. Every local extremum that is the highest (or lowest)
+    point of its bucket is kept, so peaks stay visible.
+
+    Parameters
+    ----------
+    y : :obj:`numpy.ndarray`
+        Values to be decimated
+    max_points : :obj:`int`
+        Maximum number of indices returned (approximately)
+
+    Returns
+    -------
+    out : :obj:`numpy.ndarray`
+        Sorted indices of the points to keep
+    """
+    n = len(y)
+    buckets = max(1, max_points // 2)
+    if n <= max(2 * buckets, 2):
+        return np.arange(n)
+
+    size = -(-n // buckets)
+    number_buckets = -(-n // size)
+    pad = number_buckets * size - n
+
+    # NaNs are never chosen as minimum or maximum
+    nan = np.isnan(y)
+    low = np.concatenate([np.where(nan, np.inf, y), np.full(pad, np.inf)]).reshape(number_buckets, size)
+    high = np.concatenate([np.where(nan, -np.inf, y), np.full(pad, -np.inf)]).reshape(number_buckets, size)
+
+    offsets = np.arange(number_buckets) * size
+    indices = np.concatenate([[0, n - 1], offsets + low.argmin(axis=1), offsets + high.argmax(axis=1)])
+
+    return np.unique(np.minimum(indices, n - 1))
+
+
+def lttb_indices(x, y, max_points):
+    """
+    Largest-Triangle-Three-Buckets downsampling. The global minimum and maximum of ``y``
+    are always kept.
+
+    Parameters
+    ----------
+    x : :obj:`numpy.ndarray`
+        Abscissa values
+    y : :obj:`numpy.ndarray`
+        Values to be decimated
+    max_points : :obj:`int`
+        Number of points of the LTTB selection
+
+    Returns
+    -------
+    out : :obj:`numpy.ndarray`
+        Sorted indices of the points to keep
+    """
+    n = len(y)
+    if max_points < 3 or n <= max_points:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.intp)
+    selected = np.empty(max_points, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+
+        # Average point of the next bucket
+        next_start = end
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_end = max(next_end, next_start + 1)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.nanargmax(area)) if not np.all(np.isnan(area)) else start
+        selected[i + 1] = a
+
+    extrema = [np.nanargmin(y), np.nanargmax(y)] if not np.all(np.isnan(y)) else []
+
+    return np.unique(np.concatenate([selected, extrema]).astype(np.intp))
+
+
+def decimate(x, y, max_points, x_range=None, method='minmax'):
+    """
+    Select a screen-sized subset of a trace.
+
+    When ``x_range`` is given (the visible window of the plot), points inside the window use
+    the whole ``max_points`` budget and points outside it are kept at a coarser resolution,
+    so the trace doesn't disappear while panning.
+
+    Parameters
+    ----------
+    x : :obj:`numpy.ndarray`
+        Abscissa values
+    y : :obj:`numpy.ndarray`
+        Ordinate values
+    max_points : :obj:`int`
+        Number of points for the visible window
+    x_range : :obj:`tuple`, optional
+        Visible (min, max) abscissa window, by default None (whole trace)
+    method : :obj:`str`, optional
+        "minmax" (min/max per bucket) or "lttb", by default "minmax"
+
+    Returns
+    -------
+    out : :obj:`tuple` of :obj:`numpy.ndarray`
+        Decimated (x, y)
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+
+    if len(y) <= max_points:
+        return x, y
+
+    if method == 'lttb':
+        select = lambda indices, budget: indices[lttb_indices(x[indices], y[indices], budget)]
+    elif method == 'minmax':
+        select = lambda indices, budget: indices[minmax_indices(y[indices], budget)]
+    else:
+        raise ValueError("Invalid decimation method '" + str(method) + "'. Use 'minmax' or 'lttb'")
+
+    if x_range is None or None in x_range:
+        indices = select(np.arange(len(y)), max_points)
+    else:
+        low, high = min(x_range), max(x_range)
+        inside = (x >= low) & (x <= high)
+
+        indices = np.concatenate([select(np.flatnonzero(inside), max_points),
+                                  select(np.flatnonzero(~inside), max(2, max_points // 10))])
+        indices.sort()
+
+    return x[indices], y[indices]
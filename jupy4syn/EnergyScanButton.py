@@ -1,11 +1,11 @@
-import os
 from pathlib import Path
+import os
 import subprocess
+import threading
 import time
 
 # Auxiliar packages
 import numpy as np
-import pandas as pd
 
 # Widgets
 import ipywidgets as widgets
@@ -16,7 +16,14 @@ import plotly.graph_objs as go
 from plotly import tools
 
 # Jupy4Syn
+from jupy4syn.CommandExecutor import stdout_router
 from jupy4syn.JupyScan import JupyScan
+from jupy4syn.derivatives import DerivativeTracker
+from jupy4syn.FileWatcher import FileWatcher, wait_for_data
+from jupy4syn.PlotUpdater import PlotUpdater
+from jupy4syn.ScanFileCache import cache_tail
+from jupy4syn.ScanFileTail import ScanFileTail
+from jupy4syn.ScanNameResolver import next_scan_index, scan_file_name
 from jupy4syn.utils import logprint
 
 
@@ -122,6 +129,12 @@ class EnergyScanButton(widgets.Button):
         self.motor_list = []
 
         self.scan_names = []
+
+        # Scan process, live plot thread and derivatives of each counter
+        self.process = None
+        self.plot_thread = None
+        self.trackers = []
+        self.poll_interval = 0.5
         
         # Callback flags
         self.on_scan = False
@@ -130,6 +143,7 @@ class EnergyScanButton(widgets.Button):
 
         self.fig = go.FigureWidget()
         self.fig_box = widgets.Box()
+        self.plot_updater = PlotUpdater(self.fig, max_fps=config.plot_max_fps, max_points=config.plot_max_points)
         
         # Main widget
         self.main_box = widgets.VBox([widgets.HBox([widgets.Label("Motors names", layout=widgets.Layout(width='150px')), self.text_motors]),
@@ -233,122 +247,135 @@ class EnergyScanButton(widgets.Button):
                           " --step-or-points " + step_or_points + \
                           " --time " + time + \
                           " --edge " + str(edge)
-                
-                subprocess.run([command],shell=True, check=True)
+
+                # Index of the file the scan will create, known before it can create it
+                first_index = next_scan_index(output)
+
+                # The scan runs in background, the plot is updated by thread_plot while it runs
+                b.process = subprocess.Popen([command], shell=True)
                 logprint("Started scan, output saved in file " + output, config=b.config)
 
+                b.plot_thread = threading.Thread(target=b.thread_plot, args=(b.process, output, len(motor_list_names), boxes, first_index),
+                                                 daemon=True)
+                b.plot_thread.start()
+
             except Exception as e:
                 # If any error occurs, log that but dont stop code exection
                 logprint("Error in trying to energy scan", "[ERROR]", config=b.config)
                 logprint(str(e), "[ERROR]", config=b.config)
 
-            b.scan_names = b.get_scan_name(output, 1)
-
-            dfs = []
-            dfs.append(pd.DataFrame())
-            while dfs[0].empty:
-                label = []
-                dfs, label = b.update_pd(b.scan_names, label)
+                b.finish_scan(boxes)
 
-            number_motors = len(motor_list_names)
+    def thread_plot(self, process, output, number_motors, boxes, first_index):
+        # Runs while the scan process is running, plotting the points appended to the scan file
+        with stdout_router().redirect(self.output.append_stdout):
+            self.scan_names = self.get_scan_name(output, 1, first_index)
+            if self.scan_names is None:
+                logprint("Energy scan file " + scan_file_name(output, first_index) + " wasn't created", "[ERROR]",
+                         config=self.config)
+                self.finish_scan(boxes)
+                return
 
-            b.create_figure(len(dfs[0].columns) - number_motors)
+            tail = ScanFileTail(self.scan_names[0])
 
-            # Plot
             try:
-                for i in range(len(dfs)):
-                    if dfs[i].empty:
-                        continue
+                # Wait the header and the first point, or the scan process to end
+                wait = wait_for_data(lambda: tail.poll() > 0, tail.file_name,
+                                     should_continue=lambda: process.poll() is None, max_delay=self.poll_interval)
+                logprint("Waited {:.3f} s for the first energy scan point".format(wait.waited), config=self.config)
 
-                    diff_df = dfs[i].diff().dropna()
-                    diff_diff_df = diff_df[i].diff().dropna()
+                tail.poll()
+                if tail.points == 0:
+                    logprint("Energy scan finished without points", "[ERROR]", config=self.config)
+                else:
+                    number_counters = tail.number_columns - number_motors
 
-                    for j in range(len(dfs[i].columns) - number_motors):
-                        # Plot function
-                        b.fig['data'][i + j*len(dfs) + j]['x'] = dfs[i].index.values
-                        b.fig['data'][i + j*len(dfs) + j]['y'] = dfs[i][dfs[i]. columns[number_motors + j]].values
+                    self.create_figure(number_counters)
+                    self.trackers = [DerivativeTracker() for _ in range(number_counters)]
 
-                        # Plot First Diff function
-                        b.fig['data'][i + 1 + j*len(dfs) + j]['x'] = diff_df.index.values
-                        b.fig['data'][i + 1 + j*len(dfs) + j]['y'] = (diff_df[diff_df.columns[number_motors + j]] / diff_df[0]).values
+                    self.plot_tail(tail, number_motors)
 
-                        # Plot Second Diff function
-                        b.fig['data'][i + 2 + j*len(dfs) + j]['x'] = diff_diff_df.index.values
-                        b.fig['data'][i + 2 + j*len(dfs) + j]['y'] = (diff_diff_df[diff_diff_df.columns[number_motors + j]] / diff_df[0]).values
+                    while process.poll() is None:
+                        time.sleep(self.poll_interval)
+
+                        if tail.poll():
+                            self.plot_tail(tail, number_motors)
+
+                    # Points written before the process ended
+                    tail.poll()
+                    self.plot_tail(tail, number_motors, force=True)
+
+                    stats = self.plot_updater.stats()
+                    logprint("Energy scan plot updates: " + str(stats["frames_sent"]) + " frames, " +
+                             str(stats["bytes_sent"]) + " bytes sent, " +
+                             str(stats["updates_dropped"]) + " updates dropped", config=self.config)
+
+                if process.wait() != 0:
+                    logprint("Energy scan exited with code " + str(process.returncode), "[ERROR]", config=self.config)
+                else:
+                    logprint("Finished energy scan", config=self.config)
+
+                # Binary sidecar of the completed scan file, for fast reloads
+                if self.config.scan_cache:
+                    cache_tail(tail)
 
             except Exception as e:
-                logprint("Error in trying to plot energy scan", "[ERROR]", config=b.config)
-                logprint(str(e), "[ERROR]", config=b.config)
+                logprint("Error in trying to plot energy scan", "[ERROR]", config=self.config)
+                logprint(str(e), "[ERROR]", config=self.config)
 
-            # Change button appearence
-            b.description = 'Start Energy Scan'
-            b.button_style = 'success'
+            tail.close()
 
-            # Re enable button
-            b.disabled = False
+            self.finish_scan(boxes)
 
-            # Re enable box edition 
-            for box in boxes:
-                box.disabled = False
-               
-    def get_scan_name(self, fileName, number_repeats):
-        # Waits for file to be written by scan writter
-        time.sleep(1.0)
-
-        scan_names = []
-
-        leadingZeros = 4
-        newName = ""
-        cont = 0
-        while(True):
-            cont += 1
-            newName = fileName + "_" + str(cont).zfill(leadingZeros)
-            if(os.path.isfile(newName)):
-                continue
-            else:
-                for i in range(number_repeats):
-                    scan_names.append(fileName + "_" + str(cont - 1 + i).zfill(leadingZeros))
-                break
-                
-        return scan_names
+    def plot_tail(self, tail, number_motors, force=False):
+        index = np.arange(tail.points)
 
-    def update_pd(self, default_names, label):
-        dfs = []
-        number_non_empty = len(default_names)
+        for j, tracker in enumerate(self.trackers):
+            # Derivatives with respect to the energy (first motor column), only new points are derived
+            start = tracker.size
+            with np.errstate(divide='ignore', invalid='ignore'):
+                tracker.append(tail.column(0, start), tail.column(number_motors + j, start))
 
-        for default_name in default_names:
-            try:
-                dfs.append(pd.read_csv(default_name, sep=' ', comment='#', header=None))
-            except:
-                dfs.append(pd.DataFrame())
-                number_non_empty -= 1
-
-        if number_non_empty == 0:
-            return dfs, label
-
-        filtered_label = label
-        if not label:
-            labels = []
-            with open(default_names[0]) as file:
-                for i, line in enumerate(file):
-                    if i == 6:
-                        self.number_reads = (int(line.split(' ')[1]))
-                    elif i == 8:
-                        labels = line.split(' ')[1:]
-                        break
-
-            labels = list(filter(lambda x: x != '', labels))
-
-            for item in labels:
-                filtered_label.append(item.rstrip('\n'))
-
-            label = filtered_label
-
-        for df in dfs:
-            if not df.empty:
-                df.columns = pd.Index(filtered_label, dtype='object')
-        
-        return dfs, label
+            # Function, first and second derivatives
+            self.plot_updater.update(3*j, index, tail.column(number_motors + j))
+            self.plot_updater.update(3*j + 1, index, tracker.first)
+            self.plot_updater.update(3*j + 2, index, tracker.second)
+
+        # Changes are sent in a single message, limited to config.plot_max_fps messages per second
+        self.plot_updater.flush(force=force)
+
+    def finish_scan(self, boxes):
+        # Change button appearence
+        self.description = 'Start Energy Scan'
+        self.button_style = 'success'
+
+        # Re enable button
+        self.disabled = False
+
+        # Re enable box edition
+        for box in boxes:
+            box.disabled = False
+
+    def get_scan_name(self, fileName, number_repeats, first_index, timeout=10.0):
+        # Waits for the scan file to be created by the scan writer, returns None if it isn't created
+        # before the timeout or the scan process exits
+        scan_names = [scan_file_name(fileName, first_index + i) for i in range(number_repeats)]
+
+        watcher = FileWatcher(poll_interval=0.1)
+        watcher.add_file(scan_names[0])
+
+        # The file may have been created before the watcher was attached
+        created = lambda: os.path.exists(scan_names[0])
+
+        deadline = time.monotonic() + timeout
+        remaining = timeout
+        while remaining > 0 and self.process.poll() is None and not created():
+            watcher.wait(timeout=min(remaining, 1.0))
+            remaining = deadline - time.monotonic()
+
+        watcher.close()
+
+        return scan_names if created() else None
 
     def create_figure(self, number_traces):
         self.traces = []
@@ -388,5 +415,7 @@ class EnergyScanButton(widgets.Button):
         self.fig['layout'].update(title='Scan', plot_bgcolor='rgb(230, 230, 230)')
         self.fig_box.children = (self.fig,)
 
+        self.plot_updater = PlotUpdater(self.fig, max_fps=self.config.plot_max_fps, max_points=self.config.plot_max_points)
+
     def display(self):
         display(self.main_box, self.fig_box, self.output)
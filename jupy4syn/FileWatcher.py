@@ -0,0 +1,442 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+
+
+# inotify event masks (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_STRUCT = struct.Struct('iIII')
+
+
+class FileEvent():
+    def __init__(self, path, mask):
+        """
+        **Constructor**
+
+        Event delivered by a :py:class:`FileWatcher`.
+
+        Parameters
+        ----------
+        path : :obj:`str`
+            Path of the file that generated the event
+        mask : :obj:`int`
+            inotify mask of the event (IN_CREATE, IN_CLOSE_WRITE, IN_MODIFY, ...)
+        """
+        self.path = path
+        self.mask = mask
+
+    @property
+    def created(self):
+        return bool(self.mask & (IN_CREATE | IN_MOVED_TO))
+
+    @property
+    def closed_write(self):
+        return bool(self.mask & IN_CLOSE_WRITE)
+
+    def __repr__(self):
+        return "FileEvent(%r, %#x)" % (self.path, self.mask)
+
+
+class _InotifyBackend():
+    def __init__(self):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+        # Watch descriptor -> directory
+        self.directories = {}
+
+    def add_directory(self, directory, mask):
+        if directory in self.directories.values():
+            return
+
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), directory)
+
+        self.directories[wd] = directory
+
+    def fileno(self):
+        return self.fd
+
+    def read_events(self):
+        events = []
+
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return events
+
+        offset = 0
+        while offset + _EVENT_STRUCT.size <= len(buffer):
+            wd, mask, _, length = _EVENT_STRUCT.unpack_from(buffer, offset)
+            offset += _EVENT_STRUCT.size
+
+            name = buffer[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            directory = self.directories.get(wd)
+            if directory is not None and name:
+                events.append(FileEvent(os.path.join(directory, os.fsdecode(name)), mask))
+
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileWatcher():
+    def __init__(self, poll_interval=0.5, use_inotify=True, modify_events=False):
+        """
+        **Constructor**
+
+        Watches files and file name prefixes for creation and write events.
+        Uses Linux inotify (through ctypes) when it is available, otherwise falls back to
+        polling the watched paths every ``poll_interval`` seconds.
+
+        Parameters
+        ----------
+        poll_interval : :obj:`float`, optional
+            Polling period in seconds when inotify isn't available, by default 0.5
+        use_inotify : :obj:`bool`, optional
+            Try to use the inotify backend, by default True
+        modify_events : :obj:`bool`, optional
+            Also report writes to files that are still open (inotify IN_MODIFY), by default False
+            (only creations and closed writes)
+
+        Examples
+        --------
+        >>> watcher = FileWatcher()
+        >>> watcher.add_file("/tmp/scan_gui.temp")
+        >>> watcher.add_prefix("scans/test_")
+        >>> events = watcher.wait(timeout=1.0)
+        """
+        self.poll_interval = poll_interval
+
+        self.mask = IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO
+        if modify_events:
+            self.mask |= IN_MODIFY
+
+        self.files = set()
+        self.prefixes = set()
+
+        # Polling state, path -> (size, mtime)
+        self._snapshot = {}
+
+        self._wake_event = threading.Event()
+        self._wake_read, self._wake_write = os.pipe()
+        os.set_blocking(self._wake_read, False)
+        os.set_blocking(self._wake_write, False)
+
+        # wake may be called from another thread while the watcher is closed
+        self._close_lock = threading.Lock()
+        self._closed = False
+
+        self.backend = None
+        if use_inotify:
+            try:
+                self.backend = _InotifyBackend()
+            except (OSError, AttributeError):
+                self.backend = None
+
+    @property
+    def uses_inotify(self):
+        return self.backend is not None
+
+    def add_file(self, path):
+        """
+        Watch a single file.
+        """
+        path = os.path.abspath(str(path))
+        self.files.add(path)
+        self._add_directory(os.path.dirname(path))
+        self._snapshot[path] = self._stat(path)
+
+    def add_prefix(self, prefix):
+        """
+        Watch every file whose path starts with ``prefix`` (e.g. numbered scan files "scans/test_").
+        """
+        prefix = os.path.abspath(str(prefix))
+        self.prefixes.add(prefix)
+        self._add_directory(os.path.dirname(prefix))
+
+        for path in self._list_prefix(prefix):
+            self._snapshot[path] = self._stat(path)
+
+    def wake(self):
+        """
+        Wake up a thread blocked in :py:meth:`wait`. Does nothing if the watcher is closed.
+        """
+        with self._close_lock:
+            if self._closed:
+                return
+
+            self._wake_event.set()
+
+            try:
+                os.write(self._wake_write, b'\0')
+            except BlockingIOError:
+                # Pipe full, the waiting thread is already waken up
+                pass
+
+    def wait(self, timeout=None):
+        """
+        Block until a watched file is created or written, :py:meth:`wake` is called or ``timeout`` expires.
+
+        Parameters
+        ----------
+        timeout : :obj:`float`, optional
+            Maximum time to wait in seconds, by default None (wait forever)
+
+        Returns
+        -------
+        out : :obj:`list` of :py:class:`FileEvent`
+            Events of the watched paths, empty if the timeout expired or the watcher was waken up
+        """
+        if self.backend is not None:
+            return self._wait_inotify(timeout)
+
+        return self._wait_polling(timeout)
+
+    def close(self):
+        """
+        Release the watcher, closing it again does nothing.
+        """
+        with self._close_lock:
+            if self._closed:
+                return
+
+            self._closed = True
+
+            if self.backend is not None:
+                self.backend.close()
+                self.backend = None
+
+            os.close(self._wake_read)
+            os.close(self._wake_write)
+
+    def _add_directory(self, directory):
+        if self.backend is not None:
+            try:
+                self.backend.add_directory(directory, self.mask)
+            except OSError:
+                # Directory doesn't exist yet or can't be watched, poll instead
+                self.backend.close()
+                self.backend = None
+
+    def _is_watched(self, path):
+        return path in self.files or any(path.startswith(prefix) for prefix in self.prefixes)
+
+    def _wait_inotify(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            remaining = None
+            if deadline is not None:
+                remaining = max(0.0, deadline - time.monotonic())
+
+            readable, _, _ = select.select([self.backend.fileno(), self._wake_read], [], [], remaining)
+
+            if self._wake_read in readable:
+                self._drain_wake()
+                return []
+
+            if self.backend.fileno() not in readable:
+                return []
+
+            # Events of other files in the watched directories are discarded
+            events = [event for event in self.backend.read_events() if self._is_watched(event.path)]
+            if events:
+                return events
+
+    def _wait_polling(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            events = self._poll_changes()
+            if events:
+                return events
+
+            interval = self.poll_interval
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                interval = min(interval, remaining)
+
+            if self._wake_event.wait(interval):
+                self._drain_wake()
+                return []
+
+    def _drain_wake(self):
+        self._wake_event.clear()
+        try:
+            while os.read(self._wake_read, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _poll_changes(self):
+        paths = set(self.files)
+        for prefix in self.prefixes:
+            paths.update(self._list_prefix(prefix))
+
+        events = []
+        for path in paths:
+            stat = self._stat(path)
+            previous = self._snapshot.get(path)
+
+            if stat != previous:
+                self._snapshot[path] = stat
+
+                if stat is not None:
+                    # Polling can't distinguish a creation from a finished write, report both
+                    mask = IN_CREATE | IN_CLOSE_WRITE if previous is None else IN_CLOSE_WRITE
+                    events.append(FileEvent(path, mask))
+
+        return events
+
+    @staticmethod
+    def _list_prefix(prefix):
+        directory, name_prefix = os.path.split(prefix)
+
+        try:
+            with os.scandir(directory) as entries:
+                return [entry.path for entry in entries if entry.name.startswith(name_prefix)]
+        except OSError:
+            return []
+
+    @staticmethod
+    def _stat(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        return (stat.st_size, stat.st_mtime_ns)
+
+
+class WaitResult():
+    def __init__(self, ready, waited, attempts):
+        """
+        **Constructor**
+
+        Result of :py:func:`wait_for_data`.
+
+        Parameters
+        ----------
+        ready : :obj:`bool`
+            If the data was ready, False if the wait timed out or was aborted
+        waited : :obj:`float`
+            Time waited in seconds
+        attempts : :obj:`int`
+            Number of times the readiness was checked
+        """
+        self.ready = ready
+        self.waited = waited
+        self.attempts = attempts
+
+    def __bool__(self):
+        return self.ready
+
+    def __repr__(self):
+        return "WaitResult(ready=%s, waited=%.3f, attempts=%d)" % (self.ready, self.waited, self.attempts)
+
+
+def wait_for_data(ready, path=None, timeout=None, should_continue=None,
+                  initial_delay=0.01, max_delay=1.0, use_inotify=True):
+    """
+    Wait until ``ready()`` returns True, checking it with an exponential backoff (``initial_delay``,
+    doubled after each check, up to ``max_delay``). If ``path`` is given, a :py:class:`FileWatcher`
+    watching it wakes the wait up as soon as the file is created or written (inotify), so the
+    backoff only bounds the wait when inotify isn't available.
+
+    Parameters
+    ----------
+    ready : :obj:`callable`
+        Function returning True when the data is ready (e.g. a scan file has its first point)
+    path : :obj:`str`, optional
+        File being waited, by default None (no file events)
+    timeout : :obj:`float`, optional
+        Maximum time to wait in seconds, by default None (no limit)
+    should_continue : :obj:`callable`, optional
+        Function returning False to abort the wait (e.g. the scan was stopped), by default None
+    initial_delay : :obj:`float`, optional
+        First interval between checks in seconds, by default 0.01
+    max_delay : :obj:`float`, optional
+        Maximum interval between checks in seconds, by default 1.0
+    use_inotify : :obj:`bool`, optional
+        Wake up on file events of ``path``, by default True
+
+    Returns
+    -------
+    out : :py:class:`WaitResult`
+        If the data is ready, the time waited and the number of checks
+
+    Examples
+    --------
+    >>> tail = ScanFileTail("scans/test_0001")
+    >>> result = wait_for_data(lambda: tail.poll() > 0, tail.file_name, timeout=60)
+    >>> result
+    WaitResult(ready=True, waited=0.412, attempts=4)
+    """
+    started = time.monotonic()
+    deadline = None if timeout is None else started + timeout
+
+    watcher = None
+    if path is not None and use_inotify:
+        watcher = FileWatcher(poll_interval=max_delay, modify_events=True)
+        watcher.add_file(path)
+
+        # Without inotify, the watcher polling would only repeat the backoff
+        if not watcher.uses_inotify:
+            watcher.close()
+            watcher = None
+
+    delay = initial_delay
+    attempts = 0
+
+    try:
+        while True:
+            attempts += 1
+            if ready():
+                return WaitResult(True, time.monotonic() - started, attempts)
+
+            if should_continue is not None and not should_continue():
+                break
+
+            interval = delay
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                interval = min(interval, remaining)
+
+            if watcher is not None:
+                watcher.wait(timeout=interval)
+            else:
+                time.sleep(interval)
+
+            delay = min(2 * delay, max_delay)
+    finally:
+        if watcher is not None:
+            watcher.close()
+
+    return WaitResult(False, time.monotonic() - started, attempts)
@@ -0,0 +1,146 @@
+import threading
+
+# Widgets
+import ipywidgets as widgets
+from IPython.display import display
+
+# Jupy4Syn
+from jupy4syn.Configuration import default_configuration
+from jupy4syn.CommandExecutor import stdout_router
+from jupy4syn.JobRunner import JobCancelled, get_job_runner
+from jupy4syn.utils import logprint
+
+
+class JobButton(widgets.Button):
+
+    def __init__(self, job_name, config=None, *args, refresh_interval=0.2, **kwargs):
+        """
+        **Constructor**
+
+        Base class of buttons running a job in the shared :py:class:`JobRunner <jupy4syn.JobRunner.JobRunner>`.
+        The job doesn't block the notebook, its prints are streamed to the button output, the elapsed
+        time is shown while it runs and it can be stopped with a Cancel button.
+        Subclasses implement :py:meth:`job`.
+
+        Parameters
+        ----------
+        job_name : :obj:`str`
+            Name shown in the button and logs (e.g. "wm")
+        config : :py:class:`Configuration <jupy4syn.Configuration.Configuration>`, optional
+            Configuration object that contains Jupyter Notebook runtime information, by default None (shared default Configuration)
+        refresh_interval : :obj:`float`, optional
+            Elapsed time refresh interval in seconds, by default 0.2
+        """
+        widgets.Button.__init__(self, *args, **kwargs)
+
+        # Config
+        if config is None:
+            config = default_configuration()
+
+        self.config = config
+
+        self.job_name = job_name
+        self.refresh_interval = refresh_interval
+        self.running_job = None
+
+        # class Button values
+        self.description = 'Execute ' + job_name
+        self.disabled = False
+        self.button_style = 'success'
+        self.tooltip = 'Click me'
+        self.icon = ''
+        self.layout = widgets.Layout(width='300px')
+
+        # Cancel button and elapsed time
+        self.cancel_button = widgets.Button(
+            description='Cancel',
+            disabled=True,
+            button_style='danger',
+            layout=widgets.Layout(width='100px')
+        )
+        self.cancel_button.on_click(lambda button: self.cancel())
+        self.elapsed_label = widgets.Label("")
+
+        # Logging
+        self.output = widgets.Output()
+
+        # Set callback function for click event
+        self.on_click(self._start_button)
+
+        # Widgets displays
+        self.start_button = widgets.VBox([widgets.HBox([self, self.cancel_button, self.elapsed_label])])
+
+    def job(self):
+        """
+        Returns the job function, its arguments and the resources it uses (see
+        :py:meth:`JobRunner.submit <jupy4syn.JobRunner.JobRunner.submit>`).
+        """
+        raise NotImplementedError
+
+    def cancel(self):
+        job = self.running_job
+        if job is not None and job.cancel():
+            logprint("Cancelling " + self.job_name, config=self.config)
+
+    @staticmethod
+    def _start_button(b):
+        # Clear previous logs outputs
+        b.output.clear_output()
+
+        # with statement to output logs in stdou (if this option is enabled)
+        with b.output:
+            # Change button to a "clicked status"
+            b.disabled = True
+            b.button_style = ''
+            b.description = 'Executing...'
+
+            try:
+                logprint("Executing " + b.job_name, config=b.config)
+
+                function, args, resources = b.job()
+                b.running_job = get_job_runner().submit(b.job_name, function, args, resources, write=b.output.append_stdout)
+
+                b.cancel_button.disabled = False
+                threading.Thread(target=b._watch_job, args=(b.running_job,), daemon=True).start()
+            except Exception as e:
+                # If any error occurs, log that but dont stop code exection
+                logprint("Error in executing " + b.job_name, "[ERROR]", config=b.config)
+                logprint(str(e), "[ERROR]", config=b.config)
+
+                b._reset_button()
+
+    def _watch_job(self, job):
+        # Show the elapsed time until the job finishes
+        while not job.wait(self.refresh_interval):
+            if job.started is None:
+                self.elapsed_label.value = "Waiting for " + ", ".join(sorted(job.resources))
+            else:
+                self.elapsed_label.value = "{:.1f} s".format(job.elapsed)
+
+        self.elapsed_label.value = "{:.1f} s".format(job.elapsed)
+
+        # Runs in a background thread, log in the button output through the stdout router
+        with stdout_router().redirect(self.output.append_stdout):
+            error = None if job.future.cancelled() else job.future.exception()
+
+            if job.cancelled or isinstance(error, JobCancelled):
+                logprint("Cancelled " + self.job_name, config=self.config)
+            elif error is not None:
+                # If any error occurs, log that but dont stop code exection
+                logprint("Error in executing " + self.job_name, "[ERROR]", config=self.config)
+                logprint(str(error), "[ERROR]", config=self.config)
+            else:
+                logprint("Finished executing " + self.job_name, config=self.config)
+
+        self.running_job = None
+        self._reset_button()
+
+    def _reset_button(self):
+        # Change button layout back to normal
+        self.cancel_button.disabled = True
+        self.disabled = False
+        self.button_style = 'success'
+        self.description = 'Execute ' + self.job_name
+
+    def display(self):
+        display(self.start_button, self.output)
@@ -0,0 +1,366 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+
+# Jupy4Syn
+from jupy4syn.CommandExecutor import stdout_router
+
+
+class JobCancelled(Exception):
+    """
+    Result of a job cancelled while it was running.
+    """
+    pass
+
+
+class JobExited(Exception):
+    """
+    Result of a job that exited with an error code (e.g. ``sys.exit(2)`` on invalid arguments).
+    """
+    pass
+
+
+class _ProcessWriter():
+    # stdout of a job process, the prints are sent to the runner through the queue
+    def __init__(self, queue):
+        self.queue = queue
+
+    def write(self, text):
+        if text:
+            self.queue.put(("output", text))
+
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def _run_in_process(function, args, queue):
+    # Runs in the job process. SIGINT (sent to cancel the job) raises KeyboardInterrupt, which
+    # the scan-utils tools handle as a Ctrl-C in a terminal, stopping the devices
+    sys.stdout = _ProcessWriter(queue)
+
+    try:
+        result = function(*args)
+    except KeyboardInterrupt:
+        queue.put(("cancelled", None))
+        return
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            queue.put(("exited", e.code))
+            return
+        result = None
+    except BaseException as e:
+        queue.put(("error", str(e) or type(e).__name__))
+        return
+
+    try:
+        queue.put(("result", result))
+    except Exception:
+        # Result that can't be pickled
+        queue.put(("result", None))
+
+
+# Job states
+WAITING = "waiting"
+RUNNING = "running"
+DONE = "done"
+
+
+def resources_conflict(first, second):
+    """
+    True if two resource keys can't be used at the same time. Keys are equal, or one of them is a
+    wildcard of the same kind (e.g. "counter:*" conflicts with every "counter:..." key).
+    """
+    if first == second:
+        return True
+
+    first_kind, _, first_name = first.partition(":")
+    second_kind, _, second_name = second.partition(":")
+
+    return first_kind == second_kind and (first_name == "*" or second_name == "*")
+
+
+class Job():
+    def __init__(self, runner, name, function, args, resources, write, process):
+        """
+        **Constructor**
+
+        A function submitted to a :py:class:`JobRunner`. Use :py:attr:`future` to get its result.
+        """
+        self.runner = runner
+        self.name = name
+        self.function = function
+        self.args = args
+        self.resources = frozenset(resources)
+        self.write = write
+        self.process = process
+
+        self.future = Future()
+        self.state = WAITING
+        self.cancelled = False
+        self.submitted = time.monotonic()
+        self.started = None
+        self.finished = None
+
+        # Process running the job (process jobs only)
+        self._process = None
+
+    @property
+    def elapsed(self):
+        """
+        Running time in seconds (0 while waiting).
+        """
+        if self.started is None:
+            return 0.0
+
+        return (self.finished or time.monotonic()) - self.started
+
+    def done(self):
+        return self.future.done()
+
+    def wait(self, timeout=None):
+        """
+        Wait the job to finish, returns True if it finished.
+        """
+        try:
+            self.future.exception(timeout)
+        except Exception:
+            pass
+
+        return self.future.done()
+
+    def cancel(self):
+        """
+        Cancel the job. A waiting job is removed from the queue. A job running in a process gets
+        SIGINT, as a Ctrl-C in a terminal, and is terminated if it doesn't exit in the runner
+        ``cancel_timeout``. Jobs running in a thread can't be cancelled.
+
+        Returns
+        -------
+        out : :obj:`bool`
+            If the job is being cancelled
+        """
+        return self.runner.cancel(self)
+
+
+class JobRunner():
+    def __init__(self, max_workers=8, cancel_timeout=5.0):
+        """
+        **Constructor**
+
+        Background job runner shared by the scan-utils buttons (wm, wa, ct). Jobs run in a process
+        (or in a thread), their prints are streamed to the job ``write`` function and they can be
+        cancelled. A cancelled job process gets SIGINT, so the scan-utils tool stops the devices as
+        it does on a Ctrl-C, instead of being interrupted at any instruction.
+
+        Each job declares the resources it uses (e.g. "counter:*" or "counter:det1"). Jobs whose
+        resources conflict run one after the other, in submission order; the others run concurrently.
+
+        Parameters
+        ----------
+        max_workers : :obj:`int`, optional
+            Maximum number of jobs running at the same time, by default 8
+        cancel_timeout : :obj:`float`, optional
+            Time in seconds a cancelled job process has to exit before it is terminated, by default 5.0
+
+        Examples
+        --------
+        >>> runner = get_job_runner()
+        >>> job = runner.submit("ct", ct.main, (["1"],), resources=["counter:*"], write=output.append_stdout)
+        >>> job.elapsed
+        0.4
+        >>> job.cancel()
+        True
+        """
+        self.cancel_timeout = cancel_timeout
+
+        self._threads = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jupy4syn-job")
+        # EPICS Channel Access contexts don't survive a fork
+        self._context = multiprocessing.get_context("spawn")
+
+        self._waiting = []
+        self._running = set()
+        self._lock = threading.Lock()
+
+    def submit(self, name, function, args=(), resources=(), write=None, process=True):
+        """
+        Submit ``function(*args)``.
+
+        Parameters
+        ----------
+        name : :obj:`str`
+            Job name
+        function : :obj:`callable`
+            Function to be executed
+        args : :obj:`tuple`, optional
+            Function arguments, by default ()
+        resources : :obj:`list` of :obj:`str`, optional
+            Resources used by the job, by default () (doesn't conflict with any job)
+        write : :obj:`callable`, optional
+            Function receiving the text printed by the job, by default None (printed in the notebook)
+        process : :obj:`bool`, optional
+            Run the job in a new process, so it can be cancelled, by default True. ``function`` and
+            ``args`` must be picklable (e.g. a module function such as ``ct.main``)
+
+        Returns
+        -------
+        out : :py:class:`Job`
+            Submitted job
+        """
+        job = Job(self, name, function, args, resources, write, process)
+
+        with self._lock:
+            self._waiting.append(job)
+            self._schedule()
+
+        return job
+
+    def running(self):
+        with self._lock:
+            return list(self._running)
+
+    def waiting(self):
+        with self._lock:
+            return list(self._waiting)
+
+    def cancel(self, job):
+        with self._lock:
+            if job.state == WAITING:
+                self._waiting.remove(job)
+                job.state = DONE
+                job.cancelled = True
+                job.future.cancel()
+                job.future.set_running_or_notify_cancel()
+
+                return True
+
+            if job.state != RUNNING or job._process is None or job.cancelled:
+                return False
+
+            job.cancelled = True
+            process = job._process
+
+        try:
+            os.kill(process.pid, signal.SIGINT)
+        except OSError:
+            return False
+
+        # Terminated if it doesn't stop in time
+        timer = threading.Timer(self.cancel_timeout, lambda: process.is_alive() and process.terminate())
+        timer.daemon = True
+        timer.start()
+
+        return True
+
+    def _schedule(self):
+        # Start the waiting jobs whose resources are free, in order. Called with the lock held.
+        # A job also waits for the conflicting jobs submitted before it.
+        taken = [job.resources for job in self._running]
+
+        for job in list(self._waiting):
+            if not any(resources_conflict(first, second) for resources in taken for first in job.resources for second in resources):
+                self._waiting.remove(job)
+                self._running.add(job)
+
+                job.state = RUNNING
+                self._threads.submit(self._run, job)
+
+            taken.append(job.resources)
+
+    def _run(self, job):
+        job.started = time.monotonic()
+
+        if not job.future.set_running_or_notify_cancel():
+            self._finish(job)
+            return
+
+        try:
+            if job.process:
+                result = self._run_process(job)
+            elif job.write is None:
+                result = job.function(*job.args)
+            else:
+                with stdout_router().redirect(job.write):
+                    result = job.function(*job.args)
+        except SystemExit as e:
+            # scan-utils main functions may exit, argument errors exit with code 2
+            if e.code in (None, 0):
+                job.future.set_result(None)
+            else:
+                job.future.set_exception(JobExited(job.name + " exited with code " + str(e.code)))
+        except BaseException as e:
+            job.future.set_exception(e)
+        else:
+            job.future.set_result(result)
+        finally:
+            self._finish(job)
+
+    def _run_process(self, job):
+        messages = self._context.Queue()
+        process = self._context.Process(target=_run_in_process, args=(job.function, job.args, messages),
+                                        name="jupy4syn-job-" + job.name, daemon=True)
+
+        with self._lock:
+            process.start()
+            job._process = process
+
+        write = job.write if job.write is not None else sys.stdout.write
+
+        try:
+            while True:
+                try:
+                    kind, value = messages.get(timeout=0.1)
+                except queue.Empty:
+                    if process.is_alive():
+                        continue
+
+                    # Exited without a result: terminated, or killed by a signal
+                    if job.cancelled:
+                        raise JobCancelled(job.name + " cancelled")
+                    raise JobExited(job.name + " process exited with code " + str(process.exitcode))
+
+                if kind == "output":
+                    write(value)
+                elif kind == "result":
+                    return value
+                elif kind == "cancelled":
+                    raise JobCancelled(job.name + " cancelled")
+                elif kind == "exited":
+                    raise JobExited(job.name + " exited with code " + str(value))
+                else:
+                    raise RuntimeError(value)
+        finally:
+            process.join()
+
+    def _finish(self, job):
+        with self._lock:
+            job.state = DONE
+            job.finished = time.monotonic()
+            job._process = None
+
+            self._running.discard(job)
+            self._schedule()
+
+
+# Runner shared by all job buttons
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner():
+    """
+    Returns the :py:class:`JobRunner` shared by all Jupy4Syn job buttons.
+    """
+    global _runner
+
+    with _runner_lock:
+        if _runner is None:
+            _runner = JobRunner()
+
+        return _runner
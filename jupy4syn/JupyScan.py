@@ -8,30 +8,135 @@ from py4syn.utils import scan as scanModule
 from scan_utils.scan import ScanOperationCLI
 from scan_utils import cleanup, die
 
+# Jupy4Syn
+from jupy4syn.analysis import analyze
+from jupy4syn.RepeatAggregator import RepeatAggregator
+from jupy4syn.ScanDataSource import InMemoryScanSource
+from jupy4syn.ScanNameResolver import get_scan_names
+from jupy4syn.ScanPlot import ScanPlot
+
 
 class JupyScan(ScanOperationCLI):
     def __init__(self, motor, start, end, stepOrPoints, time, configuration='default',
             optimum=False, sync=False, output=None, message=None, repeat=1, sleep=0,
-            waitPlotter=True, plotXFactor=1, snake=False, xlabel='points'):
-        
+            waitPlotter=True, plotXFactor=1, snake=False, xlabel='points', analysis=None):
+        """
+        **Constructor**
+
+        scan-utils scan plotted in the notebook. The arguments are the scan-utils scan arguments, plus:
+
+        Parameters
+        ----------
+        analysis : :obj:`dict`, optional
+            Counter label -> analysis methods (see :py:data:`jupy4syn.analysis.METHODS`, e.g.
+            {"I0": ["peak", "fwhm", "gaussian"]}) run with NumPy on the plotted scan data after each
+            repeat instead of the scan-utils fit, by default None (the ``analysis`` list of each counter
+            in the scan configuration, or the scan-utils fit if no counter has one). Results are kept
+            in ``self.analysis_results``.
+        """
         super().__init__(motor, start, end, stepOrPoints, time, configuration,
             optimum, sync, output, message, repeat, sleep,
             waitPlotter, plotXFactor, snake, xlabel)
+
+        self.analysis = analysis
+        self.analysis_results = {}
         
         
     def plot(self, plotter, scan, pos, idx):
         data = scanModule.getScanData()
         user = scanModule.getUserDefinedDataFields()
-        position = data[self.xlabel][-1]
 
         for counter in self.configuration.runtime:
             c = self.configuration['counters'][counter]
-            
-            label = c['label']
+
+            if not c.get('plot', True) and counter in user:
+                data[c['label']].append(processUserField(c))
+
+        # Only the new points are copied from the py4syn lists
+        self.source.poll()
+        x = self.source.column(0)
+
+        for index, label in enumerate(self.source.labels[1:], 1):
+            plotter.plot(x, self.source.column(index), label)
+
+    def scan_source(self):
+        """
+        Data source of the plotted columns (x label, then the plotted counters) of the running scan.
+        """
+        labels = [self.xlabel]
+        for counter in self.configuration.runtime:
+            c = self.configuration['counters'][counter]
             if c.get('plot', True):
-                plotter.plot(data[self.xlabel], data[label], label)
-            elif counter in user:
-                data[label].append(processUserField(c))
+                labels.append(c['label'])
+
+        return InMemoryScanSource(scanModule.getScanData, labels, expected_points=len(self.points[0]))
+
+    # Override scan-utils fit, with NumPy on the scan data columns (no copy)
+    def fitValues(self):
+        analysis = self.analysis_methods()
+        if not analysis or getattr(self, 'source', None) is None:
+            return super().fitValues()
+
+        self.source.poll()
+        x = self.source.column(0)
+
+        self.analysis_results = {}
+        for label, methods in analysis.items():
+            if label not in self.source.labels:
+                continue
+
+            self.analysis_results[label] = analyze(x, self.source.column(self.source.column_index(label)), methods)
+            print(label + ': ' + ', '.join(method + ' = ' + str(result)
+                                           for method, result in self.analysis_results[label].items()))
+
+    def analysis_methods(self):
+        """
+        Counter label -> analysis methods, from the ``analysis`` argument or the counters configuration.
+        """
+        if self.analysis is not None:
+            return self.analysis
+
+        analysis = {}
+        for counter in self.configuration.runtime:
+            c = self.configuration['counters'][counter]
+            if c.get('analysis'):
+                analysis[c['label']] = c['analysis']
+
+        return analysis
+
+    # Move the motor to the peak of the optimum counter found by fitValues
+    def goToOptimum(self):
+        label = self.configuration['counters'].get(self.optimum, {}).get('label', self.optimum)
+        results = self.analysis_results.get(label)
+
+        # Analysis x must be the positions of a scanned motor, which is moved
+        if results is None or self.xlabel not in self.motor:
+            return super().goToOptimum()
+
+        if results.get('gaussian'):
+            position = results['gaussian']['center']
+        elif 'peak' in results:
+            position = results['peak'][0]
+        else:
+            return super().goToOptimum()
+
+        from py4syn.utils.motor import umv
+
+        print('Moving ' + self.xlabel + ' to optimum position ' + str(position))
+        umv(self.xlabel, position)
+
+    # Mean of the repeats written next to the last scan file, as ScanGUI does
+    def write_aggregate(self):
+        if not self.output:
+            return
+
+        file_name = get_scan_names(self.output, 1)[0] + '_mean'
+
+        try:
+            self.aggregator.write(file_name, self.source.labels, 1)
+            print('Mean of ' + str(self.repeat) + ' repeats saved in ' + file_name)
+        except Exception as e:
+            print('Error in writing the mean of the repeats: ' + str(e))
 
     # Override default plot procedure
     def configurePlot(self):
@@ -39,13 +144,14 @@ class JupyScan(ScanOperationCLI):
         scanModule.setPlotGraph(False)
 
         if self.configuration.somePlot() :
-            p = ScanPlott(self.output or 'Scan')
+            p = ScanPlot(self.output or 'Scan')
+            self.source = self.scan_source()
             
             for counter in self.configuration.runtime:
                 c = self.configuration['counters'][counter]
                 label = c['label']
                 
-                p.add_scatter([0], [0], label)
+                p.add_scatter([0], [0], label, capacity=self.source.expected_points)
                 
             
             scanModule.setPostOperationCallback(lambda **kw: self.plot(p, **kw))
@@ -60,7 +166,8 @@ class JupyScan(ScanOperationCLI):
         plotter = self.configurePlot()
 
         # Display plot using IPython display widget
-        IPython.display.display(plotter.display())
+        if plotter is not None:
+            display(plotter.display())
 
 #         if plotter is not None:
 #             axes = self.generateAxes(plotter)
@@ -76,6 +183,11 @@ class JupyScan(ScanOperationCLI):
 
         print('\nEstimated time: ' + str(self.getEstimatedTime(self.times)) + '\n')
 
+        # Mean and standard deviation of the plotted columns across the repeats
+        self.aggregator = None
+        if plotter is not None and self.repeat > 1:
+            self.aggregator = RepeatAggregator(self.source.number_columns, capacity=len(self.points[0]))
+
         for i in range(self.repeat):
             self.onScanBegin()
 
@@ -87,10 +199,20 @@ class JupyScan(ScanOperationCLI):
             except Exception as e:
                 raise RuntimeError('Error executing scan: ' + str(e))
 
+            if plotter is not None:
+                plotter.flush()
+
+            if self.aggregator is not None:
+                self.source.poll()
+                self.aggregator.update(i, self.source)
+
             self.onScanEnd()
 
             self.fitValues()
 
+        if self.aggregator is not None:
+            self.write_aggregate()
+
         if self.optimum:
             self.goToOptimum()
 
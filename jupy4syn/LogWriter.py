@@ -0,0 +1,219 @@
+import atexit
+import calendar
+import logging
+import logging.handlers
+from pathlib import Path
+import queue
+import threading
+import time
+
+
+# logprint modes -> logging levels, other modes (e.g. "[SCAN]") are logged as INFO
+LEVELS = {
+    "[DEBUG]": logging.DEBUG,
+    "[INFO]": logging.INFO,
+    "[WARNING]": logging.WARNING,
+    "[ERROR]": logging.ERROR,
+}
+
+
+class LogFormatter(logging.Formatter):
+    def __init__(self):
+        """
+        **Constructor**
+
+        Formats records as "YYYY-MM-DD HH:MM:SS | [MODE] message", using GMT-0 time
+        to avoid local computer time problems.
+        """
+        logging.Formatter.__init__(self, "%(asctime)s | %(mode)s %(message)s", "%Y-%m-%d %H:%M:%S")
+        self.converter = time.gmtime
+
+    def format(self, record):
+        if not hasattr(record, "mode"):
+            record.mode = "[" + record.levelname + "]"
+
+        return logging.Formatter.format(self, record)
+
+
+class DailyFileHandler(logging.Handler):
+    def __init__(self, directory=".logs"):
+        """
+        **Constructor**
+
+        Writes log records in ``<directory>/YYYY-MM-DD-log.txt``, keeping the file open and
+        opening a new one when the (GMT-0) day changes.
+
+        Parameters
+        ----------
+        directory : :obj:`str`, optional
+            Logs directory, created if it doesn't exist, by default ".logs"
+        """
+        logging.Handler.__init__(self)
+        self.setFormatter(LogFormatter())
+
+        self.directory = Path(directory)
+        self.file = None
+        self.day_end = 0.0
+
+    def emit(self, record):
+        try:
+            if record.created >= self.day_end:
+                self._open(record.created)
+
+            self.file.write(self.format(record) + "\n")
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        self.close_file()
+
+        logging.Handler.close(self)
+
+    def close_file(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def _open(self, created):
+        self.close_file()
+
+        ts = time.gmtime(created)
+        year_month_day = time.strftime("%Y-%m-%d", ts)
+        self.day_end = calendar.timegm((ts.tm_year, ts.tm_mon, ts.tm_mday, 0, 0, 0)) + 24 * 60 * 60
+
+        if not self.directory.is_dir():
+            self.directory.mkdir(parents=True)
+
+        self.file = open(str(self.directory / (year_month_day + "-log.txt")), "a")
+
+
+class CellHandler(logging.Handler):
+    def __init__(self):
+        """
+        **Constructor**
+
+        Prints log records in the notebook output cell, if the option "Print log in Notebook's cells"
+        of the :py:class:`Configuration <jupy4syn.Configuration.Configuration>` given with the record
+        (``extra={"config": config}``) is enabled. Records are printed in the calling thread,
+        so they are captured by the widget ``Output`` being used.
+        """
+        logging.Handler.__init__(self)
+        self.setFormatter(LogFormatter())
+
+    def emit(self, record):
+        config = getattr(record, "config", None)
+        if config is None or not config.config['log_cell'].value:
+            return
+
+        try:
+            print(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+class RecordQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Records from log_message have no arguments nor exception info to be formatted in
+        # the calling thread, so they are queued as they are
+        return record
+
+
+class LogWriter():
+    def __init__(self, directory=".logs", flush_interval=1.0):
+        """
+        **Constructor**
+
+        Background log writer. Records are put in a queue by a ``QueueHandler`` and written by a
+        single thread through a :py:class:`DailyFileHandler`, which is flushed every ``flush_interval`` seconds.
+
+        Parameters
+        ----------
+        directory : :obj:`str`, optional
+            Logs directory, by default ".logs"
+        flush_interval : :obj:`float`, optional
+            Maximum time in seconds that a record stays in the file buffer, by default 1.0
+        """
+        self.flush_interval = flush_interval
+
+        self.queue = queue.SimpleQueue()
+        self.handler = DailyFileHandler(directory)
+
+        self.thread = threading.Thread(target=self._run, name="jupy4syn-log-writer", daemon=True)
+        self.thread.start()
+
+    def queue_handler(self):
+        return RecordQueueHandler(self.queue)
+
+    def stop(self):
+        self.queue.put(None)
+        self.thread.join()
+
+    def _run(self):
+        last_flush = time.monotonic()
+
+        while True:
+            try:
+                record = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                record = False
+
+            if record is None:
+                break
+
+            if record:
+                self.handler.handle(record)
+
+            now = time.monotonic()
+            if now - last_flush >= self.flush_interval:
+                self.handler.flush()
+                last_flush = now
+
+        self.handler.close()
+
+
+_logger = None
+_writer = None
+_logger_lock = threading.Lock()
+
+
+def get_logger():
+    """
+    Returns the "jupy4syn" logger, creating its handlers on first use: a
+    :py:class:`CellHandler` and a queue feeding the background :py:class:`LogWriter`.
+    """
+    global _logger, _writer
+
+    if _logger is not None:
+        return _logger
+
+    with _logger_lock:
+        if _logger is None:
+            _writer = LogWriter()
+            atexit.register(_writer.stop)
+
+            logger = logging.getLogger("jupy4syn")
+            logger.setLevel(logging.DEBUG)
+            logger.propagate = False
+            logger.addHandler(_writer.queue_handler())
+            logger.addHandler(CellHandler())
+
+            _logger = logger
+
+    return _logger
+
+
+def log_message(string, mode="[INFO]", config=None):
+    """
+    Log ``string`` in the daily log file and, if enabled in ``config``, in the notebook output cell.
+    """
+    logger = get_logger()
+    level = LEVELS.get(mode, logging.INFO)
+
+    # Build the record directly, skipping the caller lookup of Logger.log
+    record = logger.makeRecord(logger.name, level, "(unknown file)", 0, string, None, None,
+                               extra={"mode": mode, "config": config})
+    logger.handle(record)
@@ -0,0 +1,175 @@
+# Auxiliar packages
+import numpy as np
+
+# Jupy4Syn
+from jupy4syn.PVPool import get_pv_pool
+from jupy4syn.RefreshScheduler import RefreshScheduler
+
+
+# Motor record fields monitored for each motor
+FIELDS = ("RBV", "DMOV", "HLS", "LLS")
+
+
+class MotorMonitorEngine():
+    def __init__(self, motor_names, render, rate=10.0):
+        """
+        **Constructor**
+
+        Monitors the readback value (``.RBV``), done moving (``.DMOV``) and limit switches
+        (``.HLS``, ``.LLS``) of motor records. EPICS callbacks only store the latest values in
+        NumPy arrays (one slot per motor); ``render`` is called from a
+        :py:class:`RefreshScheduler <jupy4syn.RefreshScheduler.RefreshScheduler>` thread at most ``rate``
+        times per second, with the motors whose values changed since the last render.
+
+        Parameters
+        ----------
+        motor_names : :obj:`list` of :obj:`str`
+            Motor record names (e.g. ["IOC:m1", "IOC:m3"])
+        render : :obj:`callable`
+            Function called with the list of indexes (in ``motor_names``) of the motors to be rendered
+        rate : :obj:`float`, optional
+            Maximum number of renders per second, by default 10.0
+
+        Examples
+        --------
+        >>> engine = MotorMonitorEngine(["IOC:m1", "IOC:m2"], lambda changed: print(engine.rbv[changed]))
+        >>> engine.start()
+        >>> engine.stats()
+        {'callbacks_received': 120, 'renders_emitted': 8, 'values_skipped': 3, 'frames': 5}
+        >>> engine.stop()
+        """
+        self.motor_names = list(motor_names)
+        self.render = render
+
+        number_motors = len(self.motor_names)
+
+        # Latest values received
+        self.rbv = np.full(number_motors, np.nan)
+        self.dmov = np.ones(number_motors, dtype=np.int8)
+        self.hls = np.zeros(number_motors, dtype=np.int8)
+        self.lls = np.zeros(number_motors, dtype=np.int8)
+
+        # Values shown in the last render
+        self._rendered_rbv = np.full(number_motors, np.nan)
+        self._rendered_state = np.full((3, number_motors), -1, dtype=np.int8)
+
+        # PV name -> (field array, motor index)
+        self._slots = {}
+        for i, name in enumerate(self.motor_names):
+            for field, array in zip(FIELDS, (self.rbv, self.dmov, self.hls, self.lls)):
+                self._slots[name + "." + field] = (array, i)
+
+        # (PV, callback index) of each subscription
+        self._callbacks = []
+        self.precisions = [3] * number_motors
+
+        self.scheduler = RefreshScheduler(self._render, rate, name="jupy4syn-motors-monitor")
+
+        self.reset_stats()
+
+    def start(self, timeout=None):
+        """
+        Connect the motors PVs through the shared :py:class:`PVPool <jupy4syn.PVPool.PVPool>`,
+        read their current values and subscribe to them.
+        """
+        pvs = get_pv_pool().connect(self._slots.keys(), timeout)
+
+        for i, name in enumerate(self.motor_names):
+            rbv = pvs[name + ".RBV"]
+            if rbv.connected and rbv.precision is not None:
+                self.precisions[i] = rbv.precision
+
+        for pvname, pv in pvs.items():
+            if pv.connected:
+                value = pv.get()
+                if value is not None:
+                    array, i = self._slots[pvname]
+                    array[i] = value
+
+        self.scheduler.reset_stats()
+        self.scheduler.start()
+
+        for pvname, pv in pvs.items():
+            self._callbacks.append((pv, pv.add_callback(self._callback)))
+
+        # First render with the current values
+        for i in range(len(self.motor_names)):
+            self.scheduler.post(i, None)
+
+    def stop(self):
+        for pv, index in self._callbacks:
+            pv.remove_callback(index)
+
+        self._callbacks = []
+        self.scheduler.stop()
+
+    def moving(self, index):
+        return not self.dmov[index]
+
+    def state(self, index):
+        """
+        Returns a short description of the motor state: "Moving", "High limit", "Low limit" or "".
+        """
+        if self.hls[index]:
+            return "High limit"
+        elif self.lls[index]:
+            return "Low limit"
+        elif not self.dmov[index]:
+            return "Moving"
+
+        return ""
+
+    def format_rbv(self, index):
+        return "{:.{}f}".format(self.rbv[index], self.precisions[index])
+
+    def reset_stats(self):
+        self.callbacks_received = 0
+        self.renders_emitted = 0
+        self.values_skipped = 0
+
+    def stats(self):
+        """
+        Returns the number of EPICS callbacks received, of motor values rendered, of changes
+        skipped because the rendered values didn't change and of refresh frames.
+        """
+        return {
+            "callbacks_received": self.callbacks_received,
+            "renders_emitted": self.renders_emitted,
+            "values_skipped": self.values_skipped,
+            "frames": self.scheduler.renders,
+        }
+
+    def _callback(self, pvname='', value=None, **kw):
+        # Runs in the EPICS callback thread, only store the value
+        self.callbacks_received += 1
+
+        slot = self._slots.get(pvname)
+        if slot is None or value is None:
+            return
+
+        array, i = slot
+        array[i] = value
+
+        self.scheduler.post(i, None)
+
+    def _render(self, pending):
+        indexes = np.fromiter(pending.keys(), dtype=np.intp, count=len(pending))
+
+        state = np.stack((self.dmov[indexes], self.hls[indexes], self.lls[indexes]))
+        rbv = self.rbv[indexes]
+
+        # Values that are different from the ones already shown (NaN != NaN, so compare them apart)
+        changed_rbv = (rbv != self._rendered_rbv[indexes]) & ~(np.isnan(rbv) & np.isnan(self._rendered_rbv[indexes]))
+        changed = changed_rbv | np.any(state != self._rendered_state[:, indexes], axis=0)
+
+        self.values_skipped += int(np.count_nonzero(~changed))
+
+        indexes = indexes[changed]
+        if indexes.size == 0:
+            return
+
+        self._rendered_rbv[indexes] = rbv[changed]
+        self._rendered_state[:, indexes] = state[:, changed]
+
+        self.renders_emitted += int(indexes.size)
+        self.render(indexes.tolist())
@@ -8,7 +8,7 @@ from IPython.display import display
 import py4syn.epics.MotorClass
 
 # Jupy4Syn
-from jupy4syn.Configuration import Configuration
+from jupy4syn.Configuration import default_configuration
 from jupy4syn.utils import logprint
 
 
@@ -16,10 +16,13 @@ from jupy4syn.utils import logprint
 # This class connects the button to the bouded float value and set the motor position
 class MotorSetValueButton(widgets.Button):
     
-    def __init__(self, motor, config=Configuration(), *args, **kwargs):
+    def __init__(self, motor, config=None, *args, **kwargs):
         widgets.Button.__init__(self, *args, **kwargs)
         
         # Config
+        if config is None:
+            config = default_configuration()
+
         self.config = config
         
         # Motor associated to the button
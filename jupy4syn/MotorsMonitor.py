@@ -1,21 +1,49 @@
-import time
-
 # Widgets
 import ipywidgets as widgets
 from IPython.display import display
 
 # Jupy4Syn
-from jupy4syn.Configuration import Configuration
-from jupy4syn.utils import logprint, configurate_motor
+from jupy4syn.Configuration import default_configuration
+from jupy4syn.utils import logprint
+from jupy4syn.MotorMonitorEngine import MotorMonitorEngine
 
 
 class MotorsMonitor(widgets.Button):
     
-    def __init__(self, config=Configuration(), *args, **kwargs):
+    def __init__(self, config=None, refresh_rate=None, *args, **kwargs):
+        """
+        **Constructor**
+
+        Shows the readback value and state (moving, limit switches) of motor records. Values are
+        kept by a :py:class:`MotorMonitorEngine <jupy4syn.MotorMonitorEngine.MotorMonitorEngine>`,
+        which refreshes the labels at most ``refresh_rate`` times per second.
+
+        Parameters
+        ----------
+        config : :py:class:`Configuration <jupy4syn.Configuration.Configuration>`, optional
+            Configuration object that contains Jupyter Notebook runtime information, by default None (shared default Configuration)
+        refresh_rate : :obj:`float`, optional
+            Maximum number of widget refreshes per second, by default None (``config.monitor_refresh_rate``)
+
+        Examples
+        --------
+        >>> config = Configuration()
+        >>> config.display()
+        >>> monitor = MotorsMonitor(config)
+        >>> monitor.display()
+        """
         widgets.Button.__init__(self, *args, **kwargs)
         
         # Config
+        if config is None:
+            config = default_configuration()
+
         self.config = config
+
+        if refresh_rate is None:
+            refresh_rate = config.monitor_refresh_rate
+
+        self.refresh_rate = refresh_rate
         
         # Text box to write the motors
         self.text = widgets.Textarea(
@@ -38,6 +66,11 @@ class MotorsMonitor(widgets.Button):
         
         # Motors
         self.motors_list = []
+        self.engine = None
+
+        # Value and state Labels of each motor, in the engine order
+        self.value_labels = []
+        self.state_labels = []
         
         # Set callback function for click event
         self.monitoring_status = False
@@ -62,13 +95,19 @@ class MotorsMonitor(widgets.Button):
                 b.description='Start Motor Monitoring'
                 b.button_style='success'
 
+                # Stop receiving and rendering motors events
+                if b.engine is not None:
+                    b.engine.stop()
+                    logprint("Motors Monitor refresh stats: " + str(b.engine.stats()), config=b.config)
+
                 # Stop displaying the motors widgets, show only button and text box
                 b.main_box.children = (b.main_box.children[0], b.text,)
 
-                logprint("Stopped monitoring motors " + ', '.join([motor.pvName for motor in b.motors_list]), config=b.config)
+                logprint("Stopped monitoring motors " + ', '.join(b.motors_list), config=b.config)
 
                 # Reset motor list
-                b.motors_list = []      
+                b.motors_list = []
+                b.engine = None
             else:
                 # Change button appearence
                 b.description='Stop Motor Monitoring'
@@ -78,21 +117,21 @@ class MotorsMonitor(widgets.Button):
                 b.main_box.children = (b.main_box.children[0],)
 
                 # Get motors PV names from the text box
-                motor_list_names = b.text.value.split(' ')
+                motor_list_names = list(dict.fromkeys(b.text.value.split()))
                 logprint("Started monitoring motors " + ', '.join(motor_list_names), config=b.config)
 
-                # Create motors and add a monitor callback to them
+                # Subscribe to the motors RBV, DMOV and limits
                 # Also add these motor values as children of main_box widget
                 try:
-                    b.motors_list = [configurate_motor(name, ''.join(name.split(':')[-2:])) for name in motor_list_names]
-
-                    for motor in b.motors_list:
-                        index = motor.motor.add_callback('RBV', b._monitor_callback)
+                    b.motors_list = motor_list_names
 
-                        rbv = motor.getRealPosition()
-                        b.motors_values[motor.pvName + ".RBV"] = (rbv, str(rbv))
+                    b.value_labels = [widgets.Label("") for name in motor_list_names]
+                    b.state_labels = [widgets.Label("") for name in motor_list_names]
+                    b.main_box.children += tuple(widgets.HBox([widgets.Label(name + ".RBV"), value, state])
+                                                 for name, value, state in zip(motor_list_names, b.value_labels, b.state_labels))
 
-                        b.main_box.children += (widgets.HBox([widgets.Label(motor.pvName + ".RBV"), widgets.Label(str(rbv))]),)
+                    b.engine = MotorMonitorEngine(motor_list_names, b._refresh, b.refresh_rate)
+                    b.engine.start()
 
                     logprint("Monitoring motors " + ', '.join(motor_list_names), config=b.config)        
 
@@ -108,13 +147,18 @@ class MotorsMonitor(widgets.Button):
             b.monitoring_status = not b.monitoring_status
                
 
-    def _monitor_callback(self, pvname='', value=0, char_value='', **kw):
-        self.motors_values[pvname] = (value, char_value)
-        
-        if self.monitoring_status:
-            for widget in self.main_box.children[1:]:
-                if widget.children[0].value == pvname:
-                    widget.children[1].value = char_value
+    def _refresh(self, indexes):
+        # Runs in the engine refresh thread, only with the motors that changed
+        engine = self.engine
+        if engine is None:
+            return
+
+        for i in indexes:
+            text = engine.format_rbv(i)
+
+            self.motors_values[engine.motor_names[i] + ".RBV"] = (engine.rbv[i], text)
+            self.value_labels[i].value = text
+            self.state_labels[i].value = engine.state(i)
 
 
     def display(self):
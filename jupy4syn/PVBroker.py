@@ -0,0 +1,753 @@
+"""
+Channel Access broker: one process keeps one connection per PV and fans the monitor updates out
+to the notebook kernels connected to its Unix socket, so many kernels watching the same PVs
+don't multiply the CA searches and IOC connections.
+
+Start the broker on the JupyterHub host::
+
+    python -m jupy4syn.PVBroker --socket /tmp/jupy4syn-pv-broker.sock
+
+and make the kernels use it, by setting ``JUPY4SYN_PV_BROKER=/tmp/jupy4syn-pv-broker.sock`` in
+their environment or by calling :py:func:`jupy4syn.PVPool.use_pv_broker` before creating widgets.
+
+The broker is read-only by default: the kernels put values with their own pyepics, so EPICS
+access security applies to each user. With ``--allow-puts`` the puts are done by the broker,
+under its own Channel Access identity; only enable it when that identity is the same for every
+kernel (e.g. a single user host). ``--allowed-uids`` refuses the kernels of other users.
+
+Protocol: JSON objects, one per line. Requests have an ``op`` and, if they expect a reply, an
+``id``; replies have the request ``id`` and a ``result`` or an ``error``. Events have a ``pv``
+and an ``event`` ("connection" or "value").
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import json
+import os
+import queue
+import socket
+import stat
+import struct
+import threading
+import time
+
+
+DEFAULT_SOCKET = "/tmp/jupy4syn-pv-broker.sock"
+
+# Messages queued for a slow client before it is disconnected
+MAX_QUEUED = 10000
+
+READ_ONLY_ERROR = "PV broker is read-only"
+
+
+def _json_value(value):
+    # NumPy arrays and scalars, and bytes, as JSON values
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if isinstance(value, bytes):
+        return value.decode(errors="replace")
+
+    return value
+
+
+def _pv_info(pv):
+    return {
+        "type": pv.type,
+        "count": pv.count,
+        "precision": pv.precision,
+        "units": _json_value(pv.units),
+        "enum_strs": [_json_value(string) for string in pv.enum_strs] if pv.enum_strs else None,
+    }
+
+
+class _BrokerClientConnection():
+    def __init__(self, broker, connection):
+        # A kernel connected to the broker, messages are written by their own thread
+        self.broker = broker
+        self.connection = connection
+        self.pvnames = set()
+
+        self._queue = queue.Queue(MAX_QUEUED)
+        self._closed = False
+
+    def start(self):
+        threading.Thread(target=self._write_loop, daemon=True, name="jupy4syn-broker-writer").start()
+        threading.Thread(target=self._read_loop, daemon=True, name="jupy4syn-broker-reader").start()
+
+    def send(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self.close()
+
+    def close(self):
+        if self._closed:
+            return
+
+        self._closed = True
+        self.broker._client_closed(self)
+
+        try:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+        # Stops the writer, which also stops on the socket error if its queue is full
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def _write_loop(self):
+        while True:
+            message = self._queue.get()
+            if message is None:
+                break
+
+            try:
+                self.connection.sendall((json.dumps(message) + "\n").encode())
+            except (OSError, TypeError, ValueError):
+                self.close()
+                break
+
+        self.connection.close()
+
+    def _read_loop(self):
+        reader = self.connection.makefile("rb")
+
+        try:
+            for line in reader:
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    continue
+
+                self.broker._request(self, request)
+        except OSError:
+            pass
+
+        self.close()
+
+
+class _BrokerPVEntry():
+    def __init__(self, pv):
+        # Broker side PV and the kernels subscribed to it
+        self.pv = pv
+        self.clients = set()
+        self.info = None
+        self.last_value = None
+
+
+class PVBroker():
+    def __init__(self, socket_path=DEFAULT_SOCKET, pv_factory=None, get_many=None, request_workers=8,
+                 allow_puts=False, socket_mode=0o666, allowed_uids=None):
+        """
+        **Constructor**
+
+        Broker server. Each PV opened by any kernel is created once (``pv_factory``) and its
+        connection and value changes are sent to every kernel that opened it.
+
+        The broker is read-only by default, kernels put values with their own pyepics, so the
+        EPICS access security rules of each user apply to the puts.
+
+        Parameters
+        ----------
+        socket_path : :obj:`str`, optional
+            Unix socket path, by default "/tmp/jupy4syn-pv-broker.sock"
+        pv_factory : :obj:`callable`, optional
+            Function creating a PV from its name, with the :py:class:`epics.PV` interface, by default
+            None (:py:class:`epics.PV`). A mock PV class can be given to test the broker without IOC.
+        get_many : :obj:`callable`, optional
+            Function reading many PVs at once, with the :py:func:`epics.caget_many` interface, by
+            default None (:py:func:`epics.caget_many`)
+        request_workers : :obj:`int`, optional
+            Number of put and get_many requests served at the same time, by default 8. A put waiting
+            for a motor only holds one of them.
+        allow_puts : :obj:`bool`, optional
+            Put the values requested by the kernels, by default False. The puts are done under the
+            broker Channel Access identity, bypassing the access security rules of each user.
+        socket_mode : :obj:`int`, optional
+            Permissions of the socket, by default 0o666 (every user of the host can read PVs)
+        allowed_uids : :obj:`set` of :obj:`int`, optional
+            User ids allowed to connect, checked with SO_PEERCRED, by default None (every user
+            that can open the socket). The broker user is always allowed.
+
+        Examples
+        --------
+        >>> broker = PVBroker("/tmp/test-broker.sock")
+        >>> broker.start()
+        >>> client = BrokerClient("/tmp/test-broker.sock")
+        >>> client.pv("IOC:m1.RBV").get()
+        1.25
+        """
+        if pv_factory is None or get_many is None:
+            from epics import PV, caget_many
+
+            pv_factory = pv_factory or PV
+            get_many = get_many or caget_many
+
+        self.socket_path = socket_path
+        self.pv_factory = pv_factory
+        self.get_many = get_many
+        self.allow_puts = allow_puts
+        self.socket_mode = socket_mode
+        self.allowed_uids = set(allowed_uids) if allowed_uids is not None else None
+
+        self._entries = {}
+        self._clients = set()
+        self._lock = threading.Lock()
+
+        # CA calls can't be done in CA callbacks. The control fields read after a connection are read
+        # by a worker thread, the kernels requests by a pool, so slow puts don't delay connections
+        self._work = queue.Queue()
+        self._requests = ThreadPoolExecutor(max_workers=request_workers, thread_name_prefix="jupy4syn-broker-request")
+
+        self._server = None
+
+    def start(self):
+        """
+        Listen on the socket and serve kernels in background threads.
+
+        Raises
+        ------
+        OSError
+            If another broker is listening on the socket, or the path isn't a socket
+        """
+        self._remove_stale_socket()
+
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        # No other user can connect before the permissions are set
+        umask = os.umask(0o177)
+        try:
+            self._server.bind(self.socket_path)
+        finally:
+            os.umask(umask)
+        os.chmod(self.socket_path, self.socket_mode)
+
+        self._server.listen(64)
+
+        threading.Thread(target=self._accept_loop, daemon=True, name="jupy4syn-broker-accept").start()
+        threading.Thread(target=self._work_loop, daemon=True, name="jupy4syn-broker-work").start()
+
+    def _remove_stale_socket(self):
+        # A socket left by a broker that didn't stop is removed, a running broker is kept
+        try:
+            mode = os.lstat(self.socket_path).st_mode
+        except FileNotFoundError:
+            return
+
+        if not stat.S_ISSOCK(mode):
+            raise OSError(self.socket_path + " exists and isn't a socket")
+
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.remove(self.socket_path)
+            return
+        finally:
+            probe.close()
+
+        raise OSError("A PV broker is already running on " + self.socket_path)
+
+    def serve_forever(self):
+        self.start()
+
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+        for client in list(self._clients):
+            client.close()
+
+        self._work.put(None)
+        self._requests.shutdown(wait=False)
+
+    def stats(self):
+        with self._lock:
+            return {"clients": len(self._clients),
+                    "pvs": len(self._entries),
+                    "subscriptions": sum(len(entry.clients) for entry in self._entries.values())}
+
+    def _accept_loop(self):
+        while self._server is not None:
+            try:
+                connection, _ = self._server.accept()
+            except OSError:
+                break
+
+            if not self._peer_allowed(connection):
+                connection.close()
+                continue
+
+            client = _BrokerClientConnection(self, connection)
+            with self._lock:
+                self._clients.add(client)
+            client.start()
+
+    def _peer_allowed(self, connection):
+        if self.allowed_uids is None:
+            return True
+
+        try:
+            credentials = connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        except (AttributeError, OSError):
+            # SO_PEERCRED is Linux only
+            return False
+
+        _, uid, _ = struct.unpack("3i", credentials)
+
+        return uid == os.getuid() or uid in self.allowed_uids
+
+    def _client_closed(self, client):
+        with self._lock:
+            self._clients.discard(client)
+            for pvname in client.pvnames:
+                entry = self._entries.get(pvname)
+                if entry is not None:
+                    entry.clients.discard(client)
+
+    def _work_loop(self):
+        while True:
+            work = self._work.get()
+            if work is None:
+                break
+
+            try:
+                work()
+            except Exception:
+                pass
+
+    def _request(self, client, request):
+        op = request.get("op")
+
+        if op == "open":
+            self._open(client, request["pv"])
+        elif op == "close":
+            with self._lock:
+                client.pvnames.discard(request["pv"])
+                entry = self._entries.get(request["pv"])
+                if entry is not None:
+                    entry.clients.discard(client)
+        elif op == "info":
+            client.send({"id": request.get("id"), "result": {"allow_puts": self.allow_puts}})
+        elif op == "put" and not self.allow_puts:
+            client.send({"id": request.get("id"), "error": READ_ONLY_ERROR})
+        elif op in ("put", "get_many"):
+            self._requests.submit(self._reply, client, request)
+        elif "id" in request:
+            client.send({"id": request["id"], "error": "Unknown operation " + str(op)})
+
+    def _reply(self, client, request):
+        # Runs in the requests pool
+        try:
+            if request["op"] == "put":
+                with self._lock:
+                    entry = self._entries.get(request["pv"])
+
+                # Not opened, or still being created by _open
+                if entry is None or entry.pv is None or not entry.pv.connected:
+                    client.send({"id": request["id"], "error": "PV " + str(request["pv"]) + " not connected"})
+                    return
+
+                result = entry.pv.put(request["value"], wait=request.get("wait", False),
+                                      timeout=request.get("timeout", 30.0))
+            else:
+                values = self.get_many(request["pvs"], as_string=request.get("as_string", False),
+                                       timeout=request.get("timeout", 5.0))
+                result = [_json_value(value) for value in values]
+
+            client.send({"id": request["id"], "result": _json_value(result)})
+        except Exception as e:
+            client.send({"id": request["id"], "error": str(e)})
+
+    def _open(self, client, pvname):
+        with self._lock:
+            client.pvnames.add(pvname)
+
+            entry = self._entries.get(pvname)
+            if entry is None:
+                entry = _BrokerPVEntry(None)
+                self._entries[pvname] = entry
+                entry.clients.add(client)
+                create = True
+            else:
+                entry.clients.add(client)
+                create = False
+
+            info = entry.info
+            last_value = entry.last_value
+
+        if create:
+            entry.pv = self.pv_factory(pvname, callback=lambda **kw: self._value(entry, kw),
+                                       connection_callback=lambda **kw: self._connection(entry, kw))
+        elif info is not None:
+            # Already connected PV, the kernel gets its state right away
+            client.send({"pv": pvname, "event": "connection", "connected": True, "info": info})
+            if last_value is not None:
+                client.send(last_value)
+
+    def _connection(self, entry, kw):
+        pvname = kw.get("pvname")
+
+        if kw.get("conn"):
+            # Control fields (precision, enum strings, ...) are read by the worker thread
+            pv = kw.get("pv") or entry.pv
+
+            def connected():
+                pv.get_ctrlvars()
+                entry.info = _pv_info(pv)
+                self._broadcast(entry, {"pv": pvname, "event": "connection", "connected": True, "info": entry.info})
+
+            self._work.put(connected)
+        else:
+            entry.info = None
+            self._broadcast(entry, {"pv": pvname, "event": "connection", "connected": False})
+
+    def _value(self, entry, kw):
+        message = {"pv": kw.get("pvname"), "event": "value",
+                   "value": _json_value(kw.get("value")),
+                   "char_value": _json_value(kw.get("char_value")),
+                   "timestamp": kw.get("timestamp"),
+                   "severity": kw.get("severity")}
+
+        entry.last_value = message
+        self._broadcast(entry, message)
+
+    def _broadcast(self, entry, message):
+        with self._lock:
+            clients = list(entry.clients)
+
+        for client in clients:
+            client.send(message)
+
+
+class BrokerPV():
+    def __init__(self, client, pvname):
+        """
+        **Constructor**
+
+        PV read through a :py:class:`PVBroker`, with the parts of the :py:class:`epics.PV` interface
+        used by Jupy4Syn (``connected``, ``wait_for_connection``, ``get``, ``put``, ``add_callback``,
+        ``remove_callback``, ``type``, ``precision``, ``enum_strs``, ``get_ctrlvars``). Values are
+        monitored, :py:meth:`get` returns the last value received. Puts go through the broker if it
+        allows them, else through a PV of the kernel's own pyepics.
+        """
+        self.client = client
+        self.pvname = pvname
+
+        self.connected = False
+        self.info = {}
+        self.value = None
+        self.char_value = None
+        self.timestamp = None
+        self.severity = None
+
+        self.callbacks = {}
+        self._callback_ids = itertools.count(1)
+        self._changed = threading.Condition()
+
+    @property
+    def type(self):
+        return self.info.get("type")
+
+    @property
+    def count(self):
+        return self.info.get("count")
+
+    @property
+    def precision(self):
+        return self.info.get("precision")
+
+    @property
+    def units(self):
+        return self.info.get("units")
+
+    @property
+    def enum_strs(self):
+        enum_strs = self.info.get("enum_strs")
+        return tuple(enum_strs) if enum_strs is not None else None
+
+    def get_ctrlvars(self, timeout=5.0):
+        # Control fields are sent by the broker with the connection
+        self.wait_for_connection(timeout)
+        return dict(self.info)
+
+    def wait_for_connection(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._changed:
+            while not self.connected:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+
+            return self.connected
+
+    def get(self, as_string=False, timeout=None, **kw):
+        """
+        Returns the last value received (``char_value`` if ``as_string``), waiting for the first
+        one at most ``timeout`` seconds (by default the broker client timeout).
+        """
+        timeout = self.client.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        with self._changed:
+            while self.value is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._changed.wait(remaining)
+
+            return self.char_value if as_string else self.value
+
+    def put(self, value, wait=False, timeout=30.0, **kw):
+        if not self.client.allow_puts:
+            return self.client.direct_pv(self.pvname).put(value, wait=wait, timeout=timeout)
+
+        return self.client.request({"op": "put", "pv": self.pvname, "value": _json_value(value),
+                                    "wait": wait, "timeout": timeout},
+                                   wait=wait, timeout=timeout + self.client.timeout)
+
+    def add_callback(self, callback, **kw):
+        index = next(self._callback_ids)
+        self.callbacks[index] = callback
+
+        return index
+
+    def remove_callback(self, index):
+        self.callbacks.pop(index, None)
+
+    def clear_callbacks(self):
+        self.callbacks.clear()
+
+    def disconnect(self):
+        self.client.close_pv(self.pvname)
+
+    def _event(self, message):
+        # Called by the client reader thread
+        with self._changed:
+            if message["event"] == "connection":
+                self.connected = message["connected"]
+                if self.connected:
+                    self.info = message.get("info") or {}
+            else:
+                self.value = message["value"]
+                self.char_value = message["char_value"]
+                self.timestamp = message["timestamp"]
+                self.severity = message["severity"]
+
+            self._changed.notify_all()
+
+        if message["event"] == "value":
+            for callback in list(self.callbacks.values()):
+                try:
+                    callback(pvname=self.pvname, value=self.value, char_value=self.char_value,
+                             timestamp=self.timestamp, severity=self.severity, cb_info=(None, self))
+                except Exception:
+                    pass
+
+
+class BrokerClient():
+    def __init__(self, socket_path=DEFAULT_SOCKET, timeout=5.0, pv_factory=None):
+        """
+        **Constructor**
+
+        Kernel side connection to a :py:class:`PVBroker`. :py:meth:`pv` and :py:meth:`get_many`
+        have the interface of :py:class:`epics.PV` and :py:func:`epics.caget_many`, so they can be
+        given to :py:class:`PVPool <jupy4syn.PVPool.PVPool>` as its ``pv_factory`` and ``get_many``.
+
+        Parameters
+        ----------
+        socket_path : :obj:`str`, optional
+            Broker Unix socket path, by default "/tmp/jupy4syn-pv-broker.sock"
+        timeout : :obj:`float`, optional
+            Reply timeout in seconds, by default 5.0
+        pv_factory : :obj:`callable`, optional
+            Function creating the kernel's own PVs, used to put values when the broker is read-only,
+            by default None (:py:class:`epics.PV`, imported on the first put)
+
+        Raises
+        ------
+        OSError
+            If the broker isn't running
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(socket_path)
+        self._write_lock = threading.Lock()
+
+        self._pvs = {}
+        self._replies = {}
+        self._request_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+        self.pv_factory = pv_factory
+        self._direct_pvs = {}
+
+        threading.Thread(target=self._read_loop, daemon=True, name="jupy4syn-broker-client").start()
+
+        self.allow_puts = self.request({"op": "info"}).get("allow_puts", False)
+
+    def pv(self, pvname, **kw):
+        """
+        Returns the :py:class:`BrokerPV` of ``pvname``, opening it in the broker if needed.
+        """
+        with self._lock:
+            pv = self._pvs.get(pvname)
+            if pv is not None:
+                return pv
+
+            pv = BrokerPV(self, pvname)
+            self._pvs[pvname] = pv
+
+        self._send({"op": "open", "pv": pvname})
+
+        return pv
+
+    def direct_pv(self, pvname):
+        """
+        Returns the kernel's own PV of ``pvname``, used to put values when the broker is read-only.
+        """
+        with self._lock:
+            pv = self._direct_pvs.get(pvname)
+            if pv is not None:
+                return pv
+
+            if self.pv_factory is None:
+                from epics import PV
+
+                self.pv_factory = PV
+
+            pv = self.pv_factory(pvname)
+            self._direct_pvs[pvname] = pv
+
+        return pv
+
+    def close_pv(self, pvname):
+        with self._lock:
+            self._pvs.pop(pvname, None)
+
+        self._send({"op": "close", "pv": pvname})
+
+    def get_many(self, pvnames, as_string=False, timeout=None, **kw):
+        """
+        Read many PVs in the broker, with :py:func:`epics.caget_many`.
+        """
+        timeout = self.timeout if timeout is None else timeout
+
+        return self.request({"op": "get_many", "pvs": list(pvnames), "as_string": as_string, "timeout": timeout},
+                            timeout=timeout + self.timeout)
+
+    def request(self, message, wait=True, timeout=None):
+        """
+        Send a request to the broker and, if ``wait``, return its result.
+
+        Raises
+        ------
+        TimeoutError
+            If the broker doesn't reply in ``timeout`` seconds
+        RuntimeError
+            If the request failed in the broker
+        """
+        message["id"] = next(self._request_ids)
+
+        if not wait:
+            self._send(message)
+            return None
+
+        reply = {"event": threading.Event()}
+        with self._lock:
+            self._replies[message["id"]] = reply
+
+        self._send(message)
+
+        if not reply["event"].wait(self.timeout if timeout is None else timeout):
+            with self._lock:
+                self._replies.pop(message["id"], None)
+            raise TimeoutError("PV broker didn't reply to " + message["op"])
+
+        if "error" in reply["message"]:
+            raise RuntimeError(reply["message"]["error"])
+
+        return reply["message"].get("result")
+
+    def close(self):
+        with self._lock:
+            direct_pvs = list(self._direct_pvs.values())
+            self._direct_pvs.clear()
+        for pv in direct_pvs:
+            pv.disconnect()
+
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._socket.close()
+
+    def _send(self, message):
+        data = (json.dumps(message) + "\n").encode()
+
+        with self._write_lock:
+            self._socket.sendall(data)
+
+    def _read_loop(self):
+        reader = self._socket.makefile("rb")
+
+        try:
+            for line in reader:
+                message = json.loads(line)
+
+                if "id" in message:
+                    with self._lock:
+                        reply = self._replies.pop(message["id"], None)
+                    if reply is not None:
+                        reply["message"] = message
+                        reply["event"].set()
+                else:
+                    with self._lock:
+                        pv = self._pvs.get(message.get("pv"))
+                    if pv is not None:
+                        pv._event(message)
+        except (OSError, ValueError):
+            pass
+
+        # Broker stopped, the PVs are disconnected
+        with self._lock:
+            pvs = list(self._pvs.values())
+        for pv in pvs:
+            pv._event({"event": "connection", "connected": False})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jupy4Syn Channel Access broker: one connection per PV "
+                                                 "shared by the notebook kernels connected to its Unix socket.")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Unix socket path (default: %(default)s)")
+    parser.add_argument("--mode", default="666", help="socket permissions, in octal (default: %(default)s)")
+    parser.add_argument("--allowed-uids", type=int, nargs="+", help="user ids allowed to connect (default: all)")
+    parser.add_argument("--allow-puts", action="store_true",
+                        help="put the kernels values, under the broker Channel Access identity (default: read-only)")
+    args = parser.parse_args()
+
+    PVBroker(args.socket, allow_puts=args.allow_puts, socket_mode=int(args.mode, 8),
+             allowed_uids=args.allowed_uids).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,16 +4,14 @@ import time
 import ipywidgets as widgets
 from IPython.display import display
 
-# EPICS and Py4Syn
-from epics import PV, caget
-
 # Jupy4Syn
 from jupy4syn.utils import logprint
-from jupy4syn.Configuration import Configuration
+from jupy4syn.PVPool import get_pv_pool
+from jupy4syn.Configuration import default_configuration
 
 
 class PVGetter(widgets.Button):
-    def __init__(self, name, config=Configuration(), *args, **kwargs):
+    def __init__(self, name, config=None, *args, **kwargs):
         """
         **Constructor**
 
@@ -23,7 +21,7 @@ class PVGetter(widgets.Button):
             Name of the PV (e.g. "IOC:m1") to get a value, or name of the mnemonic defined in 
             config.yml (e.g. "solm1") to get a value
         config : :py:class:`Configuration <jupy4syn.Configuration.Configuration>`, optional
-            Configuration object that contains Jupyter Notebook runtime information, by default Configuration()
+            Configuration object that contains Jupyter Notebook runtime information, by default None (shared default Configuration)
         
         Examples
         --------
@@ -35,33 +33,17 @@ class PVGetter(widgets.Button):
         widgets.Button.__init__(self, *args, **kwargs)
         
         # Config
+        if config is None:
+            config = default_configuration()
+
         self.config = config
         
-        # PV associated to the button
-        self.pv = PV(name)
+        # PV associated to the button, name can be a PV or a config.yml mnemonic
+        pool = get_pv_pool()
+        self.pv = pool.resolve(name, config)
         self.name = name
 
-        # Check if name is a PV, if not search it in config.yml motors
-        if not self.pv.wait_for_connection():
-            if name in config.yml_motors:
-                try:
-                    self.pv = PV(config.yml_motors[name]['pv'])
-                except KeyError:
-                    raise ValueError('Motor %s doesn\'t have pv field' % name)
-            elif name in config.yml_counters:
-                try:
-                    self.pv = PV(config.yml_counters[name]['pv'])
-                except KeyError:
-                    raise ValueError('Counter %s doesn\'t have pv field' % name)
-            else:
-                raise ValueError("Invalid name. Name provided is neither a conencted PV neither a config.yml mnemonic")
-
-            # Check if PV is finally connected
-            if not self.pv.wait_for_connection():
-                raise Exception("Valid name, but PV connection not possible")
-
-
-        self.pv_desc = caget(self.pv.pvname + ".DESC")
+        self.pv_desc = pool.description(self.pv)
         self.pv_name = self.pv.pvname
 
         self.value = ""
@@ -80,6 +62,29 @@ class PVGetter(widgets.Button):
         # Widgets Boxes
         self.output = widgets.Output()
         
+    @classmethod
+    def many(cls, names, config=None, *args, **kwargs):
+        """
+        Create a PVGetter for each name, connecting all the PVs concurrently and reading their
+        descriptions in one batch instead of one widget after the other.
+
+        Returns
+        -------
+        out : :obj:`list` of :py:class:`PVGetter`
+            One widget for each name, in the same order
+
+        Examples
+        --------
+        >>> for widget in PVGetter.many(["solm1", "solm2", "IOC:m3"], config):
+        ...     widget.display()
+        """
+        if config is None:
+            config = default_configuration()
+
+        get_pv_pool().prefetch(names, config)
+
+        return [cls(name, config, *args, **kwargs) for name in names]
+
     @staticmethod
     def _button_click(b):
         # Clear previous logs outputs
@@ -2,23 +2,28 @@
 import ipywidgets as widgets
 from IPython.display import display
 
-# EPICS and Py4Syn
-from epics import PV, caget
-
 # Jupy4Syn
 from jupy4syn.utils import logprint
-from jupy4syn.Configuration import Configuration
+from jupy4syn.Configuration import default_configuration
+from jupy4syn.PVPool import get_pv_pool
+from jupy4syn.RefreshScheduler import RefreshScheduler
 
 
 class PVMonitor(widgets.Button):
-    def __init__(self, config=Configuration(), *args, **kwargs):
+    def __init__(self, config=None, refresh_rate=None, *args, **kwargs):
         """
         **Constructor**
 
+        PV monitor events are not rendered in the EPICS callback threads: the latest value of
+        each PV is kept and the value labels are refreshed by a single
+        :py:class:`RefreshScheduler <jupy4syn.RefreshScheduler.RefreshScheduler>` thread.
+
         Parameters
         ----------
         config : :py:class:`Configuration <jupy4syn.Configuration.Configuration>`, optional
-            Configuration object that contains Jupyter Notebook runtime information, by default Configuration()
+            Configuration object that contains Jupyter Notebook runtime information, by default None (shared default Configuration)
+        refresh_rate : :obj:`float`, optional
+            Maximum number of widget refreshes per second, by default None (``config.monitor_refresh_rate``)
 
         Examples
         --------
@@ -31,6 +36,9 @@ class PVMonitor(widgets.Button):
         widgets.Button.__init__(self, *args, **kwargs)
         
         # Config
+        if config is None:
+            config = default_configuration()
+
         self.config = config
         
         # Text box to write the PV's
@@ -52,6 +60,16 @@ class PVMonitor(widgets.Button):
         # PVs
         self.pv_list = []
         self.pv_values = {}
+
+        # PV name -> (PV, callback index), PV name -> value Label
+        self.pv_callbacks = {}
+        self.value_labels = {}
+
+        # Widgets refresh
+        if refresh_rate is None:
+            refresh_rate = config.monitor_refresh_rate
+
+        self.scheduler = RefreshScheduler(self._refresh, refresh_rate, name="jupy4syn-pv-monitor")
         
         # Set callback function for click event
         self.monitoring_status = False
@@ -76,13 +94,19 @@ class PVMonitor(widgets.Button):
                 b.description='Start PV Monitoring'
                 b.button_style='success'
 
+                # Stop receiving and rendering PVs events
+                b._unsubscribe()
+                b.scheduler.stop()
+
                 # Stop displaying the motors widgets, show only button and text box
                 b.main_box.children = (b.text, b)
 
                 logprint("Stopped monitoring PVs " + ', '.join([pv.pvname for pv in b.pv_list]), config=b.config)
+                logprint("PV Monitor refresh stats: " + str(b.scheduler.stats()), config=b.config)
 
                 # Reset motor list
-                b.pv_list = []      
+                b.pv_list = []
+                b.value_labels = {}
             else:
                 # Change button appearence
                 b.description='Stop PV Monitoring'
@@ -110,15 +134,27 @@ class PVMonitor(widgets.Button):
                 # Create PVs and add a monitor callback to them
                 # Also add these PVs values as children of main_box widget
                 try:
-                    b.pv_list = [PV(name) for name in pv_list_names]
+                    # Connect all PVs at once
+                    pvs = get_pv_pool().connect(pv_list_names)
+                    b.pv_list = [pvs[name] for name in pv_list_names]
+
+                    b.scheduler.reset_stats()
+                    b.scheduler.start()
 
+                    rows = []
                     for pv in b.pv_list:
-                        pv.add_callback(b._monitor_callback)
+                        if pv.pvname in b.value_labels:
+                            continue
 
                         value = pv.get()
                         b.pv_values[pv.pvname] = (value, str(value))
 
-                        b.main_box.children += (widgets.HBox([widgets.Label(pv.pvname), widgets.Label(str(value))]),)
+                        b.value_labels[pv.pvname] = widgets.Label(str(value))
+                        rows.append(widgets.HBox([widgets.Label(pv.pvname), b.value_labels[pv.pvname]]))
+
+                        b.pv_callbacks[pv.pvname] = (pv, pv.add_callback(b._monitor_callback))
+
+                    b.main_box.children += tuple(rows)
 
                     logprint("Monitoring PVs " + ', '.join(pv_list_names), config=b.config)        
 
@@ -135,11 +171,29 @@ class PVMonitor(widgets.Button):
                
 
     def _monitor_callback(self, pvname='', value=0, char_value='', **kw):
-        self.pv_values[pvname] = (value, "{:.3f}".format(value))
-        
-        for widget in self.main_box.children[1:]:
-            if widget.children[0].value == pvname:
-                widget.children[1].value = "{:.3f}".format(value)
+        # Runs in the EPICS callback thread, only keep the latest value
+        self.scheduler.post(pvname, value)
+
+    def _refresh(self, values):
+        # Runs in the scheduler thread, with the latest value of each PV that changed
+        for pvname, value in values.items():
+            label = self.value_labels.get(pvname)
+            if label is None:
+                continue
+
+            try:
+                text = "{:.3f}".format(value)
+            except (TypeError, ValueError):
+                text = str(value)
+
+            self.pv_values[pvname] = (value, text)
+            label.value = text
+
+    def _unsubscribe(self):
+        for pv, index in self.pv_callbacks.values():
+            pv.remove_callback(index)
+
+        self.pv_callbacks = {}
 
 
     def display(self):
@@ -0,0 +1,315 @@
+import os
+import threading
+import time
+
+# EPICS
+from epics import PV, caget_many
+
+
+class PVPool():
+    def __init__(self, connection_timeout=5.0, pv_factory=None, get_many=None):
+        """
+        **Constructor**
+
+        Registry of connected PVs shared by Jupy4Syn widgets and commands. The same
+        :py:class:`epics.PV` object is returned for the same name, many names are connected
+        concurrently and PV descriptions (``.DESC``) are fetched in a single batch.
+
+        Parameters
+        ----------
+        connection_timeout : :obj:`float`, optional
+            Maximum time in seconds waiting for connections, by default 5.0
+        pv_factory : :obj:`callable`, optional
+            Function creating a PV from its name, by default None (:py:class:`epics.PV`, or a
+            :py:class:`PVBroker <jupy4syn.PVBroker.PVBroker>` PV, see :py:func:`use_pv_broker`)
+        get_many : :obj:`callable`, optional
+            Function reading many PVs at once, by default None (:py:func:`epics.caget_many`)
+
+        Examples
+        --------
+        >>> pool = get_pv_pool()
+        >>> pool.prefetch(["IOC:m1", "solm1", "LNLS:ANEL:corrente"], config)
+        >>> pv = pool.resolve("solm1", config)
+        >>> pool.description(pv)
+        'Solenoid motor 1'
+        """
+        self.connection_timeout = connection_timeout
+        self.pv_factory = PV if pv_factory is None else pv_factory
+        self.get_many = caget_many if get_many is None else get_many
+
+        # PV name -> PV
+        self._pvs = {}
+        # PV name -> DESC field value
+        self._descriptions = {}
+        # (id of config.yml motors, id of config.yml counters) -> mnemonic index
+        self._indexes = {}
+
+        self._lock = threading.Lock()
+
+    def get(self, pvname):
+        """
+        Returns the PV object of ``pvname``, creating it (and starting its connection) if needed.
+        It doesn't wait for the connection.
+        """
+        with self._lock:
+            pv = self._pvs.get(pvname)
+            if pv is None:
+                pv = self.pv_factory(pvname)
+                self._pvs[pvname] = pv
+
+            return pv
+
+    def connect(self, pvnames, timeout=None):
+        """
+        Connect many PVs concurrently, waiting at most ``timeout`` seconds for all of them.
+
+        Returns
+        -------
+        out : :obj:`dict`
+            PV name -> PV, connected or not
+        """
+        timeout = self.connection_timeout if timeout is None else timeout
+
+        # Creating the PVs sends all the channel searches before waiting for any of them
+        pvs = {pvname: self.get(pvname) for pvname in pvnames}
+
+        deadline = time.monotonic() + timeout
+        for pv in pvs.values():
+            if not pv.connected:
+                pv.wait_for_connection(timeout=max(0.0, deadline - time.monotonic()))
+
+        return pvs
+
+    def mnemonic_index(self, config):
+        """
+        Returns the config.yml mnemonic index: mnemonic -> (kind, PV name), kind being "Motor" or "Counter".
+        PV name is None if the mnemonic doesn't have a pv field. The index is computed once per config.yml.
+        """
+        motors = config.yml_motors
+        counters = config.yml_counters
+        key = (id(motors), id(counters))
+
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                return index
+
+        index = {}
+        for kind, entries in (("Counter", counters), ("Motor", motors)):
+            for mnemonic, entry in entries.items():
+                try:
+                    index[mnemonic] = (kind, entry['pv'])
+                except (KeyError, TypeError):
+                    index[mnemonic] = (kind, None)
+
+        with self._lock:
+            self._indexes = {key: index}
+
+        return index
+
+    def discard(self, pvname):
+        """
+        Remove a PV from the pool and disconnect it.
+        """
+        with self._lock:
+            pv = self._pvs.pop(pvname, None)
+
+        if pv is not None and hasattr(pv, "disconnect"):
+            pv.disconnect()
+
+    def wait_any(self, pvs, timeout):
+        """
+        Wait until one of the PVs is connected, at most ``timeout`` seconds. Returns the first
+        connected PV in ``pvs`` order, None if none of them connected.
+        """
+        deadline = time.monotonic() + timeout
+
+        while True:
+            for pv in pvs:
+                if pv.connected:
+                    return pv
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+
+            for pv in pvs:
+                pv.wait_for_connection(timeout=min(0.01, max(0.0, remaining)))
+
+    def resolve(self, name, config, timeout=None):
+        """
+        Returns the connected PV of ``name``, a config.yml mnemonic (e.g. "solm1") or a PV name (e.g. "IOC:m1").
+        The mnemonic PV and a PV with the given name are connected concurrently, the first one
+        connected is returned (the mnemonic PV if both are).
+
+        Raises
+        ------
+        ValueError
+            If the name is neither a connected PV neither a config.yml mnemonic, or if the mnemonic
+            doesn't have a pv field
+        Exception
+            If the mnemonic PV can't be connected
+        """
+        timeout = self.connection_timeout if timeout is None else timeout
+        entry = self.mnemonic_index(config).get(name)
+
+        pvs = []
+        if entry is not None and entry[1] is not None:
+            pvs.append(self.get(entry[1]))
+
+            # Connected mnemonic PV, e.g. prefetched
+            if pvs[0].connected:
+                return pvs[0]
+
+        with self._lock:
+            created = name not in self._pvs
+        pvs.append(self.get(name))
+
+        pv = self.wait_any(pvs, timeout)
+
+        # A mnemonic isn't a PV name, the channel created for it is dropped
+        if entry is not None and created and pv is not pvs[-1]:
+            self.discard(name)
+
+        if pv is not None:
+            return pv
+
+        if entry is None:
+            raise ValueError("Invalid name. Name provided is neither a conencted PV neither a config.yml mnemonic")
+
+        kind, pvname = entry
+        if pvname is None:
+            raise ValueError('%s %s doesn\'t have pv field' % (kind, name))
+
+        raise Exception("Valid name, but PV connection not possible")
+
+    def prefetch(self, names, config, timeout=None):
+        """
+        Resolve many names (config.yml mnemonics or PV names) at once: all the PVs are connected
+        concurrently and their descriptions and enum strings are fetched in one batch.
+        Names that can't be resolved are ignored, they will raise when resolved again.
+
+        Returns
+        -------
+        out : :obj:`dict`
+            Name -> connected PV, for the names that were resolved
+        """
+        index = self.mnemonic_index(config)
+
+        pvnames = []
+        for name in names:
+            entry = index.get(name)
+            pvnames.append(entry[1] if entry is not None and entry[1] is not None else name)
+
+        self.connect(pvnames, timeout)
+
+        resolved = {}
+        for name in names:
+            try:
+                resolved[name] = self.resolve(name, config, timeout=0.0)
+            except Exception:
+                continue
+
+        self.descriptions(resolved.values())
+        self.enum_strings(resolved.values())
+
+        return resolved
+
+    def descriptions(self, pvs):
+        """
+        Returns the ``.DESC`` field of each PV, reading the missing ones in a single ``caget_many`` call.
+        """
+        pvs = list(pvs)
+
+        missing = sorted({pv.pvname for pv in pvs if pv.pvname not in self._descriptions})
+        if missing:
+            values = self.get_many([pvname + ".DESC" for pvname in missing], as_string=True)
+
+            with self._lock:
+                for pvname, value in zip(missing, values):
+                    self._descriptions[pvname] = value
+
+        return [self._descriptions[pv.pvname] for pv in pvs]
+
+    def description(self, pv):
+        return self.descriptions([pv])[0]
+
+    def enum_strings(self, pvs):
+        """
+        Fetch the enum strings of the enum PVs, so they are available when their values are read as strings.
+        """
+        for pv in pvs:
+            if is_enum(pv) and pv.enum_strs is None:
+                pv.get_ctrlvars()
+
+
+def is_enum(pv):
+    """
+    True if the PV is an enum. Enum PVs values are read with "as_string" set to True,
+    so the enum string value is shown instead of the enum int value.
+    """
+    return pv.type == "enum" or pv.type == "time_enum"
+
+
+# Pool shared by all widgets and commands
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pv_pool():
+    """
+    Returns the PV pool shared by all Jupy4Syn widgets and commands. If the ``JUPY4SYN_PV_BROKER``
+    environment variable is set, the pool reads the PVs through the broker listening on that
+    socket (see :py:func:`use_pv_broker`).
+    """
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            socket_path = os.environ.get("JUPY4SYN_PV_BROKER")
+            _pool = _broker_pool(socket_path) if socket_path else PVPool()
+
+        return _pool
+
+
+def _broker_pool(socket_path):
+    # Jupy4Syn
+    from jupy4syn.PVBroker import BrokerClient
+    from jupy4syn.utils import logprint
+
+    try:
+        client = BrokerClient(socket_path)
+    except OSError as e:
+        logprint("PV broker " + socket_path + " not available, connecting PVs directly: " + str(e), "[WARNING]")
+        return PVPool()
+
+    return PVPool(pv_factory=client.pv, get_many=client.get_many)
+
+
+def use_pv_broker(socket_path=None):
+    """
+    Read the PVs of the shared pool through a :py:class:`PVBroker <jupy4syn.PVBroker.PVBroker>`
+    (one CA connection per PV for all the kernels of the host) instead of connecting them in this
+    kernel. Widgets created before keep their PVs.
+
+    Parameters
+    ----------
+    socket_path : :obj:`str`, optional
+        Broker Unix socket path, by default None ("/tmp/jupy4syn-pv-broker.sock")
+
+    Raises
+    ------
+    OSError
+        If the broker isn't running
+    """
+    global _pool
+
+    # Jupy4Syn
+    from jupy4syn.PVBroker import DEFAULT_SOCKET, BrokerClient
+
+    client = BrokerClient(socket_path or DEFAULT_SOCKET)
+
+    with _pool_lock:
+        _pool = PVPool(pv_factory=client.pv, get_many=client.get_many)
+
+        return _pool
@@ -0,0 +1,160 @@
+import threading
+import time
+
+# Auxiliar packages
+import numpy as np
+
+# Jupy4Syn
+from jupy4syn.Decimator import decimate
+
+
+class PlotUpdater():
+    def __init__(self, figure, max_fps=2.0, max_points=None, decimation='minmax'):
+        """
+        **Constructor**
+
+        Coalesces trace updates of a Plotly ``FigureWidget`` and sends them to the browser in a
+        single ``batch_update`` message, at most ``max_fps`` times per second. Updates of a trace
+        that arrive before the previous one was sent replace it (they are counted as dropped).
+
+        Plotly's FigureWidget comm protocol has no extend-traces message, so a trace update
+        carries the whole trace. Data should be given as NumPy arrays, which are sent to the
+        frontend as binary buffers, and only traces that changed since the last frame are sent.
+
+        If ``max_points`` is set, traces longer than it are decimated before being sent
+        (see :py:func:`jupy4syn.Decimator.decimate`), keeping the full resolution data on the server.
+        When the user zooms or pans, the visible window (``layout.xaxis.range``) is decimated again.
+
+        Parameters
+        ----------
+        figure : :obj:`plotly.graph_objs.FigureWidget`
+            Figure that will be updated
+        max_fps : :obj:`float`, optional
+            Maximum number of updates sent to the browser per second, by default 2.0
+        max_points : :obj:`int`, optional
+            Maximum number of points sent for each trace, by default None (no decimation)
+        decimation : :obj:`str`, optional
+            Decimation method, "minmax" or "lttb", by default "minmax"
+
+        Examples
+        --------
+        >>> updater = PlotUpdater(fig, max_fps=5)
+        >>> updater.update(0, x, y)
+        >>> updater.flush(force=True)
+        >>> updater.stats()
+        {'frames_sent': 1, 'bytes_sent': 1600, 'updates_dropped': 0}
+        """
+        self.figure = figure
+        self.max_fps = max_fps
+        self.max_points = max_points
+        self.decimation = decimation
+
+        # trace index -> (x, y)
+        self._pending = {}
+        self._full = {}
+
+        # Visible window of each x axis (e.g. "xaxis2"), updated when the user zooms
+        self._ranges = {}
+        self._observed_axes = set()
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+        # Held while a frame is built, flush is called by the plot thread and, when the user zooms,
+        # by the widget comm thread
+        self._flush_lock = threading.RLock()
+
+        self.reset_stats()
+
+    def update(self, index, x, y):
+        """
+        Set the data of the trace ``index``. The update is sent in the next frame.
+        """
+        with self._lock:
+            if index in self._pending:
+                self.updates_dropped += 1
+
+            self._pending[index] = (x, y)
+
+    def flush(self, force=False):
+        """
+        Send the pending updates, unless the last frame was sent less than ``1/max_fps`` seconds ago.
+
+        Parameters
+        ----------
+        force : :obj:`bool`, optional
+            Send pending updates regardless of the frame rate, by default False
+
+        Returns
+        -------
+        out : :obj:`bool`
+            True if a frame was sent
+        """
+        with self._flush_lock:
+            now = time.monotonic()
+
+            with self._lock:
+                if not self._pending:
+                    return False
+
+                if not force and self.max_fps and now - self._last_flush < 1.0 / self.max_fps:
+                    return False
+
+                pending = self._pending
+                self._pending = {}
+                self._last_flush = now
+
+            with self.figure.batch_update():
+                for index, (x, y) in pending.items():
+                    x = np.asarray(x)
+                    y = np.asarray(y)
+
+                    trace = self.figure.data[index]
+
+                    if self.max_points:
+                        self._full[index] = (x, y)
+
+                        axis = self._axis_name(trace)
+                        self._observe_axis(axis)
+                        x, y = decimate(x, y, self.max_points, self._ranges.get(axis), self.decimation)
+
+                    trace.x = x
+                    trace.y = y
+
+                    self.bytes_sent += x.nbytes + y.nbytes
+
+            self.frames_sent += 1
+
+            return True
+
+    def _axis_name(self, trace):
+        # Trace axis "x2" is laid out by "xaxis2"
+        return "xaxis" + (trace.xaxis or "x")[1:]
+
+    def _observe_axis(self, axis):
+        if axis in self._observed_axes:
+            return
+
+        self._observed_axes.add(axis)
+        self.figure.layout.on_change(lambda layout, x_range: self._range_changed(axis, x_range), axis + ".range")
+
+    def _range_changed(self, axis, x_range):
+        # Runs in the widget comm thread, the frame is built while no other flush is running
+        with self._flush_lock:
+            self._ranges[axis] = tuple(x_range) if x_range is not None else None
+
+            # Decimate the visible window of the full resolution data again
+            with self._lock:
+                for index, (x, y) in self._full.items():
+                    if index not in self._pending and self._axis_name(self.figure.data[index]) == axis:
+                        self._pending[index] = (x, y)
+
+            self.flush(force=True)
+
+    def reset_stats(self):
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.updates_dropped = 0
+
+    def stats(self):
+        return {"frames_sent": self.frames_sent,
+                "bytes_sent": self.bytes_sent,
+                "updates_dropped": self.updates_dropped}
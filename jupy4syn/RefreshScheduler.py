@@ -0,0 +1,134 @@
+import threading
+
+# Jupy4Syn
+from jupy4syn.utils import logprint
+
+
+class RefreshScheduler():
+    def __init__(self, render, rate=10.0, name="jupy4syn-refresh"):
+        """
+        **Constructor**
+
+        Coalesces values posted from EPICS callback threads and renders them from a single
+        thread, at most ``rate`` times per second. Only the latest value posted for each key
+        since the last render is rendered, older ones are counted as coalesced.
+
+        Parameters
+        ----------
+        render : :obj:`callable`
+            Function called with a :obj:`dict` (key -> latest value) of the values posted since
+            the last render. It runs in the scheduler thread
+        rate : :obj:`float`, optional
+            Maximum number of renders per second, by default 10.0
+        name : :obj:`str`, optional
+            Scheduler thread name, by default "jupy4syn-refresh"
+
+        Examples
+        --------
+        >>> scheduler = RefreshScheduler(lambda values: print(values), rate=5)
+        >>> scheduler.start()
+        >>> scheduler.post("IOC:m1.RBV", 1.0)
+        >>> scheduler.post("IOC:m1.RBV", 1.5)
+        {'IOC:m1.RBV': 1.5}
+        >>> scheduler.stop()
+        """
+        self.render = render
+        self.rate = rate
+        self.name = name
+
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._posted = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.reset_stats()
+
+    def post(self, key, value):
+        """
+        Set the latest value of ``key``. Safe to call from any thread, it doesn't render.
+        """
+        with self._lock:
+            self.events_received += 1
+            if key in self._pending:
+                self.events_coalesced += 1
+
+            self._pending[key] = value
+
+        self._posted.set()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, render_pending=False):
+        """
+        Stop the scheduler thread. Values still pending are discarded, unless ``render_pending`` is True.
+        """
+        self._stopped.set()
+        self._posted.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        batch = self._take()
+        if render_pending and batch:
+            self._render(batch)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def reset_stats(self):
+        self.events_received = 0
+        self.events_coalesced = 0
+        self.renders = 0
+
+    def stats(self):
+        """
+        Returns the number of posted values, of values replaced before being rendered and of renders.
+        """
+        return {
+            "events_received": self.events_received,
+            "events_coalesced": self.events_coalesced,
+            "renders": self.renders,
+        }
+
+    def _take(self):
+        with self._lock:
+            batch = self._pending
+            self._pending = {}
+
+        return batch
+
+    def _render(self, batch):
+        self.renders += 1
+        self.render(batch)
+
+    def _run(self):
+        period = 1.0 / self.rate
+
+        while True:
+            self._posted.wait()
+            if self._stopped.is_set():
+                break
+
+            self._posted.clear()
+
+            batch = self._take()
+            if batch:
+                try:
+                    self._render(batch)
+                except Exception as e:
+                    # A failing render must not stop the refreshes
+                    logprint("Error in " + self.name + " refresh", "[ERROR]")
+                    logprint(str(e), "[ERROR]")
+
+            # Rate limit, values posted meanwhile are coalesced
+            if self._stopped.wait(period):
+                break
@@ -0,0 +1,158 @@
+import os
+
+# Auxiliar packages
+import numpy as np
+
+
+class RepeatAggregator():
+    def __init__(self, number_columns, capacity=1024):
+        """
+        **Constructor**
+
+        Running mean, variance and count of each point across the repeats of a scan, updated
+        while the repeats are measured (Welford's algorithm, vectorized over the new points).
+        Repeats are aligned by point index: point ``i`` of every repeat is aggregated together.
+
+        Parameters
+        ----------
+        number_columns : :obj:`int`
+            Number of columns of the scan data
+        capacity : :obj:`int`, optional
+            Initial number of points allocated, by default 1024
+
+        Examples
+        --------
+        >>> aggregator = RepeatAggregator(tails[0].number_columns)
+        >>> for repeat, tail in enumerate(tails):
+        ...     tail.subscribe(lambda source, start, repeat=repeat: aggregator.update(repeat, source))
+        >>> aggregator.mean[3], aggregator.std[3]
+        (array([...]), array([...]))
+        """
+        self.number_columns = number_columns
+        self.size = 0
+
+        self._count = np.zeros(max(1, capacity), dtype=np.int64)
+        self._mean = np.zeros((number_columns, max(1, capacity)))
+        self._m2 = np.zeros((number_columns, max(1, capacity)))
+
+        # Points of each repeat already aggregated
+        self.added = {}
+
+    @property
+    def count(self):
+        return self._count[:self.size]
+
+    @property
+    def mean(self):
+        return self._mean[:, :self.size]
+
+    @property
+    def variance(self):
+        """
+        Sample variance of each point, 0 for points measured only once.
+        """
+        count = self.count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(count > 1, self._m2[:, :self.size] / (count - 1), 0.0)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    def add(self, start, values):
+        """
+        Add measured values to the points ``start`` to ``start + values.shape[1]``.
+
+        Parameters
+        ----------
+        start : :obj:`int`
+            First point index
+        values : :obj:`numpy.ndarray`
+            Values, shape (number of columns, number of points)
+        """
+        end = start + values.shape[1]
+        if end > self._count.shape[0]:
+            self._grow(end)
+        self.size = max(self.size, end)
+
+        count = self._count[start:end]
+        mean = self._mean[:, start:end]
+        m2 = self._m2[:, start:end]
+
+        count += 1
+        delta = values - mean
+        mean += delta / count
+        m2 += delta * (values - mean)
+
+    def update(self, repeat, source):
+        """
+        Add the points of a repeat :py:class:`ScanDataSource <jupy4syn.ScanDataSource.ScanDataSource>`
+        that weren't added yet.
+
+        Returns
+        -------
+        out : :obj:`int`
+            Number of points added
+        """
+        start = self.added.get(repeat, 0)
+        end = source.points
+        if end <= start:
+            return 0
+
+        values = np.array([source.column(index, start)[:end - start] for index in range(self.number_columns)])
+        self.add(start, values)
+        self.added[repeat] = end
+
+        return end - start
+
+    def write(self, file_name, labels=None, number_motors=1):
+        """
+        Write the aggregate as a scan file: the motor columns mean, then the mean and standard
+        deviation of each counter, then the number of repeats of each point.
+
+        Parameters
+        ----------
+        file_name : :obj:`str`
+            Output file
+        labels : :obj:`list` of :obj:`str`, optional
+            Column labels of the scans, by default None (column numbers)
+        number_motors : :obj:`int`, optional
+            Number of motor columns, by default 1
+        """
+        if not labels:
+            labels = [str(index) for index in range(self.number_columns)]
+
+        mean = self.mean
+        std = self.std
+
+        columns = [mean[index] for index in range(number_motors)]
+        header = list(labels[:number_motors])
+        for index in range(number_motors, self.number_columns):
+            columns += [mean[index], std[index]]
+            header += [labels[index], labels[index] + "_std"]
+        columns.append(self.count)
+        header.append("repeats")
+
+        temporary = file_name + ".tmp" + str(os.getpid())
+        with open(temporary, "w") as f:
+            f.write("#S 1 mean of " + str(len(self.added)) + " repeats\n")
+            f.write("#M " + str(self.size) + "\n")
+            f.write("#N " + str(len(header)) + "\n")
+            f.write("#L " + " ".join(header) + "\n")
+            np.savetxt(f, np.column_stack(columns), fmt="%.10g")
+        os.replace(temporary, file_name)
+
+    def _grow(self, needed):
+        capacity = self._count.shape[0]
+        while capacity < needed:
+            capacity *= 2
+
+        count = np.zeros(capacity, dtype=np.int64)
+        mean = np.zeros((self.number_columns, capacity))
+        m2 = np.zeros((self.number_columns, capacity))
+
+        count[:self.size] = self._count[:self.size]
+        mean[:, :self.size] = self._mean[:, :self.size]
+        m2[:, :self.size] = self._m2[:, :self.size]
+
+        self._count, self._mean, self._m2 = count, mean, m2
@@ -6,17 +6,20 @@ import ipywidgets as widgets
 from IPython.display import display
 
 # Jupy4Syn
-from jupy4syn.Configuration import Configuration
+from jupy4syn.Configuration import default_configuration
 from jupy4syn.JupyScan import JupyScan
 from jupy4syn.utils import logprint
 
 
 class ScanButton(widgets.Button):
     
-    def __init__(self, config=Configuration(), *args, **kwargs):
+    def __init__(self, config=None, *args, **kwargs):
         widgets.Button.__init__(self, *args, **kwargs)
         
         # Config
+        if config is None:
+            config = default_configuration()
+
         self.config = config
         
         # Text box to write the motors to move
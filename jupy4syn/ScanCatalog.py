@@ -0,0 +1,415 @@
+import calendar
+from pathlib import Path
+import re
+import sqlite3
+import threading
+import time
+
+# Auxiliar packages
+import numpy as np
+
+# Jupy4Syn
+from jupy4syn.ScanFileCache import load_scan
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    finished REAL,
+    command TEXT NOT NULL,
+    configuration TEXT,
+    repeats INTEGER,
+    output TEXT,
+    plot TEXT,
+    pyqt_plot TEXT,
+    points INTEGER,
+    expected_points INTEGER,
+    interrupted INTEGER,
+    origin TEXT NOT NULL DEFAULT 'scangui',
+    UNIQUE (started, output)
+);
+CREATE TABLE IF NOT EXISTS scan_motors (
+    scan_id INTEGER NOT NULL REFERENCES scans (id) ON DELETE CASCADE,
+    motor TEXT NOT NULL,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scan_files (
+    scan_id INTEGER NOT NULL REFERENCES scans (id) ON DELETE CASCADE,
+    repeat INTEGER NOT NULL,
+    path TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scan_statistics (
+    scan_id INTEGER NOT NULL REFERENCES scans (id) ON DELETE CASCADE,
+    label TEXT NOT NULL,
+    minimum REAL,
+    maximum REAL,
+    mean REAL,
+    std REAL,
+    x_at_maximum REAL
+);
+CREATE INDEX IF NOT EXISTS scans_started ON scans (started);
+CREATE INDEX IF NOT EXISTS scans_configuration ON scans (configuration, started);
+CREATE INDEX IF NOT EXISTS scan_motors_motor ON scan_motors (motor, scan_id);
+CREATE INDEX IF NOT EXISTS scan_files_scan ON scan_files (scan_id);
+CREATE INDEX IF NOT EXISTS scan_statistics_scan ON scan_statistics (scan_id);
+"""
+
+# ScanGUI scanlog block (see ScanGUI.monitor_save_file)
+_SCANLOG_BLOCK = re.compile(
+    r"^(?P<time>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) UTC-0\| \[SCAN\]:\n"
+    r"Scan with command: '(?P<command>.*)' repeated (?P<repeats>\d+) times\n"
+    r"Scan configuration: '(?P<configuration>.*)'\n"
+    r"Scan data saved in: '(?P<output>.*)'\n"
+    r"Jupyter Scan plot saved in: '(?P<plot>.*)'\n"
+    r"PyQtGraph Scan plot saved in: '(?P<pyqt_plot>.*)'$",
+    re.MULTILINE)
+
+
+def command_motors(command):
+    """
+    Motors of a scan-utils command line (``--motor`` arguments).
+    """
+    tokens = command.split()
+    motors = []
+
+    for i, token in enumerate(tokens):
+        if token == "--motor":
+            for motor in tokens[i + 1:]:
+                if motor.startswith("-"):
+                    break
+                motors.append(motor)
+
+    return motors
+
+
+def summary_statistics(source, number_motors):
+    """
+    Minimum, maximum, mean, standard deviation and x (first motor) at the maximum of each counter
+    column of a :py:class:`ScanDataSource <jupy4syn.ScanDataSource.ScanDataSource>`.
+
+    Returns
+    -------
+    out : :obj:`dict`
+        label -> (minimum, maximum, mean, std, x_at_maximum)
+    """
+    statistics = {}
+    if source.points == 0:
+        return statistics
+
+    x = source.column(0)
+    for index in range(number_motors, source.number_columns):
+        label = source.labels[index] if index < len(source.labels) else str(index)
+        y = source.column(index)
+
+        if np.all(np.isnan(y)):
+            continue
+
+        maximum = int(np.nanargmax(y))
+        statistics[label] = (float(np.nanmin(y)), float(y[maximum]), float(np.nanmean(y)),
+                             float(np.nanstd(y)), float(x[maximum]) if number_motors else float(maximum))
+
+    return statistics
+
+
+class ScanCatalog():
+    def __init__(self, path="./scanlogs/catalog.sqlite3"):
+        """
+        **Constructor**
+
+        Catalog of the scans, in a SQLite database (WAL mode, so the notebook can query it while a
+        scan is being added). Each scan has its command, configuration, motors, number of repeats,
+        output files, plot files, number of points, start and end times and the summary statistics
+        of its counters. Scans are indexed by time, configuration and motor.
+
+        Parameters
+        ----------
+        path : :obj:`str`, optional
+            Database file, by default "./scanlogs/catalog.sqlite3"
+
+        Examples
+        --------
+        >>> catalog = get_scan_catalog()
+        >>> catalog.backfill("./scanlogs")
+        1532
+        >>> scans = catalog.find(configuration="energy", since=time.time() - 7*24*3600)
+        >>> scans[0]["command"]
+        'scan -c energy --motor mono ...'
+        """
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30.0)
+        self._connection.row_factory = sqlite3.Row
+
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute("PRAGMA foreign_keys=ON")
+            self._connection.executescript(SCHEMA)
+
+    def add_scan(self, command, configuration=None, motors=(), repeats=1, files=(), started=None,
+                 plot=None, pyqt_plot=None, expected_points=None, origin="scangui"):
+        """
+        Add a started scan.
+
+        Parameters
+        ----------
+        command : :obj:`str`
+            Scan command
+        configuration : :obj:`str`, optional
+            Scan configuration name, by default None
+        motors : :obj:`list` of :obj:`str`, optional
+            Scanned motors, by default ()
+        repeats : :obj:`int`, optional
+            Number of repeats, by default 1
+        files : :obj:`list` of :obj:`str`, optional
+            Scan data files, one for each repeat, by default ()
+        started : :obj:`float`, optional
+            Start time (seconds since the epoch), by default None (now)
+        plot : :obj:`str`, optional
+            Jupyter plot file, by default None
+        pyqt_plot : :obj:`str`, optional
+            PyQtGraph plot file, by default None
+        expected_points : :obj:`int`, optional
+            Number of points of each repeat, by default None
+        origin : :obj:`str`, optional
+            Who added the scan ("scangui" or "backfill"), by default "scangui"
+
+        Returns
+        -------
+        out : :obj:`int`
+            Scan id, None if the scan (same start time and output) is already in the catalog
+        """
+        if started is None:
+            started = time.time()
+
+        with self._lock, self._connection:
+            return self._insert_scan(command, configuration, motors, repeats, files, started,
+                                     plot, pyqt_plot, expected_points, origin)
+
+    def _insert_scan(self, command, configuration, motors, repeats, files, started,
+                     plot, pyqt_plot, expected_points, origin):
+        # Called with the lock held, in a transaction
+        files = list(files)
+        output = files[-1] if files else None
+
+        cursor = self._connection.execute(
+            "INSERT OR IGNORE INTO scans (started, command, configuration, repeats, output, plot, pyqt_plot, "
+            "expected_points, origin) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (started, command, configuration, repeats, output, plot, pyqt_plot, expected_points, origin))
+
+        if cursor.rowcount == 0:
+            return None
+
+        scan_id = cursor.lastrowid
+        self._connection.executemany("INSERT INTO scan_motors (scan_id, motor, position) VALUES (?, ?, ?)",
+                                     [(scan_id, motor, i) for i, motor in enumerate(motors)])
+        self._connection.executemany("INSERT INTO scan_files (scan_id, repeat, path) VALUES (?, ?, ?)",
+                                     [(scan_id, i, path) for i, path in enumerate(files)])
+
+        return scan_id
+
+    def finish_scan(self, scan_id, points=None, interrupted=False, statistics=None, finished=None):
+        """
+        Record the end of a scan.
+
+        Parameters
+        ----------
+        scan_id : :obj:`int`
+            Scan id returned by :py:meth:`add_scan`
+        points : :obj:`int`, optional
+            Number of points measured, by default None
+        interrupted : :obj:`bool`, optional
+            If the scan was stopped, by default False
+        statistics : :obj:`dict`, optional
+            Counters statistics, see :py:func:`summary_statistics`, by default None
+        finished : :obj:`float`, optional
+            End time (seconds since the epoch), by default None (now)
+        """
+        if finished is None:
+            finished = time.time()
+
+        with self._lock, self._connection:
+            self._connection.execute("UPDATE scans SET finished = ?, points = ?, interrupted = ? WHERE id = ?",
+                                     (finished, points, int(interrupted), scan_id))
+
+            if statistics:
+                self._connection.execute("DELETE FROM scan_statistics WHERE scan_id = ?", (scan_id,))
+                self._connection.executemany(
+                    "INSERT INTO scan_statistics (scan_id, label, minimum, maximum, mean, std, x_at_maximum) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(scan_id, label) + tuple(values) for label, values in statistics.items()])
+
+    def find(self, configuration=None, motor=None, command=None, since=None, until=None, limit=100):
+        """
+        Find scans, newest first.
+
+        Parameters
+        ----------
+        configuration : :obj:`str`, optional
+            Scan configuration, by default None (any)
+        motor : :obj:`str`, optional
+            Scanned motor, by default None (any)
+        command : :obj:`str`, optional
+            Text contained in the scan command, by default None (any)
+        since : :obj:`float`, optional
+            Scans started at or after this time (seconds since the epoch), by default None
+        until : :obj:`float`, optional
+            Scans started before this time (seconds since the epoch), by default None
+        limit : :obj:`int`, optional
+            Maximum number of scans returned, by default 100
+
+        Returns
+        -------
+        out : :obj:`list` of :obj:`dict`
+            Scans, with their ``motors`` and ``files`` lists
+        """
+        query = "SELECT scans.* FROM scans"
+        conditions = []
+        parameters = []
+
+        if motor:
+            query += " JOIN scan_motors ON scan_motors.scan_id = scans.id"
+            conditions.append("scan_motors.motor = ?")
+            parameters.append(motor)
+        if configuration:
+            conditions.append("scans.configuration = ?")
+            parameters.append(configuration)
+        if command:
+            conditions.append("instr(scans.command, ?) > 0")
+            parameters.append(command)
+        if since is not None:
+            conditions.append("scans.started >= ?")
+            parameters.append(since)
+        if until is not None:
+            conditions.append("scans.started < ?")
+            parameters.append(until)
+
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY scans.started DESC LIMIT ?"
+        parameters.append(limit)
+
+        with self._lock:
+            scans = [dict(row) for row in self._connection.execute(query, parameters)]
+            self._add_details(scans)
+
+        return scans
+
+    def scan(self, scan_id):
+        """
+        Returns a scan, with its ``motors``, ``files`` and ``statistics``, None if it doesn't exist.
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM scans WHERE id = ?", (scan_id,)).fetchone()
+            if row is None:
+                return None
+
+            scan = dict(row)
+            self._add_details([scan])
+            scan["statistics"] = {row["label"]: dict(row) for row in self._connection.execute(
+                "SELECT label, minimum, maximum, mean, std, x_at_maximum FROM scan_statistics WHERE scan_id = ?",
+                (scan_id,))}
+
+        return scan
+
+    def load(self, scan_id, write_cache=True):
+        """
+        Load the files of a scan with :py:func:`load_scan <jupy4syn.ScanFileCache.load_scan>`:
+        memory-mapped from their binary sidecars when they are up to date, parsed otherwise.
+
+        Parameters
+        ----------
+        scan_id : :obj:`int`
+            Scan id
+        write_cache : :obj:`bool`, optional
+            Write the sidecars of the parsed files, by default True
+
+        Returns
+        -------
+        out : :obj:`list` of :py:class:`ScanData <jupy4syn.ScanFileCache.ScanData>`
+            One for each repeat file that still exists, empty if the scan doesn't exist
+
+        Examples
+        --------
+        >>> scan = catalog.find(motor="mono", limit=1)[0]
+        >>> data = catalog.load(scan["id"])[0]
+        >>> data.column(data.column_index("I0"))
+        """
+        scan = self.scan(scan_id)
+        if scan is None:
+            return []
+
+        return [load_scan(path, write_cache) for path in scan["files"] if Path(path).exists()]
+
+    def _add_details(self, scans):
+        # Motors and files of the scans, in one query each. Called with the lock held.
+        if not scans:
+            return
+
+        by_id = {scan["id"]: scan for scan in scans}
+        for scan in scans:
+            scan["motors"] = []
+            scan["files"] = []
+
+        marks = ",".join("?" * len(by_id))
+        for row in self._connection.execute("SELECT scan_id, motor FROM scan_motors WHERE scan_id IN (" + marks +
+                                            ") ORDER BY scan_id, position", list(by_id)):
+            by_id[row[0]]["motors"].append(row[1])
+        for row in self._connection.execute("SELECT scan_id, path FROM scan_files WHERE scan_id IN (" + marks +
+                                            ") ORDER BY scan_id, repeat", list(by_id)):
+            by_id[row[0]]["files"].append(row[1])
+
+    def backfill(self, directory="./scanlogs"):
+        """
+        Import the scans of the ScanGUI text logs (``<directory>/YYYY-MM-DD-scanlog.txt``). Scans
+        already in the catalog are skipped, so it can be run again.
+
+        Returns
+        -------
+        out : :obj:`int`
+            Number of scans imported
+        """
+        imported = 0
+
+        for log_file in sorted(Path(directory).glob("*-scanlog.txt")):
+            with open(str(log_file), errors="replace") as f:
+                text = f.read()
+
+            # One transaction for each scanlog file
+            with self._lock, self._connection:
+                for match in _SCANLOG_BLOCK.finditer(text):
+                    started = calendar.timegm(time.strptime(match.group("time"), "%Y-%m-%d %H:%M:%S"))
+                    command = match.group("command")
+
+                    scan_id = self._insert_scan(command, match.group("configuration"), command_motors(command),
+                                                int(match.group("repeats")), [match.group("output")], started,
+                                                match.group("plot"), match.group("pyqt_plot"), None, "backfill")
+                    if scan_id is not None:
+                        imported += 1
+
+        return imported
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+# Catalogs shared by all widgets, one for each database file
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_scan_catalog(path="./scanlogs/catalog.sqlite3"):
+    """
+    Returns the :py:class:`ScanCatalog` of a database file, shared by all Jupy4Syn widgets.
+    """
+    key = str(Path(path).resolve())
+
+    with _catalogs_lock:
+        if key not in _catalogs:
+            _catalogs[key] = ScanCatalog(path)
+
+        return _catalogs[key]
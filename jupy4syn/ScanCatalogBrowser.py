@@ -0,0 +1,147 @@
+import html
+import time
+
+# Widgets
+import ipywidgets as widgets
+from IPython.display import display
+
+# Jupy4Syn
+from jupy4syn.Configuration import default_configuration
+from jupy4syn.ScanCatalog import get_scan_catalog
+from jupy4syn.utils import logprint
+
+
+# Period option -> seconds
+PERIODS = {
+    "Last day": 24 * 3600,
+    "Last week": 7 * 24 * 3600,
+    "Last month": 31 * 24 * 3600,
+    "Last year": 366 * 24 * 3600,
+    "All": None,
+}
+
+
+class ScanCatalogBrowser(widgets.Button):
+    def __init__(self, config=None, catalog=None, *args, **kwargs):
+        """
+        **Constructor**
+
+        Search the :py:class:`ScanCatalog <jupy4syn.ScanCatalog.ScanCatalog>` by configuration,
+        motor, command text and period, and show the scans found in a table.
+
+        Parameters
+        ----------
+        config : :py:class:`Configuration <jupy4syn.Configuration.Configuration>`, optional
+            Configuration object that contains Jupyter Notebook runtime information, by default None (shared default Configuration)
+        catalog : :py:class:`ScanCatalog <jupy4syn.ScanCatalog.ScanCatalog>`, optional
+            Catalog searched, by default None (``./scanlogs/catalog.sqlite3``)
+
+        Examples
+        --------
+        >>> browser = ScanCatalogBrowser()
+        >>> browser.display()
+        """
+        widgets.Button.__init__(self, *args, **kwargs)
+
+        # Config
+        if config is None:
+            config = default_configuration()
+
+        self.config = config
+        self.catalog = catalog
+
+        # class Button values for ScanCatalogBrowser
+        self.description = 'Search scans'
+        self.disabled = False
+        self.button_style = 'success'
+        self.tooltip = 'Click me'
+        self.icon = ''
+        self.layout = widgets.Layout(width='300px')
+
+        # Filters
+        self.text_configuration = widgets.Text(value='', placeholder='Configuration', description='')
+        self.text_motor = widgets.Text(value='', placeholder='Motor', description='')
+        self.text_command = widgets.Text(value='', placeholder='Command contains', description='')
+        self.select_period = widgets.Dropdown(options=list(PERIODS), value='Last week', description='')
+        self.int_limit = widgets.BoundedIntText(value=100, min=1, max=100000, description='Max. scans:',
+                                                style={'description_width': 'initial'})
+
+        # Results
+        self.label_results = widgets.Label("")
+        self.html_results = widgets.HTML("")
+
+        # Logging
+        self.output = widgets.Output()
+
+        # Set callback function for click event
+        self.on_click(self._search_button)
+
+        # Widgets display box
+        self.display_box = widgets.VBox([
+            widgets.HBox([self.text_configuration, self.text_motor, self.text_command]),
+            widgets.HBox([self.select_period, self.int_limit]),
+            widgets.HBox([self, self.label_results]),
+            self.html_results,
+            self.output
+        ])
+
+    def search(self):
+        """
+        Returns the scans matching the filters, see :py:meth:`ScanCatalog.find <jupy4syn.ScanCatalog.ScanCatalog.find>`.
+        """
+        if self.catalog is None:
+            self.catalog = get_scan_catalog()
+
+        period = PERIODS[self.select_period.value]
+
+        return self.catalog.find(configuration=self.text_configuration.value.strip() or None,
+                                 motor=self.text_motor.value.strip() or None,
+                                 command=self.text_command.value.strip() or None,
+                                 since=None if period is None else time.time() - period,
+                                 limit=self.int_limit.value)
+
+    @staticmethod
+    def _search_button(b):
+        with b.output:
+            try:
+                started = time.perf_counter()
+                scans = b.search()
+                elapsed = time.perf_counter() - started
+
+                b.label_results.value = "{} scans found in {:.1f} ms".format(len(scans), 1e3 * elapsed)
+                b.html_results.value = b.scans_table(scans)
+            except Exception as e:
+                # If any error occurs, log that but dont stop code exection
+                logprint("Error in searching scans", "[ERROR]", config=b.config)
+                logprint(str(e), "[ERROR]", config=b.config)
+
+    def scans_table(self, scans):
+        header = ["Started (UTC)", "Configuration", "Motors", "Repeats", "Points", "Duration", "Command", "Files"]
+
+        rows = []
+        for scan in scans:
+            duration = ""
+            if scan["finished"] is not None:
+                duration = "{:.0f} s".format(scan["finished"] - scan["started"])
+
+            points = "" if scan["points"] is None else str(scan["points"])
+            if scan["interrupted"]:
+                points += " (stopped)"
+
+            cells = [time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(scan["started"])),
+                     scan["configuration"] or "",
+                     " ".join(scan["motors"]),
+                     str(scan["repeats"]),
+                     points,
+                     duration,
+                     scan["command"],
+                     "<br>".join(html.escape(path) for path in scan["files"])]
+
+            rows.append("<tr>" + "".join("<td>" + (cell if i == len(cells) - 1 else html.escape(cell)) + "</td>"
+                                         for i, cell in enumerate(cells)) + "</tr>")
+
+        return ("<table><tr>" + "".join("<th>" + title + "</th>" for title in header) + "</tr>" +
+                "".join(rows) + "</table>")
+
+    def display(self):
+        display(self.display_box)
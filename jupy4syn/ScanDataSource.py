@@ -0,0 +1,207 @@
+# Auxiliar packages
+import numpy as np
+
+
+class ColumnStore():
+    def __init__(self, number_columns, capacity=1024):
+        """
+        **Constructor**
+
+        Preallocated, growable column store for scan data. Columns are kept
+        contiguous (column-major), so each column can be handed to a plot as a
+        view without copying.
+
+        Parameters
+        ----------
+        number_columns : :obj:`int`
+            Number of columns of the scan file
+        capacity : :obj:`int`, optional
+            Initial number of rows allocated, by default 1024
+        """
+        self.number_columns = number_columns
+        self.size = 0
+
+        self._data = np.empty((number_columns, max(1, capacity)), dtype=np.float64)
+
+    @property
+    def capacity(self):
+        return self._data.shape[1]
+
+    def append(self, rows):
+        """
+        Append rows to the store, doubling the allocated capacity when needed.
+
+        Parameters
+        ----------
+        rows : :obj:`numpy.ndarray`
+            2D array with shape (number of rows, number of columns)
+        """
+        number_rows = rows.shape[0]
+        if number_rows == 0:
+            return
+
+        needed = self.size + number_rows
+        if needed > self.capacity:
+            new_capacity = self.capacity
+            while new_capacity < needed:
+                new_capacity *= 2
+
+            data = np.empty((self.number_columns, new_capacity), dtype=np.float64)
+            data[:, :self.size] = self._data[:, :self.size]
+            self._data = data
+
+        self._data[:, self.size:needed] = rows.T
+        self.size = needed
+
+    def column(self, index, start=0):
+        """
+        Returns a view of a column, from row ``start`` to the last row stored.
+        """
+        return self._data[index, start:self.size]
+
+    def clear(self):
+        self.size = 0
+
+
+class ScanDataSource():
+    def __init__(self):
+        """
+        **Constructor**
+
+        Interface of the scan data consumed by the plotting widgets, whatever the data comes from.
+        A source has column labels, a number of points, the number of points expected when the scan
+        ends and column arrays returned as views (no copy). :py:meth:`poll` takes the new points of
+        a scan being measured and calls the functions registered with :py:meth:`subscribe`.
+
+        Backends:
+
+        - :py:class:`ScanFileTail <jupy4syn.ScanFileTail.ScanFileTail>`: scan file being written
+        - :py:class:`InMemoryScanSource`: py4syn scan data of the running process
+        - :py:class:`ScanData <jupy4syn.ScanFileCache.ScanData>`: complete scan file, memory-mapped from its binary cache
+        """
+        self.labels = []
+        self.number_reads = None
+
+        self._subscribers = []
+
+    @property
+    def points(self):
+        raise NotImplementedError
+
+    @property
+    def number_columns(self):
+        raise NotImplementedError
+
+    @property
+    def expected_points(self):
+        """
+        Number of points of the complete scan, None if unknown.
+        """
+        return self.number_reads
+
+    def column(self, index, start=0):
+        """
+        Returns a view of a column data, from point ``start`` to the last point.
+        """
+        raise NotImplementedError
+
+    def column_index(self, label):
+        return self.labels.index(label)
+
+    def poll(self):
+        """
+        Take the points measured since the last call and notify the subscribers.
+
+        Returns
+        -------
+        out : :obj:`int`
+            Number of new points
+        """
+        return 0
+
+    def subscribe(self, callback):
+        """
+        Call ``callback(source, start)`` when :py:meth:`poll` takes new points, ``start`` being the
+        index of the first new point (0 when the data was restarted).
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def close(self):
+        pass
+
+    def _notify(self, start):
+        for callback in list(self._subscribers):
+            callback(self, start)
+
+
+class InMemoryScanSource(ScanDataSource):
+    def __init__(self, get_data, labels, expected_points=None):
+        """
+        **Constructor**
+
+        Scan data of a scan running in this process (py4syn ``scan.getScanData()``, a dictionary
+        of lists). Only the points appended to the lists since the last :py:meth:`poll` are copied,
+        to a :py:class:`ColumnStore` whose columns are then returned as views.
+
+        Parameters
+        ----------
+        get_data : :obj:`callable`
+            Function returning the scan data dictionary (label -> list of values)
+        labels : :obj:`list` of :obj:`str`
+            Labels of the columns taken from the dictionary, in order (e.g. x label then counters)
+        expected_points : :obj:`int`, optional
+            Number of points of the complete scan, by default None (unknown)
+
+        Examples
+        --------
+        >>> source = InMemoryScanSource(scanModule.getScanData, ["points", "I0"], expected_points=100)
+        >>> source.poll()
+        1
+        >>> source.column(source.column_index("I0"))
+        array([0.13])
+        """
+        ScanDataSource.__init__(self)
+
+        self.get_data = get_data
+        self.labels = list(labels)
+        self.number_reads = expected_points
+
+        self.store = ColumnStore(len(self.labels))
+
+    @property
+    def points(self):
+        return self.store.size
+
+    @property
+    def number_columns(self):
+        return self.store.number_columns
+
+    def column(self, index, start=0):
+        return self.store.column(index, start)
+
+    def poll(self):
+        data = self.get_data()
+        lists = [data.get(label, ()) for label in self.labels]
+
+        # Columns may be filled one after the other, only complete points are taken
+        size = min(len(values) for values in lists)
+
+        start = self.store.size
+        if size < start:
+            # A new scan cleared the data
+            self.store.clear()
+            start = 0
+
+        if size == start:
+            return 0
+
+        rows = np.array([values[start:size] for values in lists], dtype=np.float64).T
+        self.store.append(rows)
+
+        self._notify(start)
+
+        return size - start
@@ -0,0 +1,235 @@
+import json
+import os
+
+# Auxiliar packages
+import numpy as np
+
+# Jupy4Syn
+from jupy4syn.ScanDataSource import ScanDataSource
+from jupy4syn.ScanFileTail import ScanFileTail
+
+
+# Sidecar format version, bump it when the layout changes so old sidecars are rebuilt
+CACHE_VERSION = 1
+
+# Directory of the sidecars, next to the scan files. Kept out of the scan files directory so
+# the sidecars don't match the scan file names (<prefix>_NNNN) nor the watches on their prefix
+CACHE_DIRECTORY = ".jupy4syn-cache"
+
+
+def sidecar_paths(file_name):
+    """
+    Returns the binary (``.npy``) and metadata (``.json``) sidecar paths of a scan file, in the
+    ``.jupy4syn-cache`` directory next to it.
+    """
+    directory, name = os.path.split(file_name)
+    path = os.path.join(directory, CACHE_DIRECTORY, name)
+
+    return path + ".npy", path + ".json"
+
+
+class ScanData(ScanDataSource):
+    def __init__(self, file_name, data, labels, number_reads, cached):
+        """
+        **Constructor**
+
+        Columns of a complete scan file, loaded by :py:func:`load_scan`. ``data`` has shape
+        (number of columns, number of points), so each column is a contiguous view (of the
+        memory-mapped sidecar when ``cached`` is True). This is the complete scan backend of
+        :py:class:`ScanDataSource <jupy4syn.ScanDataSource.ScanDataSource>`, it has no new points to poll.
+
+        Parameters
+        ----------
+        file_name : :obj:`str`
+            Path to the scan file
+        data : :obj:`numpy.ndarray`
+            Scan values, one row per column of the scan file
+        labels : :obj:`list` of :obj:`str`
+            Column labels (``#L`` header)
+        number_reads : :obj:`int`
+            Number of points expected (``#M`` header), None if unknown
+        cached : :obj:`bool`
+            If the data was loaded from the binary sidecar
+        """
+        ScanDataSource.__init__(self)
+
+        self.file_name = file_name
+        self.data = data
+        self.labels = labels
+        self.number_reads = number_reads
+        self.cached = cached
+
+    @property
+    def points(self):
+        return self.data.shape[1]
+
+    @property
+    def number_columns(self):
+        return self.data.shape[0]
+
+    def column(self, index, start=0):
+        """
+        Returns a view of a column data, from point ``start`` to the last point.
+        """
+        return self.data[index, start:]
+
+
+def _source_key(file_name):
+    stat = os.stat(file_name)
+
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _read_sidecar(file_name, key):
+    npy_path, json_path = sidecar_paths(file_name)
+
+    try:
+        with open(json_path) as json_file:
+            metadata = json.load(json_file)
+    except (OSError, ValueError):
+        return None
+
+    if metadata.get("version") != CACHE_VERSION or metadata.get("source") != key:
+        return None
+
+    try:
+        data = np.load(npy_path, mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+
+    if data.ndim != 2 or data.shape[1] != metadata.get("points"):
+        return None
+
+    return ScanData(file_name, data, metadata["labels"], metadata["number_reads"], True)
+
+
+def _write_atomic(path, write):
+    # Written to a temporary file and renamed, readers never see a partial sidecar
+    temporary = path + ".tmp" + str(os.getpid())
+    try:
+        with open(temporary, 'wb') as sidecar:
+            write(sidecar)
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def write_sidecar(file_name, data, labels, number_reads, key=None):
+    """
+    Write the binary sidecar of a scan file. The ``.json`` metadata is written after the
+    ``.npy`` data and records the scan file size and mtime, so a sidecar is only used while
+    the scan file is unchanged.
+
+    Parameters
+    ----------
+    file_name : :obj:`str`
+        Path to the scan file
+    data : :obj:`numpy.ndarray`
+        Scan values, shape (number of columns, number of points)
+    labels : :obj:`list` of :obj:`str`
+        Column labels
+    number_reads : :obj:`int`
+        Number of points expected, None if unknown
+    key : :obj:`dict`, optional
+        Scan file size and mtime when ``data`` was read, by default None (current values)
+    """
+    if key is None:
+        key = _source_key(file_name)
+
+    npy_path, json_path = sidecar_paths(file_name)
+    data = np.ascontiguousarray(data, dtype=np.float64)
+
+    os.makedirs(os.path.dirname(npy_path), exist_ok=True)
+
+    metadata = {
+        "version": CACHE_VERSION,
+        "source": key,
+        "points": data.shape[1],
+        "labels": list(labels),
+        "number_reads": number_reads,
+    }
+
+    _write_atomic(npy_path, lambda sidecar: np.save(sidecar, data))
+    _write_atomic(json_path, lambda sidecar: sidecar.write(json.dumps(metadata).encode()))
+
+
+def cache_tail(tail):
+    """
+    Write the sidecar of a completed scan from the :py:class:`ScanFileTail <jupy4syn.ScanFileTail.ScanFileTail>`
+    that followed it, without parsing the file again (only a last line without a new line is
+    parsed). Nothing is written if the tail didn't read the whole file.
+
+    Returns
+    -------
+    out : :obj:`bool`
+        If the sidecar was written
+    """
+    try:
+        key = _source_key(tail.file_name)
+    except OSError:
+        return False
+
+    tail.poll(final=True)
+
+    if tail.store is None or tail.offset != key["size"]:
+        return False
+
+    write_sidecar(tail.file_name, tail.store._data[:, :tail.store.size], tail.labels, tail.number_reads, key)
+
+    return True
+
+
+def load_scan(file_name, write_cache=True):
+    """
+    Load a complete scan file. If its binary sidecar is up to date (same scan file size and
+    mtime), the columns are memory-mapped from it (``np.load(mmap_mode='r')``, no parsing and
+    no copy). Otherwise the text file is parsed and, if ``write_cache`` is True, the sidecar is
+    written for the next loads.
+
+    Parameters
+    ----------
+    file_name : :obj:`str`
+        Path to the scan file
+    write_cache : :obj:`bool`, optional
+        Write the sidecar when the text file is parsed, by default True
+
+    Returns
+    -------
+    out : :py:class:`ScanData`
+        Scan columns, labels and number of points expected
+
+    Examples
+    --------
+    >>> scan = load_scan("scans/test_0001")
+    >>> scan.cached
+    True
+    >>> y = scan.column(scan.labels.index("I0"))
+    """
+    key = _source_key(file_name)
+
+    scan = _read_sidecar(file_name, key)
+    if scan is not None:
+        return scan
+
+    tail = ScanFileTail(file_name)
+    try:
+        tail.poll(final=True)
+    finally:
+        tail.close()
+
+    if tail.store is None:
+        data = np.empty((len(tail.labels), 0))
+    else:
+        data = tail.store._data[:, :tail.store.size]
+
+    # Only cached if the file didn't change while it was parsed
+    if write_cache and _source_key(file_name) == key:
+        try:
+            write_sidecar(file_name, data, tail.labels, tail.number_reads, key)
+        except OSError:
+            # Read-only scan directory, the text file is parsed every time
+            pass
+
+    return ScanData(file_name, data, tail.labels, tail.number_reads, False)
@@ -0,0 +1,178 @@
+import os
+
+# Auxiliar packages
+import numpy as np
+
+# Jupy4Syn
+from jupy4syn.ScanDataSource import ColumnStore, ScanDataSource
+
+
+class ScanFileTail(ScanDataSource):
+    def __init__(self, file_name):
+        """
+        **Constructor**
+
+        Incremental reader of a scan file that is still being written by the scan writer.
+        Each call to :py:meth:`poll` parses only the bytes appended since the previous call,
+        keeping the byte offset and the last incomplete line between calls.
+        The ``#M``/``#L`` header is parsed only once per file.
+        This is the live file backend of :py:class:`ScanDataSource <jupy4syn.ScanDataSource.ScanDataSource>`.
+
+        Parameters
+        ----------
+        file_name : :obj:`str`
+            Path to the scan file
+
+        Examples
+        --------
+        >>> tail = ScanFileTail("scans/test_0001")
+        >>> new_points = tail.poll()
+        >>> y = tail.column(tail.labels.index("I0"))
+        """
+        ScanDataSource.__init__(self)
+
+        self.file_name = file_name
+
+        # Header information
+        self.header_parsed = False
+
+        # Reading state
+        self.offset = 0
+        self._partial = b''
+        self._file = None
+
+        self.store = None
+
+    @property
+    def points(self):
+        return self.store.size if self.store is not None else 0
+
+    @property
+    def number_columns(self):
+        return self.store.number_columns if self.store is not None else len(self.labels)
+
+    def column(self, index, start=0):
+        """
+        Returns a view of a column data, from point ``start`` to the last point read.
+        """
+        if self.store is None:
+            return np.empty(0, dtype=np.float64)
+
+        return self.store.column(index, start)
+
+    def poll(self, final=False):
+        """
+        Read and parse the rows appended to the file since the last call.
+
+        Parameters
+        ----------
+        final : :obj:`bool`, optional
+            The file is complete, a last line without a new line is parsed too, by default False
+
+        Returns
+        -------
+        out : :obj:`int`
+            Number of new points parsed
+        """
+        chunk = self._read_chunk()
+        if not chunk and not (final and self._partial):
+            return 0
+
+        lines = (self._partial + chunk).split(b'\n')
+        # Last item is an incomplete line (or an empty string if chunk ends with a new line)
+        self._partial = b'' if final else lines.pop()
+
+        rows = []
+        for line in lines:
+            if not line.strip():
+                continue
+
+            if line[0:1] == b'#':
+                if not self.header_parsed:
+                    self._parse_header_line(line)
+                continue
+
+            # First line with data ends the header
+            self.header_parsed = True
+            rows.append(line)
+
+        if not rows:
+            return 0
+
+        parsed = self._parse_rows(rows)
+        start = self.points
+        self.store.append(parsed)
+
+        if parsed.shape[0]:
+            self._notify(start)
+
+        return parsed.shape[0]
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _read_chunk(self):
+        if self._file is None:
+            try:
+                self._file = open(self.file_name, 'rb')
+            except OSError:
+                return b''
+
+        # File was truncated or rewritten, start reading it again
+        if os.fstat(self._file.fileno()).st_size < self.offset:
+            self._reset()
+
+        self._file.seek(self.offset)
+        chunk = self._file.read()
+        self.offset += len(chunk)
+
+        return chunk
+
+    def _reset(self):
+        self.offset = 0
+        self._partial = b''
+        self.labels = []
+        self.number_reads = None
+        self.header_parsed = False
+        self.store = None
+
+    def _parse_header_line(self, line):
+        line = line.decode(errors='replace')
+
+        if line[0:2] == "#M":
+            # Malformed #M line, the number of points stays unknown
+            try:
+                self.number_reads = int(line.split()[1])
+            except (IndexError, ValueError):
+                pass
+        elif line[0:2] == "#L":
+            self.labels = line.split()[1:]
+
+    def _parse_rows(self, rows):
+        if self.store is None:
+            self.store = ColumnStore(len(rows[0].split()))
+
+        number_columns = self.store.number_columns
+        fields = [row.split() for row in rows]
+
+        try:
+            # Every row must have number_columns values, rows with a value missing and with an extra
+            # one would otherwise shift the values of the rows between them to the wrong columns
+            if any(len(row) != number_columns for row in fields):
+                raise ValueError("Wrong number of columns")
+
+            return np.array(fields, dtype=np.float64).reshape(-1, number_columns)
+        except ValueError:
+            # Malformed rows (e.g. wrong number of columns), parse row by row and skip them
+            parsed = []
+            for row in fields:
+                if len(row) != number_columns:
+                    continue
+                try:
+                    parsed.append([float(field) for field in row])
+                except ValueError:
+                    continue
+
+            return np.array(parsed, dtype=np.float64).reshape(-1, number_columns)
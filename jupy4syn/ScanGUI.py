@@ -1,3 +1,4 @@
+import calendar
 import os
 from pathlib import Path
 import subprocess
@@ -6,7 +7,7 @@ import time
 
 # Auxiliar packages
 import json
-import pandas as pd
+import numpy as np
 
 # Widgets
 import ipywidgets as widgets
@@ -17,16 +18,28 @@ import plotly.graph_objs as go
 from plotly import tools
 
 # Jupy4Syn
-from .Configuration import Configuration
+from .assets import image, spinner_html
+from .Configuration import default_configuration
+from .FileWatcher import FileWatcher, wait_for_data
+from .PlotUpdater import PlotUpdater
+from .RepeatAggregator import RepeatAggregator
+from .ScanCatalog import get_scan_catalog, summary_statistics
+from .ScanFileCache import cache_tail
+from .ScanFileTail import ScanFileTail
+from .ScanNameResolver import get_scan_names, scan_file_index
 from .ScanParser import ScanParser
+from .ScanRingBuffer import ScanRingSource
 from .utils import logprint
 
 class ScanGUI(widgets.Button):
     
-    def __init__(self, config=Configuration(), *args, **kwargs):
+    def __init__(self, config=None, *args, **kwargs):
         widgets.Button.__init__(self, *args, **kwargs)
         
         # Config
+        if config is None:
+            config = default_configuration()
+
         self.config = config     
         self.plots_list = config.plots_list
         
@@ -68,10 +81,13 @@ class ScanGUI(widgets.Button):
         
         # Threading
         self.monitor = False
+        self.watcher = None
         self.thread = threading.Thread()
-        self.refresh_thread = threading.Thread()
         self.interrupted_scan = False
         self.fig_thread = threading.Thread()
+        self.catalog_id = None
+        self.aggregator = None
+        self.bands = False
         
         # Set callback function for click event
         self.on_click(self._start_button)
@@ -118,6 +134,7 @@ class ScanGUI(widgets.Button):
         
         self.fig = go.FigureWidget()
         self.fig_box = widgets.Box()
+        self.plot_updater = PlotUpdater(self.fig, max_fps=config.plot_max_fps, max_points=config.plot_max_points)
         self.refresh_icon_box = widgets.Box(layout=widgets.Layout(width='40px', height='40px'))
         
         self.export = False
@@ -153,9 +170,11 @@ class ScanGUI(widgets.Button):
                     b.interrupted_scan = True
                     b.started_scan = False
 
+                    if b.watcher is not None:
+                        b.watcher.wake()
+
                     b.thread.join()
                     b.fig_thread.join()
-                    b.refresh_thread.join()
                     
                     b.clear_threads = False
                     time.sleep(1.5)
@@ -216,17 +235,27 @@ class ScanGUI(widgets.Button):
     
     def monitor_save_file(self):
         with self.output:
+            # Wake up on save and stop files events (inotify), or poll them if inotify isn't available
+            self.watcher = FileWatcher(poll_interval=0.5)
+            self.watcher.add_file(self.scan_path)
+            self.watcher.add_file(self.stop_path)
+
             while self.monitor:
                 if self.scan_path.is_file():
-                    # Started scan
-                    self.started_scan = True
-                    
                     with open(str(self.scan_path)) as file:
                         try: 
                              save_file = json.load(file)
                         except ValueError: 
-                             pass
-                    
+                             # scan-gui is still writing the file, wait for it to be closed
+                             self.watcher.wait(timeout=self.watcher.poll_interval)
+                             continue
+
+                    # Started scan
+                    self.started_scan = True
+
+                    # The scan files are created after the scan is requested
+                    requested = self.scan_path.stat().st_mtime
+
                     os.remove(str(self.scan_path))
                     
                     try:
@@ -240,11 +269,8 @@ class ScanGUI(widgets.Button):
                     self.synchronous = save_file["checkSync"]["value"]  
                     self.number_repeats = save_file["spinRepeat"]["value"]
 
-                    # Waits for file creation by scan-gui
-                    time.sleep(1.0)
-
                     # self.scan_names = self.get_scan_name_command(command, parser, self.number_repeats)
-                    self.scan_names = self.get_scan_name_js(save_file, self.number_repeats)
+                    self.scan_names = self.get_scan_name_js(save_file, self.number_repeats, requested)
                     config_name = self.get_config_name(command, parser)
                     
                     self.plot_name = self.scan_names[-1] + "-jupy.png"
@@ -271,12 +297,14 @@ class ScanGUI(widgets.Button):
                     # Call live graph
                     self.list_motors = save_file["listMotors"]["value"]
 
+                    # Same start time as the scanlog, so a backfill of the scanlogs skips this scan
+                    self.catalog_id = self.catalog_scan(command, config_name, calendar.timegm(ts))
+
                     self.fig_thread = threading.Thread(target=self.thread_plot)
                     self.fig_thread.start()
                     
                     # Scan status icon
-                    self.refresh_thread = threading.Thread(target=self.thread_refresh_icon)
-                    self.refresh_thread.start()  
+                    self.show_status_icon("spinner")
                 elif self.stop_path.is_file():
                     self.started_scan = False
                     self.interrupted_scan = True
@@ -289,13 +317,16 @@ class ScanGUI(widgets.Button):
                 if self.clear_threads:
                     try:
                         self.fig_thread.join()
-                        self.refresh_thread.join()
                     except:
                         pass
                     
                     self.clear_threads = False
                 
-                time.sleep(0.5)
+                # Sleep until save or stop file is written, or until the watcher is waken up
+                self.watcher.wait()
+
+            self.watcher.close()
+            self.watcher = None
 
     def get_filename_js(self, js_file):
         file_name = js_file["editFilename"]["value"]
@@ -320,51 +351,50 @@ class ScanGUI(widgets.Button):
 
         return file_name
 
-    def get_scan_name_command(self, command, parser, number_repeats):
-        # Waits for file to be written by scan writter
-        time.sleep(1.0)
-
+    def get_scan_name_command(self, command, parser, number_repeats, requested=None):
         fileName = self.get_filename_command(command, parser)
 
-        scan_names = []
+        # Waits for file to be written by scan writter
+        self.wait_scan_file(fileName, requested)
 
-        leadingZeros = 4
-        newName = ""
-        cont = 0
-        while(True):
-            cont += 1
-            newName = fileName + "_" + str(cont).zfill(leadingZeros)
-            if(os.path.isfile(newName)):
-                continue
-            else:
-                for i in range(number_repeats):
-                    scan_names.append(fileName + "_" + str(cont - 1 + i).zfill(leadingZeros))
-                break
-                
-        return scan_names
+        return get_scan_names(fileName, number_repeats)
     
-    def get_scan_name_js(self, js_file, number_repeats):
+    def get_scan_name_js(self, js_file, number_repeats, requested=None):
+        fileName = self.get_filename_js(js_file)
+
         # Waits for file to be written by scan writter
-        time.sleep(1.0)
+        self.wait_scan_file(fileName, requested)
 
-        fileName = self.get_filename_js(js_file)
+        return get_scan_names(fileName, number_repeats)
 
-        scan_names = []
+    def wait_scan_file(self, fileName, requested=None, timeout=1.0):
+        # Returns as soon as a new numbered scan file (fileName_NNNN) is created, or after timeout
+        watcher = FileWatcher(poll_interval=0.1)
+        watcher.add_prefix(fileName + "_")
 
-        leadingZeros = 4
-        newName = ""
-        cont = 0
-        while(True):
-            cont += 1
-            newName = fileName + "_" + str(cont).zfill(leadingZeros)
-            if(os.path.isfile(newName)):
-                continue
-            else:
-                for i in range(number_repeats):
-                    scan_names.append(fileName + "_" + str(cont - 1 + i).zfill(leadingZeros))
+        # The file may have been created before the watcher was attached: the last scan file was
+        # modified after the scan was requested (time of the scan-gui save file)
+        if requested is not None:
+            last = get_scan_names(fileName, 1)[0]
+            try:
+                if os.stat(last).st_mtime >= requested:
+                    watcher.close()
+                    return
+            except OSError:
+                pass
+
+        deadline = time.monotonic() + timeout
+        remaining = timeout
+        while remaining > 0:
+            events = watcher.wait(timeout=remaining)
+
+            # Files written next to the scan files (e.g. "_0012.png" plots, "_mean") don't count
+            if any(event.created and scan_file_index(fileName, event.path) is not None for event in events):
                 break
-                
-        return scan_names
+
+            remaining = deadline - time.monotonic()
+
+        watcher.close()
 
     def get_config_name(self, command, parser):
         args = parser.parse_known_args(command.split(' '))
@@ -378,85 +408,100 @@ class ScanGUI(widgets.Button):
         
         return parser.parser
     
-    def update_pd(self, default_names, label):
-        dfs = []
-        number_non_empty = len(default_names)
+    def scan_sources(self):
+        # Shared memory rings published by the scan writer if enabled and found, the scan files otherwise.
+        # Returns the sources, one for each repeat, and the polling interval
+        if self.config.scan_shared_memory:
+            rings = [ScanRingSource(name) for name in self.scan_names]
 
-        for default_name in default_names:
-            try:
-                dfs.append(pd.read_csv(default_name, sep=' ', comment='#', header=None))
-            except:
-                dfs.append(pd.DataFrame())
-                number_non_empty -= 1
-
-        if number_non_empty == 0:
-            return dfs, label
-
-        filtered_label = label
-        if not label:
-            labels = []
-            with open(default_names[0]) as file:
-                for _, line in enumerate(file):
-                    if line[0:2] == "#M":
-                        self.number_reads = int(line.split(' ')[1])
-                    elif line[0:2] == "#L":
-                        labels = line.split(' ')[1:]
-                    elif line[0] != "#":
-                        # First linde with data
-                        break
-
-            labels = list(filter(lambda x: x != '', labels))
-
-            for item in labels:
-                filtered_label.append(item.rstrip('\n'))
-
-            label = filtered_label
-
-        for df in dfs:
-            if not df.empty:
-                df.columns = pd.Index(filtered_label, dtype='object')
-        
-        return dfs, label
+            # The writer creates the ring before the scan file, which already exists here
+            wait = wait_for_data(rings[0].attach, timeout=2.0, should_continue=lambda: self.started_scan)
+            if wait.ready:
+                return rings, 0.05
+
+            logprint("No shared memory ring for " + self.scan_names[0] + ", reading the scan files", "[WARNING]",
+                     config=self.config)
+
+        return [ScanFileTail(name) for name in self.scan_names], 1.0
+
+    def scan_finished(self, source):
+        if isinstance(source, ScanRingSource) and source.finished:
+            return True
+
+        return self.number_reads is not None and source.points >= self.number_reads
 
     def thread_plot(self):
-        dfs = []
-        dfs.append(pd.DataFrame())
-        while dfs[0].empty:
-            label = []
-            dfs, label = self.update_pd(self.scan_names, label)
-        
+        # Incremental readers, one for each repeat
+        tails, interval = self.scan_sources()
+
+        # Wait the header and the first point, unless the scan is stopped
+        wait = wait_for_data(lambda: tails[0].poll() > 0 or tails[0].points > 0, tails[0].file_name,
+                             should_continue=lambda: self.started_scan, max_delay=interval)
+        logprint("Waited {:.3f} s for the first point of {}".format(wait.waited, self.scan_names[0]), config=self.config)
+
+        self.number_reads = tails[0].expected_points
         number_motors = len(self.list_motors)
 
-        if self.select_plot_option.value == "Plot after ends with Plotly" or self.select_plot_option.value == "Live Plot":
-            self.create_figure(len(dfs[0].columns) - number_motors)
+        plotly_plot = wait.ready and (self.select_plot_option.value == "Plot after ends with Plotly" or self.select_plot_option.value == "Live Plot")
+
+        # Mean and standard deviation across the repeats, updated when the tails read new points
+        self.aggregator = None
+        if wait.ready and len(tails) > 1:
+            aggregator = RepeatAggregator(tails[0].number_columns, capacity=self.number_reads or 1024)
+            for repeat, tail in enumerate(tails):
+                tail.subscribe(lambda source, start, repeat=repeat: aggregator.update(repeat, source))
+                aggregator.update(repeat, tail)
+
+            self.aggregator = aggregator
+
+        if plotly_plot:
+            self.create_figure(tails[0].number_columns - number_motors, bands=self.aggregator is not None)
             self.clear_image_file()
         
-        while dfs[-1].shape[0] < self.number_reads and self.started_scan == True:
-            dfs, label = self.update_pd(self.scan_names, label)
-            if self.select_plot_option.value == "Live Plot":
-                for i in range(len(dfs)):
-                    if dfs[i].empty:
-                        continue
+        while wait.ready and not self.scan_finished(tails[-1]) and self.started_scan == True:
+            for tail in tails:
+                tail.poll()
 
-                    for j in range(len(dfs[i].columns) - number_motors): 
-                        self.fig['data'][i + j*len(dfs)]['x'] = dfs[i].index.values
-                        self.fig['data'][i + j*len(dfs)]['y'] = dfs[i][dfs[i].columns[number_motors + j]].values               
+            if self.select_plot_option.value == "Live Plot":
+                self.plot_tails(tails, number_motors)
 
-            time.sleep(1)
+            time.sleep(interval)
         
         # Finished scan
         self.started_scan = False
         self.clear_threads = True
+
+        # Ended scan, change the scan status icon
+        self.show_status_icon("close" if self.interrupted_scan else "tick")
+
+        if self.watcher is not None:
+            self.watcher.wake()
         
         # update last scan value
-        if self.select_plot_option.value == "Plot after ends with Plotly" or self.select_plot_option.value == "Live Plot":
-            for i in range(len(dfs)):
-                    if dfs[i].empty:
-                        continue
-
-                    for j in range(len(dfs[i].columns) - number_motors): 
-                        self.fig['data'][i + j*len(dfs)]['x'] = dfs[i].index.values
-                        self.fig['data'][i + j*len(dfs)]['y'] = dfs[i][dfs[i].columns[number_motors + j]].values
+        for tail in tails:
+            tail.poll()
+
+        lost = sum(tail.lost for tail in tails if isinstance(tail, ScanRingSource))
+        if lost:
+            logprint(str(lost) + " points overwritten in the shared memory ring before being plotted, they are in the scan files",
+                     "[WARNING]", config=self.config)
+
+        if plotly_plot:
+            self.plot_tails(tails, number_motors, force=True)
+
+            self.log_plot_stats()
+
+        # Binary sidecars of the completed scan files, for fast reloads
+        if self.config.scan_cache:
+            self.cache_tails(tails)
+
+        self.catalog_finish(tails, number_motors)
+
+        if self.aggregator is not None:
+            self.write_aggregate(tails[0].labels, number_motors)
+
+        for tail in tails:
+            tail.close()
         
         # Plot scan-gui pyqt graph
         if self.select_plot_option.value == 'Plot after ends with PyQt' and self.interrupted_scan == False:
@@ -464,9 +509,84 @@ class ScanGUI(widgets.Button):
             time.sleep(3.0)
 
             self.load_image_file(self.scan_names[-1] + ".png")
+
+    def catalog_scan(self, command, config_name, started):
+        try:
+            return get_scan_catalog().add_scan(command, config_name, self.list_motors, self.number_repeats,
+                                               self.scan_names, started, self.plot_name,
+                                               self.scan_names[-1] + ".png")
+        except Exception as e:
+            logprint("Error in adding the scan to the scan catalog", "[ERROR]", config=self.config)
+            logprint(str(e), "[ERROR]", config=self.config)
+
+    def catalog_finish(self, tails, number_motors):
+        if self.catalog_id is None:
+            return
+
+        try:
+            get_scan_catalog().finish_scan(self.catalog_id, sum(tail.points for tail in tails), self.interrupted_scan,
+                                           summary_statistics(tails[-1], number_motors))
+        except Exception as e:
+            logprint("Error in updating the scan catalog", "[ERROR]", config=self.config)
+            logprint(str(e), "[ERROR]", config=self.config)
+
+    def cache_tails(self, tails):
+        for tail in tails:
+            # Shared memory rings may miss points and precede the scan file flush,
+            # their sidecars are written by load_scan from the scan files
+            if not isinstance(tail, ScanFileTail):
+                continue
+
+            try:
+                cache_tail(tail)
+            except Exception as e:
+                logprint("Error in writing the binary cache of " + tail.file_name, "[ERROR]", config=self.config)
+                logprint(str(e), "[ERROR]", config=self.config)
+
+    def write_aggregate(self, labels, number_motors):
+        file_name = self.scan_names[-1] + "_mean"
+
+        try:
+            self.aggregator.write(file_name, labels, number_motors)
+            logprint("Mean of " + str(len(self.scan_names)) + " repeats saved in '" + file_name + "'", config=self.config)
+        except Exception as e:
+            logprint("Error in writing the mean of the repeats", "[ERROR]", config=self.config)
+            logprint(str(e), "[ERROR]", config=self.config)
+
+    def plot_tails(self, tails, number_motors, force=False):
+        for i, tail in enumerate(tails):
+            if tail.points == 0:
+                continue
+
+            x = np.arange(tail.points)
+            for j in range(tail.number_columns - number_motors):
+                self.plot_updater.update(i + j*len(tails), x, tail.column(number_motors + j))
+
+        # Mean ± σ bands, after the repeats traces
+        if self.bands and self.aggregator.size:
+            x = np.arange(self.aggregator.size)
+            mean = self.aggregator.mean
+            std = self.aggregator.std
+            first_band = len(self.fig.data) - 3*len(self.traces)
+
+            for j in range(len(self.traces)):
+                column = number_motors + j
+                self.plot_updater.update(first_band + 3*j, x, mean[column] + std[column])
+                self.plot_updater.update(first_band + 3*j + 1, x, mean[column] - std[column])
+                self.plot_updater.update(first_band + 3*j + 2, x, mean[column])
+
+        # Changes are sent in a single message, limited to config.plot_max_fps messages per second
+        self.plot_updater.flush(force=force)
             
-    def create_figure(self, number_traces):
+    def log_plot_stats(self):
+        stats = self.plot_updater.stats()
+        logprint("Scan plot updates: " + str(stats["frames_sent"]) + " frames, " +
+                 str(stats["bytes_sent"]) + " bytes sent, " +
+                 str(stats["updates_dropped"]) + " updates dropped", config=self.config)
+
+    def create_figure(self, number_traces, bands=False):
         self.traces = []
+        self.bands = bands
         
         self.fig = go.FigureWidget(tools.make_subplots(rows=number_traces, cols=1, print_grid=False))
         
@@ -482,56 +602,40 @@ class ScanGUI(widgets.Button):
                 self.traces[i].append(trace)
                 self.fig.append_trace(trace, i + 1, 1) # using i + 1 because plot index starts at 1
 
+        # Mean of the repeats with a ± σ band (the lower bound is filled up to the upper bound)
+        if bands:
+            for i in range(number_traces):
+                self.fig.append_trace(go.Scatter(x=[], y=[], mode='lines', line=dict(width=0),
+                                                 showlegend=False, hoverinfo='skip'), i + 1, 1)
+                self.fig.append_trace(go.Scatter(x=[], y=[], mode='lines', line=dict(width=0),
+                                                 fill='tonexty', fillcolor='rgba(0, 0, 0, 0.2)',
+                                                 name='line' + str(i+1) + ' ± σ'), i + 1, 1)
+                self.fig.append_trace(go.Scatter(x=[], y=[], mode='lines', line=dict(color='black'),
+                                                 name='line' + str(i+1) + ' mean'), i + 1, 1)
+
         self.fig['layout'].update(title='Scan', plot_bgcolor='rgb(230, 230, 230)')
         self.fig_box.children = (self.fig,)
+
+        self.plot_updater = PlotUpdater(self.fig, max_fps=self.config.plot_max_fps, max_points=self.config.plot_max_points)
         
-    def thread_refresh_icon(self):
+    def show_status_icon(self, status):
+        # "spinner" while scanning (animated by the browser), "tick" when finished and "close" when interrupted
         self.refresh_icon_box.layout = widgets.Layout(width='40px', height='40px')
+
+        if status == "spinner":
+            icon = widgets.HTML(value=spinner_html(35))
+        else:
+            icon = widgets.Image(
+                value=image(status),
+                format='png',
+                width=35,
+                height=35,
+            )
         
-        file = open("../files/img/refresh_00.png", "rb")
-        image = file.read()
-        img_w = widgets.Image(
-            value=image,
-            format='png',
-            width=35,
-            height=35,
-        )
-        
-        self.refresh_icon_box.children = (img_w,)
-
-        i = 0
-        f = 0
-        while self.started_scan:
-            time.sleep(0.1)
-            i += 1
-            file = open("../files/img/refresh_" + str(i).zfill(2) + ".png", "rb")
-            image = file.read()
-            img_w .value = image
-            if i == 11:
-                i = -1
-            f += 1
-        
-        # Ended scan, blank the resfresh image
-        file = open("../files/img/tick.png", "rb")
-        image = file.read()
-        img_w .value = image
-
-        if self.interrupted_scan:
-            file = open("../files/img/close.png", "rb")
-            image = file.read()
-            img_w .value = image
+        self.refresh_icon_box.children = (icon,)
         
     def clean_refresh_icon(self):
-        file = open("../files/img/blank.png", "rb")
-        image = file.read()
-        img_w = widgets.Image(
-            value=image,
-            format='png',
-            width=35,
-            height=35,
-        )
-        
-        self.refresh_icon_box.children = (img_w,)
+        self.show_status_icon("blank")
         
     def export_image_thread(self):
         updating = True
@@ -0,0 +1,148 @@
+import os
+import threading
+
+
+class ScanNameResolver():
+    def __init__(self, leading_zeros=4):
+        """
+        **Constructor**
+
+        Finds the numbered scan files (``<file_name>_0001``, ``<file_name>_0002``, ...) written by
+        the scan writer. Directories are listed with a single :py:func:`os.scandir` pass instead
+        of one :py:func:`os.path.isfile` call per existing file. The index found is remembered for
+        each prefix and checked with a couple of :py:func:`os.path.exists` calls next time: the
+        files created since are skipped, and the directory is listed again only if the file before
+        it was removed.
+
+        Parameters
+        ----------
+        leading_zeros : :obj:`int`, optional
+            Width of the numeric suffix, by default 4
+
+        Examples
+        --------
+        >>> resolver = ScanNameResolver()
+        >>> resolver.scan_names("scans/test", 2)
+        ['scans/test_0003', 'scans/test_0004']
+        """
+        self.leading_zeros = leading_zeros
+
+        # file_name -> last first missing index
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def next_index(self, file_name):
+        """
+        Returns the first index ``n`` (starting at 1) for which ``<file_name>_n`` doesn't exist.
+        """
+        directory, name = os.path.split(file_name)
+        directory = directory or '.'
+
+        with self._lock:
+            index = self._cache.get(file_name)
+
+        # The last index is still valid if the file before it exists, the files created since
+        # then are skipped
+        if index is not None and (index == 1 or os.path.exists(self._name(file_name, index - 1))):
+            while os.path.exists(self._name(file_name, index)):
+                index += 1
+        else:
+            indexes = self._list_indexes(directory, name + "_")
+
+            index = 1
+            while index in indexes:
+                index += 1
+
+        with self._lock:
+            self._cache[file_name] = index
+
+        return index
+
+    def scan_names(self, file_name, number_repeats):
+        """
+        Returns the names of the files of the current scan, one for each repeat.
+        """
+        cont = self.next_index(file_name)
+
+        return [self._name(file_name, cont - 1 + i) for i in range(number_repeats)]
+
+    def _name(self, file_name, index):
+        return file_name + "_" + str(index).zfill(self.leading_zeros)
+
+    def _index(self, suffix):
+        # Only names that the scan writer would generate, e.g. "0012" but not "12" or "0012.png"
+        if suffix.isdigit() and str(int(suffix)).zfill(self.leading_zeros) == suffix:
+            return int(suffix)
+
+        return None
+
+    def file_index(self, file_name, path):
+        """
+        Returns the index of ``path`` if it is a scan file of ``file_name`` (e.g. 12 for
+        "scans/test_0012"), None otherwise (e.g. "scans/test_0012.png").
+        """
+        prefix = os.path.abspath(file_name) + "_"
+        path = os.path.abspath(path)
+
+        if not path.startswith(prefix):
+            return None
+
+        return self._index(path[len(prefix):])
+
+    def invalidate(self, file_name=None):
+        with self._lock:
+            if file_name is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(file_name, None)
+
+    def _list_indexes(self, directory, prefix):
+        indexes = set()
+
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not entry.name.startswith(prefix):
+                        continue
+
+                    index = self._index(entry.name[len(prefix):])
+                    if index is not None:
+                        indexes.add(index)
+        except OSError:
+            pass
+
+        return indexes
+
+
+# Resolver shared by all widgets, so the cache is shared too
+_resolver = ScanNameResolver()
+
+
+def next_scan_index(file_name):
+    """
+    Returns the index of the next scan file of ``file_name`` (the first ``<file_name>_n`` that
+    doesn't exist), using the resolver shared by all Jupy4Syn widgets.
+    """
+    return _resolver.next_index(file_name)
+
+
+def get_scan_names(file_name, number_repeats):
+    """
+    Returns the names of the files of the current scan, one for each repeat,
+    using the resolver shared by all Jupy4Syn widgets.
+    """
+    return _resolver.scan_names(file_name, number_repeats)
+
+
+def scan_file_name(file_name, index):
+    """
+    Returns the name of the scan file ``index`` of ``file_name`` (e.g. "scans/test_0012").
+    """
+    return _resolver._name(file_name, index)
+
+
+def scan_file_index(file_name, path):
+    """
+    Returns the index of ``path`` if it is a scan file of ``file_name``, None otherwise.
+    """
+    return _resolver.file_index(file_name, path)
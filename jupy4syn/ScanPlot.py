@@ -1,29 +1,103 @@
+# Auxiliar packages
+import numpy as np
+
 # Plotly
 import plotly.graph_objs as go
 
-# Py4Syn
-import py4syn.utils.scan as sc
+# Jupy4Syn
+from jupy4syn.PlotUpdater import PlotUpdater
+from jupy4syn.ScanDataSource import ColumnStore
 
 
 class ScanPlot():
-    def __init__(self, name, *args, **kwargs):
+    def __init__(self, name, max_fps=2.0, max_points=2000, *args, **kwargs):
+        """
+        **Constructor**
+
+        Figure of a scan running in this process. Each trace keeps its points in a preallocated
+        NumPy buffer; :py:meth:`plot` only appends the points that are new since its previous call
+        and the update is sent through a :py:class:`PlotUpdater <jupy4syn.PlotUpdater.PlotUpdater>`
+        (at most ``max_fps`` frames per second, ``max_points`` points per trace), so the cost of
+        each scan point doesn't grow with the scan length.
+
+        Parameters
+        ----------
+        name : :obj:`str`
+            Scan name
+        max_fps : :obj:`float`, optional
+            Maximum number of figure updates per second, by default 2.0
+        max_points : :obj:`int`, optional
+            Maximum number of points sent for each trace, by default 2000
+        """
+        self.name = name
+
         # Scan figure widget that will be displayed
         self.figure = go.FigureWidget()
-      
 
-    def add_scatter(self, initial_x, initial_y, name, mode='lines+markers'):
+        # Throttled updates, long traces are decimated to max_points before being sent
+        self.updater = PlotUpdater(self.figure, max_fps=max_fps, max_points=max_points)
+
+        # label -> trace index, trace index -> (x, y) buffer
+        self.trace_indexes = {}
+        self.buffers = {}
+
+    def add_scatter(self, initial_x, initial_y, name, mode='lines+markers', capacity=1024):
+        """
+        Add a trace. ``capacity`` is the number of points preallocated for it (e.g. the scan
+        number of points), the buffer grows if the scan has more points.
+        """
         self.figure.add_traces([go.Scatter(x=initial_x,
                                           y=initial_y,
                                           mode=mode,
                                           name=name)])
-        
-        
+
+        index = len(self.figure.data) - 1
+        self.trace_indexes[name] = index
+        self.buffers[index] = ColumnStore(2, capacity)
+
     def plot(self, x, y, label):
-        for trace in self.figure['data']:
-            if trace['name'] == label:
-                trace['x'] = x
-                trace['y'] = y
-    
-    
+        """
+        Plot the scan data of a trace. ``x`` and ``y`` are all the points measured so far, only
+        the points beyond the ones already plotted are copied. Shorter data (a new scan) replaces
+        the trace data.
+        """
+        index = self.trace_indexes.get(label)
+        if index is None:
+            return
+
+        buffer = self.buffers[index]
+        start = buffer.size
+
+        length = min(len(x), len(y))
+        if length < start:
+            buffer.clear()
+            start = 0
+        elif length == start:
+            return
+
+        self.extend(label, x[start:length], y[start:length])
+
+    def extend(self, label, x, y):
+        """
+        Append new points to a trace.
+        """
+        index = self.trace_indexes[label]
+        buffer = self.buffers[index]
+
+        if len(x):
+            buffer.append(np.column_stack((np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))))
+
+        # Views of the buffers, the figure update is sent at most max_fps times per second
+        self.updater.update(index, buffer.column(0), buffer.column(1))
+        self.updater.flush()
+
+    def clear(self):
+        for buffer in self.buffers.values():
+            buffer.clear()
+
+    def flush(self):
+        # Send the last points of the scan
+        self.updater.flush(force=True)
+
     def display(self):
         return self.figure
@@ -0,0 +1,297 @@
+import hashlib
+import json
+import os
+import struct
+
+# Auxiliar packages
+import numpy as np
+
+# Jupy4Syn
+from jupy4syn.ScanDataSource import ColumnStore, ScanDataSource
+
+
+# magic, version, number of columns, capacity (points), dtype, committed sequence, reserved sequence,
+# expected points (0 if unknown), finished flag, labels JSON length
+_HEADER = struct.Struct("<4sIII8sQQQII8x")
+_MAGIC = b"J4SR"
+_VERSION = 1
+
+_SEQUENCE_OFFSET = 24
+_RESERVED_OFFSET = 32
+_FINISHED_OFFSET = 48
+
+# Labels JSON area, then the data (capacity rows of number_columns values)
+_LABELS_OFFSET = _HEADER.size
+_LABELS_SIZE = 4096
+_DATA_OFFSET = _LABELS_OFFSET + _LABELS_SIZE
+
+
+def ring_name(file_name):
+    """
+    Shared memory name of the ring buffer of a scan file. Writer and reader must give the same
+    path (it is made absolute, so relative paths must be relative to the same directory).
+    """
+    return "jupy4syn_" + hashlib.sha1(os.path.abspath(file_name).encode()).hexdigest()[:20]
+
+
+def _attach(name):
+    # Attach without registering the segment in this process resource tracker, which would
+    # unlink it when this process exits
+    from multiprocessing import shared_memory
+
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13
+        from multiprocessing import resource_tracker
+
+        memory = shared_memory.SharedMemory(name=name)
+        try:
+            resource_tracker.unregister(memory._name, "shared_memory")
+        except Exception:
+            pass
+
+        return memory
+
+
+class ScanRingWriter():
+    def __init__(self, file_name, labels, capacity=65536, dtype="<f8", expected_points=None):
+        """
+        **Constructor**
+
+        Publishes the points of a scan in a ``multiprocessing.shared_memory`` ring buffer, read by
+        :py:class:`ScanRingSource` in the notebook with a much lower latency than the scan file.
+        The scan file is still written as the durable record. The ring should be created before the
+        scan file, so the notebook finds it when the scan file appears.
+
+        The segment starts with a header (sequence number, number of columns, capacity, dtype,
+        expected points, finished flag), then the labels as JSON, then ``capacity`` rows. Rows are
+        written before the sequence number is increased; a reader that falls more than ``capacity``
+        points behind loses the oldest points (they are still in the scan file).
+
+        Parameters
+        ----------
+        file_name : :obj:`str`
+            Scan file path, the ring is named after it (see :py:func:`ring_name`)
+        labels : :obj:`list` of :obj:`str`
+            Column labels
+        capacity : :obj:`int`, optional
+            Number of points kept in the ring, by default 65536
+        dtype : :obj:`str`, optional
+            NumPy dtype of the values, by default "<f8"
+        expected_points : :obj:`int`, optional
+            Number of points of the scan, by default None (unknown)
+
+        Examples
+        --------
+        >>> writer = ScanRingWriter("scans/test_0001", ["mono", "I0", "I1"], expected_points=500)
+        >>> writer.append([7112.0, 10512.0, 9871.0])
+        >>> writer.close()
+        """
+        from multiprocessing import shared_memory
+
+        labels_json = json.dumps({"labels": list(labels)}).encode()
+        if len(labels_json) > _LABELS_SIZE:
+            raise ValueError("Too many labels for the ring buffer header")
+
+        self.file_name = file_name
+        self.name = ring_name(file_name)
+        self.number_columns = len(labels)
+        self.capacity = capacity
+        self.dtype = np.dtype(dtype)
+
+        size = _DATA_OFFSET + capacity * self.number_columns * self.dtype.itemsize
+
+        # A ring left by a previous scan with the same file name is replaced
+        try:
+            old = _attach(self.name)
+            old.close()
+            old.unlink()
+        except FileNotFoundError:
+            pass
+
+        self.memory = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+
+        buffer = self.memory.buf
+        buffer[_LABELS_OFFSET:_LABELS_OFFSET + len(labels_json)] = labels_json
+        _HEADER.pack_into(buffer, 0, _MAGIC, _VERSION, self.number_columns, capacity, self.dtype.str.encode(),
+                          0, 0, expected_points or 0, 0, len(labels_json))
+
+        self._sequence = np.ndarray((2,), np.uint64, buffer, _SEQUENCE_OFFSET)
+        self._rows = np.ndarray((capacity, self.number_columns), self.dtype, buffer, _DATA_OFFSET)
+
+    @property
+    def sequence(self):
+        return int(self._sequence[0])
+
+    def append(self, rows):
+        """
+        Publish one point (a sequence of ``number_columns`` values) or many points (2D array).
+        """
+        rows = np.asarray(rows, dtype=self.dtype).reshape(-1, self.number_columns)
+
+        start = int(self._sequence[0])
+        end = start + len(rows)
+
+        # Only the last capacity points fit in the ring
+        if len(rows) > self.capacity:
+            rows = rows[-self.capacity:]
+            start = end - self.capacity
+
+        # Readers check the reserved sequence to detect rows overwritten while they copied them
+        self._sequence[1] = end
+
+        first = start % self.capacity
+        count = min(len(rows), self.capacity - first)
+        self._rows[first:first + count] = rows[:count]
+        self._rows[:len(rows) - count] = rows[count:]
+
+        self._sequence[0] = end
+
+    def finish(self):
+        """
+        Mark the scan as finished.
+        """
+        struct.pack_into("<I", self.memory.buf, _FINISHED_OFFSET, 1)
+
+    def close(self, unlink=True):
+        """
+        Finish the scan and release the ring. Readers already attached keep reading it after it
+        is unlinked.
+        """
+        self.finish()
+
+        del self._sequence, self._rows
+        self.memory.close()
+        if unlink:
+            try:
+                self.memory.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class ScanRingSource(ScanDataSource):
+    def __init__(self, file_name):
+        """
+        **Constructor**
+
+        Scan data read from the shared memory ring buffer published by a :py:class:`ScanRingWriter`,
+        the low latency backend of :py:class:`ScanDataSource <jupy4syn.ScanDataSource.ScanDataSource>`.
+        The ring is mapped without copying, and :py:meth:`poll` copies the points published since its
+        previous call to a :py:class:`ColumnStore <jupy4syn.ScanDataSource.ColumnStore>`, where the
+        scan keeps all its points. :py:meth:`poll` attaches to the ring when it exists.
+
+        Parameters
+        ----------
+        file_name : :obj:`str`
+            Scan file path (see :py:func:`ring_name`)
+        """
+        ScanDataSource.__init__(self)
+
+        self.file_name = file_name
+        self.name = ring_name(file_name)
+
+        self.memory = None
+        self.store = None
+
+        # Points lost because the reader fell more than the ring capacity behind
+        self.lost = 0
+        self._consumed = 0
+
+    @property
+    def attached(self):
+        return self.memory is not None
+
+    @property
+    def finished(self):
+        return self.attached and struct.unpack_from("<I", self.memory.buf, _FINISHED_OFFSET)[0] == 1
+
+    @property
+    def points(self):
+        return self.store.size if self.store is not None else 0
+
+    @property
+    def number_columns(self):
+        return self.store.number_columns if self.store is not None else len(self.labels)
+
+    def column(self, index, start=0):
+        if self.store is None:
+            return np.empty(0, dtype=np.float64)
+
+        return self.store.column(index, start)
+
+    def attach(self):
+        """
+        Attach to the ring if it exists.
+
+        Returns
+        -------
+        out : :obj:`bool`
+            If the ring is attached
+        """
+        if self.memory is not None:
+            return True
+
+        try:
+            memory = _attach(self.name)
+        except FileNotFoundError:
+            return False
+
+        magic, version, number_columns, capacity, dtype, _, _, expected, _, labels_length = _HEADER.unpack_from(memory.buf, 0)
+        if magic != _MAGIC or version != _VERSION:
+            memory.close()
+            return False
+
+        self.memory = memory
+        self.capacity = capacity
+
+        header = json.loads(bytes(memory.buf[_LABELS_OFFSET:_LABELS_OFFSET + labels_length]))
+        self.labels = header["labels"]
+        self.number_reads = expected or None
+
+        self._sequence = np.ndarray((2,), np.uint64, memory.buf, _SEQUENCE_OFFSET)
+        self._rows = np.ndarray((capacity, number_columns), np.dtype(dtype.rstrip(b"\0").decode()),
+                                memory.buf, _DATA_OFFSET)
+        self.store = ColumnStore(number_columns, max(1024, self.number_reads or 0))
+
+        return True
+
+    def poll(self):
+        if not self.attach():
+            return 0
+
+        end = int(self._sequence[0])
+        start = self._consumed
+
+        if end - start > self.capacity:
+            self.lost += end - start - self.capacity
+            start = end - self.capacity
+        if end == start:
+            return 0
+
+        first = start % self.capacity
+        count = min(end - start, self.capacity - first)
+        rows = np.concatenate((self._rows[first:first + count], self._rows[:end - start - count]))
+
+        # Rows the writer started to overwrite while they were copied are dropped
+        overwritten = int(self._sequence[1]) - self.capacity - start
+        if overwritten > 0:
+            rows = rows[overwritten:]
+            self.lost += overwritten
+
+        self._consumed = end
+
+        if len(rows) == 0:
+            return 0
+
+        points = self.store.size
+        self.store.append(rows)
+        self._notify(points)
+
+        return len(rows)
+
+    def close(self):
+        if self.memory is not None:
+            del self._sequence, self._rows
+            self.memory.close()
+            self.memory = None
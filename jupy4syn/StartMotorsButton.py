@@ -8,17 +8,20 @@ from IPython.display import display
 from py4syn.epics.MotorClass import Motor
 
 # Jupy4Syn
-from jupy4syn.Configuration import Configuration
+from jupy4syn.Configuration import default_configuration
 from jupy4syn.MotorSetValueButton import MotorSetValueButton
 from jupy4syn.utils import logprint, configurate_motor
 
 
 class StartMotorsButton(widgets.Button):
     
-    def __init__(self, config=Configuration(), *args, **kwargs):
+    def __init__(self, config=None, *args, **kwargs):
         widgets.Button.__init__(self, *args, **kwargs)
         
         # Config
+        if config is None:
+            config = default_configuration()
+
         self.config = config
         
         # Text box to write the motors
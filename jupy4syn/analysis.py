@@ -0,0 +1,310 @@
+# Auxiliar packages
+import numpy as np
+
+# Jupy4Syn
+from jupy4syn.derivatives import first_derivative, find_edge
+
+
+def _as_float_array(values):
+    return np.asarray(values, dtype=np.float64)
+
+
+def _vertex(x, y, i):
+    # Vertex of the parabola through the point i and its neighbours, x[i] if it can't be refined
+    if i == 0 or i == len(y) - 1 or np.isnan(y[i - 1]) or np.isnan(y[i + 1]):
+        return float(x[i]), float(y[i])
+
+    a, b, c = np.polyfit(x[i - 1:i + 2] - x[i], y[i - 1:i + 2], 2)
+    if a == 0:
+        return float(x[i]), float(y[i])
+
+    offset = -b / (2.0 * a)
+    if abs(offset) > max(abs(x[i + 1] - x[i]), abs(x[i] - x[i - 1])):
+        return float(x[i]), float(y[i])
+
+    return float(x[i] + offset), float(c - b * b / (4.0 * a))
+
+
+def peak(x, y):
+    """
+    Position and height of the maximum, refined by the vertex of the parabola through the maximum
+    and its neighbours.
+
+    Parameters
+    ----------
+    x : :obj:`numpy.ndarray`
+        Abscissa (e.g. motor positions)
+    y : :obj:`numpy.ndarray`
+        Counter values, same length as ``x``
+
+    Returns
+    -------
+    out : :obj:`tuple` of :obj:`float`
+        (position, height), NaN if there are no valid points
+    """
+    x = _as_float_array(x)
+    y = _as_float_array(y)
+
+    if len(y) == 0 or np.all(np.isnan(y)):
+        return float("nan"), float("nan")
+
+    return _vertex(x, y, int(np.nanargmax(y)))
+
+
+def _crossing(x, y, level, start, stop, step):
+    # First crossing of level from the point start, walking by step, linearly interpolated
+    for i in range(start, stop, step):
+        j = i + step
+        if y[j] <= level:
+            if y[i] == y[j]:
+                return float(x[j])
+            return float(x[i] + (x[j] - x[i]) * (y[i] - level) / (y[i] - y[j]))
+
+    return float("nan")
+
+
+def fwhm(x, y):
+    """
+    Full width at half maximum of the highest peak (half way between the minimum and the
+    maximum), with the half maximum crossings linearly interpolated.
+
+    Returns
+    -------
+    out : :obj:`tuple` of :obj:`float`
+        (width, center), NaN if the peak doesn't cross the half maximum on both sides
+    """
+    x = _as_float_array(x)
+    y = _as_float_array(y)
+
+    if len(y) < 3 or np.all(np.isnan(y)):
+        return float("nan"), float("nan")
+
+    i = int(np.nanargmax(y))
+    level = (np.nanmin(y) + y[i]) / 2.0
+
+    # Only the crossings, found by walking from the peak, are evaluated in Python
+    left = _crossing(x, y, level, i, 0, -1)
+    right = _crossing(x, y, level, i, len(y) - 1, 1)
+
+    return abs(right - left), (left + right) / 2.0
+
+
+def center_of_mass(x, y):
+    """
+    Center of mass of ``y`` above its minimum.
+    """
+    x = _as_float_array(x)
+    y = _as_float_array(y)
+
+    valid = ~np.isnan(y)
+    if not np.any(valid):
+        return float("nan")
+
+    weights = y[valid] - np.min(y[valid])
+    total = np.sum(weights)
+    if total == 0:
+        return float(np.mean(x[valid]))
+
+    return float(np.dot(weights, x[valid]) / total)
+
+
+def edge(x, y):
+    """
+    Edge position: maximum of the first derivative, see :py:func:`jupy4syn.derivatives.find_edge`.
+    """
+    x = _as_float_array(x)
+    y = _as_float_array(y)
+
+    if len(y) < 2:
+        return float("nan")
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return find_edge(x, first_derivative(x, y))
+
+
+def derivative_extrema(x, y):
+    """
+    Positions of the maximum and of the minimum of the first derivative.
+
+    Returns
+    -------
+    out : :obj:`tuple` of :obj:`float`
+        (position of the maximum, position of the minimum)
+    """
+    x = _as_float_array(x)
+    y = _as_float_array(y)
+
+    if len(y) < 2:
+        return float("nan"), float("nan")
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dy = first_derivative(x, y)
+
+    if np.all(np.isnan(dy)):
+        return float("nan"), float("nan")
+
+    return float(x[np.nanargmax(dy)]), float(x[np.nanargmin(dy)])
+
+
+def _gaussian(x, parameters):
+    amplitude, center, sigma, offset = parameters
+    e = np.exp(-0.5 * ((x - center) / sigma) ** 2)
+
+    jacobian = np.empty((len(x), 4))
+    jacobian[:, 0] = e
+    jacobian[:, 1] = amplitude * e * (x - center) / sigma ** 2
+    jacobian[:, 2] = amplitude * e * (x - center) ** 2 / sigma ** 3
+    jacobian[:, 3] = 1.0
+
+    return amplitude * e + offset, jacobian
+
+
+def _lorentzian(x, parameters):
+    amplitude, center, gamma, offset = parameters
+    u = (x - center) ** 2 + gamma ** 2
+
+    jacobian = np.empty((len(x), 4))
+    jacobian[:, 0] = gamma ** 2 / u
+    jacobian[:, 1] = 2.0 * amplitude * gamma ** 2 * (x - center) / u ** 2
+    jacobian[:, 2] = 2.0 * amplitude * gamma * (x - center) ** 2 / u ** 2
+    jacobian[:, 3] = 1.0
+
+    return amplitude * gamma ** 2 / u + offset, jacobian
+
+
+def _least_squares(model, x, y, parameters, max_iterations=100, tolerance=1e-10):
+    # Levenberg–Marquardt with the analytic jacobian of model
+    parameters = np.array(parameters, dtype=np.float64)
+    values, jacobian = model(x, parameters)
+    residual = y - values
+    cost = np.dot(residual, residual)
+    damping = 1e-3
+
+    for _ in range(max_iterations):
+        normal = jacobian.T @ jacobian
+        gradient = jacobian.T @ residual
+
+        try:
+            step = np.linalg.solve(normal + damping * np.diag(np.diag(normal)), gradient)
+        except np.linalg.LinAlgError:
+            break
+
+        candidate = parameters + step
+        candidate_values, candidate_jacobian = model(x, candidate)
+        candidate_residual = y - candidate_values
+        candidate_cost = np.dot(candidate_residual, candidate_residual)
+
+        if candidate_cost < cost:
+            converged = cost - candidate_cost <= tolerance * cost
+            parameters, jacobian, residual, cost = candidate, candidate_jacobian, candidate_residual, candidate_cost
+            damping = max(damping / 10.0, 1e-12)
+
+            if converged:
+                break
+        else:
+            damping *= 10.0
+            if damping > 1e12:
+                break
+
+    return parameters, cost
+
+
+def _fit(model, width_factor, x, y):
+    x = _as_float_array(x)
+    y = _as_float_array(y)
+
+    valid = ~np.isnan(y)
+    x = x[valid]
+    y = y[valid]
+
+    if len(y) < 5:
+        return None
+
+    # Initial guess from the peak and its width
+    offset = float(np.min(y))
+    center, height = peak(x, y)
+    width, _ = fwhm(x, y)
+    if not np.isfinite(width) or width == 0:
+        width = (np.max(x) - np.min(x)) / 4.0
+
+    parameters, cost = _least_squares(model, x, y, (height - offset, center, width * width_factor, offset))
+    amplitude, center, width, offset = parameters
+
+    return {"amplitude": float(amplitude), "center": float(center), "width": float(abs(width)),
+            "offset": float(offset), "residual": float(cost)}
+
+
+def gaussian_fit(x, y):
+    """
+    Least squares fit of ``amplitude * exp(-(x - center)² / (2 width²)) + offset``.
+
+    Returns
+    -------
+    out : :obj:`dict`
+        amplitude, center, width (σ), offset and residual (sum of squares), None if there are
+        less than 5 valid points
+    """
+    # σ = FWHM / (2 sqrt(2 ln 2))
+    return _fit(_gaussian, 1.0 / 2.3548200450309493, x, y)
+
+
+def lorentzian_fit(x, y):
+    """
+    Least squares fit of ``amplitude * width² / ((x - center)² + width²) + offset``.
+
+    Returns
+    -------
+    out : :obj:`dict`
+        amplitude, center, width (γ, half width at half maximum), offset and residual (sum of
+        squares), None if there are less than 5 valid points
+    """
+    return _fit(_lorentzian, 0.5, x, y)
+
+
+# Analysis name -> function(x, y)
+METHODS = {
+    "peak": peak,
+    "fwhm": fwhm,
+    "com": center_of_mass,
+    "edge": edge,
+    "derivative": derivative_extrema,
+    "gaussian": gaussian_fit,
+    "lorentzian": lorentzian_fit,
+}
+
+DEFAULT_METHODS = ("peak", "fwhm", "com")
+
+
+def analyze(x, y, methods=DEFAULT_METHODS):
+    """
+    Run analysis methods on a scan counter. ``x`` and ``y`` can be views of the scan data
+    (e.g. :py:meth:`ScanDataSource.column <jupy4syn.ScanDataSource.ScanDataSource.column>`),
+    they are not copied.
+
+    Parameters
+    ----------
+    x : :obj:`numpy.ndarray`
+        Abscissa (e.g. motor positions)
+    y : :obj:`numpy.ndarray`
+        Counter values, same length as ``x``
+    methods : :obj:`list` of :obj:`str`, optional
+        Names in :py:data:`METHODS`, by default ("peak", "fwhm", "com")
+
+    Returns
+    -------
+    out : :obj:`dict`
+        method name -> result
+
+    Examples
+    --------
+    >>> analyze(source.column(0), source.column(source.column_index("I0")), ["peak", "gaussian"])
+    {'peak': (1.02, 5310.0), 'gaussian': {'amplitude': 5290.1, 'center': 1.018, ...}}
+    """
+    results = {}
+    for method in methods:
+        if method not in METHODS:
+            raise ValueError("Unknown analysis '" + method + "', expected one of: " + ", ".join(METHODS))
+
+        results[method] = METHODS[method](x, y)
+
+    return results
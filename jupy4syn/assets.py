@@ -0,0 +1,64 @@
+import base64
+import importlib.resources
+import threading
+
+
+# Image name -> PNG bytes, shared by all widgets
+_images = {}
+_images_lock = threading.Lock()
+
+SPINNER_FRAMES = ["refresh_" + str(i).zfill(2) for i in range(12)]
+
+
+def _read_image(file_name):
+    if hasattr(importlib.resources, 'files'):
+        return (importlib.resources.files('jupy4syn.img') / file_name).read_bytes()
+
+    return importlib.resources.read_binary('jupy4syn.img', file_name)
+
+
+def image(name):
+    """
+    Returns the PNG bytes of a Jupy4Syn image (e.g. "tick", "close", "blank", "refresh_00").
+    Images are read from the package once and the same bytes are shared by every widget.
+
+    Parameters
+    ----------
+    name : :obj:`str`
+        Image name, without the ".png" extension
+
+    Returns
+    -------
+    out : :obj:`bytes`
+        Image file contents
+    """
+    with _images_lock:
+        if name not in _images:
+            _images[name] = _read_image(name + ".png")
+
+        return _images[name]
+
+
+def spinner_html(size=35, period=1.2):
+    """
+    HTML of a spinning "refresh" icon animated by the browser (CSS), so no messages
+    are sent from the kernel while it spins.
+
+    Parameters
+    ----------
+    size : :obj:`int`, optional
+        Icon width and height in pixels, by default 35
+    period : :obj:`float`, optional
+        Time of a full turn in seconds, by default 1.2
+
+    Returns
+    -------
+    out : :obj:`str`
+        HTML for an ipywidgets HTML widget
+    """
+    data = base64.b64encode(image(SPINNER_FRAMES[0])).decode('ascii')
+
+    # 12 steps per turn, as the 12 refresh_NN frames
+    return ('<style>@keyframes jupy4syn-spin { from { transform: rotate(0deg); } to { transform: rotate(360deg); } }</style>'
+            '<img src="data:image/png;base64,' + data + '" width="' + str(size) + '" height="' + str(size) + '" '
+            'style="animation: jupy4syn-spin ' + str(period) + 's steps(12) infinite;">')
@@ -1,19 +1,17 @@
-import time
-import subprocess
-
 # Widgets
 import ipywidgets as widgets
 from IPython.display import display
 
 # Jupy4Syn
-from jupy4syn.Configuration import Configuration
+from jupy4syn.Configuration import default_configuration
 from jupy4syn.commandDict import commandDict
+from jupy4syn.CommandExecutor import stdout_router
 from jupy4syn.utils import logprint
 
 
 class commandButton(widgets.Button):
     
-    def __init__(self, command, default_args="", config=Configuration(), *args, **kwargs):
+    def __init__(self, command, default_args="", config=None, *args, **kwargs):
         """
         **Constructor**
 
@@ -22,7 +20,7 @@ class commandButton(widgets.Button):
         command: `string`
             Command that will be executed at the button click
         config: `jupy4syn.Configuration`, optional
-            Configuration object that contains Jupyter Notebook runtime information, by default Configuration()
+            Configuration object that contains Jupyter Notebook runtime information, by default None (shared default Configuration)
 
         Examples
         ----------
@@ -35,6 +33,9 @@ class commandButton(widgets.Button):
         widgets.Button.__init__(self, *args, **kwargs)
         
         # Config
+        if config is None:
+            config = default_configuration()
+
         self.config = config
 
         # Command Dictionary
@@ -70,6 +71,38 @@ class commandButton(widgets.Button):
         # Widgets displays
         self.start_button = widgets.VBox([self])
         
+    @classmethod
+    def many(cls, commands, config=None, *args, **kwargs):
+        """
+        Create a commandButton for each (command, default_args) pair. The PVs of the get and put
+        buttons are connected concurrently, in one batch, before the buttons are created.
+
+        Returns
+        -------
+        out : :obj:`list` of :py:class:`commandButton`
+            One button for each pair, in the same order
+
+        Examples
+        --------
+        >>> buttons = commandButton.many([("get", "solm1"), ("put", "solm2"), ("wa", "")], config)
+        """
+        if config is None:
+            config = default_configuration()
+
+        command_dict = commandDict(config=config)
+
+        names = []
+        for command, default_args in commands:
+            names.extend(command_dict.commands_dict[command].pv_names(default_args))
+
+        if names:
+            # EPICS is only imported when PVs are used
+            from jupy4syn.PVPool import get_pv_pool
+
+            get_pv_pool().prefetch(names, config)
+
+        return [cls(command, default_args, config, *args, **kwargs) for command, default_args in commands]
+
     @staticmethod
     def _start_button(b):
         # Clear previous logs outputs
@@ -84,29 +117,35 @@ class commandButton(widgets.Button):
 
             try:
                 logprint("Executing command " + b.command, config=b.config)
-        
-                b.command_dict.execute(b.command, b.arguments.value)
-                
-                # while True:
-                #     output = process.stdout.readline()
-                #     if output == '' and process.poll() is not None:
-                #         break
-                #     if output:
-                #         print(output.strip())
-
-                logprint("Finished executing command " + b.command, config=b.config)
+
+                # The command runs in the background, its prints are streamed to the button output
+                future = b.command_dict.execute(b.command, b.arguments.value, output=b.output)
+                future.add_done_callback(b._command_finished)
             except Exception as e:
                 # If any error occurs, log that but dont stop code exection
                 logprint("Error in executing command " + b.command, "[ERROR]", config=b.config)
                 logprint(str(e), "[ERROR]", config=b.config)
 
-            # We should sleep for some time to give some responsiveness to the user
-            time.sleep(1.0)
+                b._reset_button()
 
-            # Change button layout monitoring
-            b.disabled = False
-            b.button_style = 'success'
-            b.description = 'Execute Command ' + '"' + b.command + '"'
+    def _command_finished(self, future):
+        # Runs in the executor thread when the command finishes
+        with stdout_router().redirect(self.output.append_stdout):
+            try:
+                future.result()
+                logprint("Finished executing command " + self.command, config=self.config)
+            except Exception as e:
+                # If any error occurs, log that but dont stop code exection
+                logprint("Error in executing command " + self.command, "[ERROR]", config=self.config)
+                logprint(str(e), "[ERROR]", config=self.config)
+
+        self._reset_button()
+
+    def _reset_button(self):
+        # Change button layout monitoring
+        self.disabled = False
+        self.button_style = 'success'
+        self.description = 'Execute Command ' + '"' + self.command + '"'
     
     def display(self):
         # Some commands needs arguments that will be acquired through a text box
@@ -38,6 +38,20 @@ class ICommand(ABC):
 
         raise NotImplementedError
 
+    def pv_names(self, initial_args):
+        """
+        Names (PV names or config.yml mnemonics) the command resolves in :py:meth:`.args`, connected
+        in one batch when many command buttons are created (see :py:meth:`commandButton.many
+        <jupy4syn.commandButton.commandButton.many>`).
+
+        Returns
+        -------
+        out : :obj:`list` of :obj:`str`
+            By default no name
+        """
+
+        return []
+
     @abstractmethod
     def show(self, initial_args):
         """
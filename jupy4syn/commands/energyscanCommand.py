@@ -1,11 +1,14 @@
 import os
 import subprocess
 
-from jupy4syn.Configuration import Configuration
+from jupy4syn.Configuration import default_configuration
 from jupy4syn.commands.ICommand import ICommand
 
 class energyscanCommand(ICommand):
-    def __init__(self, config=Configuration()):
+    def __init__(self, config=None):
+        if config is None:
+            config = default_configuration()
+
         self.config = config
 
     def exec(self, parameters):
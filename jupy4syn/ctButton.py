@@ -1,6 +1,3 @@
-import time
-import subprocess
-
 # Widgets
 import ipywidgets as widgets
 from IPython.display import display
@@ -9,20 +6,22 @@ from IPython.display import display
 from scan_utils import ct
 
 # Jupy4Syn
-from jupy4syn.Configuration import Configuration
-from jupy4syn.utils import logprint
+from jupy4syn.JobButton import JobButton
 
 
-class ctButton(widgets.Button):
+class ctButton(JobButton):
     
-    def __init__(self, config=Configuration(), *args, **kwargs):
+    def __init__(self, config=None, *args, **kwargs):
         """
         **Constructor**
 
+        Runs scan-utils ct in the background. Counts using the same counters run one after the other,
+        counts using different counters run concurrently.
+
         Parameters
         ----------
         config: `jupy4syn.Configuration`, optional
-            Configuration object that contains Jupyter Notebook runtime information, by default Configuration()
+            Configuration object that contains Jupyter Notebook runtime information, by default None (shared default Configuration)
 
         Examples
         ----------
@@ -32,18 +31,7 @@ class ctButton(widgets.Button):
             ct.display()
         """
 
-        widgets.Button.__init__(self, *args, **kwargs)
-        
-        # Config
-        self.config = config
-        
-        # class Button values for MonitorScanSave
-        self.description = 'Execute ct'
-        self.disabled = False
-        self.button_style = 'success'
-        self.tooltip = 'Click me'
-        self.icon = ''
-        self.layout = widgets.Layout(width='300px')
+        JobButton.__init__(self, "ct", config, *args, **kwargs)
 
         # Bounded float text associated to the button
         self.bounded_text = widgets.Text(
@@ -51,48 +39,31 @@ class ctButton(widgets.Button):
                                 description="arguments",
                                 disabled=False
                               )
-               
-        # Logging
-        self.output = widgets.Output()
-        
-        # Set callback function for click event
-        self.on_click(self._start_button)
-        
-        # Widgets displays
-        self.start_button = widgets.VBox([self])
-        
-    @staticmethod
-    def _start_button(b):
-        # Clear previous logs outputs
-        b.output.clear_output()
-        
-        # with statement to output logs in stdou (if this option is enabled)
-        with b.output:
-            # Change button to a "clicked status"
-            b.disabled = True
-            b.button_style = ''
-            b.description='Executing...'
-
-            try:
-                logprint("Executing ct", config=b.config)
-                # TODO: call ct main from another thread
-                ct.main(b.bounded_text.value.split())
-
-                logprint("Finished executing ct", config=b.config)
-            except SystemExit as e:
-                pass
-            except Exception as e:
-                # If any error occurs, log that but dont stop code exection
-                logprint("Error in executing ct", "[ERROR]", config=b.config)
-                logprint(str(e), "[ERROR]", config=b.config)
-
-            # We should sleep for some time to give some responsiveness to the user
-            time.sleep(1.0)
-
-            # Change button layout monitoring
-            b.disabled = False
-            b.button_style = 'success'
-            b.description = 'Execute ct'
-    
+
+    def job(self):
+        arguments = self.bounded_text.value.split()
+
+        return ct.main, (arguments,), counter_resources(arguments)
+
     def display(self):
         display(self.bounded_text, self.start_button, self.output)
+
+
+def counter_resources(arguments):
+    """
+    Resources used by a ct job: the counters given in its arguments ("counter:<name>"), or
+    every counter ("counter:*") if none is given. Numbers (counting time) aren't counters.
+    Arguments with options (e.g. a ``-c`` configuration) claim every counter, as the counters
+    they use are only known to ct.
+    """
+    counters = []
+    for value in arguments:
+        try:
+            float(value)
+        except ValueError:
+            if value.startswith("-"):
+                return ["counter:*"]
+
+            counters.append("counter:" + value)
+
+    return counters or ["counter:*"]
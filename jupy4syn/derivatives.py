@@ -0,0 +1,315 @@
+# Auxiliar packages
+import numpy as np
+
+
+def _as_float_array(values):
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def first_derivative(x, y, out=None):
+    """
+    dy/dx on a non-uniform grid. Interior points use the second order three-point formula
+    (the same as ``np.gradient(y, x)``), the end points use one-sided differences.
+
+    Parameters
+    ----------
+    x : :obj:`numpy.ndarray`
+        Strictly monotonic abscissa (e.g. energy)
+    y : :obj:`numpy.ndarray`
+        Values, same length as ``x``
+    out : :obj:`numpy.ndarray`, optional
+        Contiguous float64 array where the result is written, by default None (a new array)
+
+    Returns
+    -------
+    out : :obj:`numpy.ndarray`
+        dy/dx, same length as ``x``
+    """
+    x = _as_float_array(x)
+    y = _as_float_array(y)
+    n = len(x)
+
+    if out is None:
+        out = np.empty(n)
+
+    if n < 2:
+        out[:] = np.nan
+        return out
+
+    h = np.diff(x)
+
+    # One sided differences at the ends
+    out[0] = (y[1] - y[0]) / h[0]
+    out[-1] = (y[-1] - y[-2]) / h[-1]
+
+    if n > 2:
+        h1 = h[:-1]
+        h2 = h[1:]
+
+        # out[1:-1] = (h1² y[i+1] - h2² y[i-1] + (h2² - h1²) y[i]) / (h1 h2 (h1 + h2))
+        interior = out[1:-1]
+        np.multiply(h1 * h1, y[2:], out=interior)
+        interior -= h2 * h2 * y[:-2]
+        interior += (h2 * h2 - h1 * h1) * y[1:-1]
+        interior /= h1 * h2 * (h1 + h2)
+
+    return out
+
+
+def second_derivative(x, y, out=None):
+    """
+    d²y/dx² on a non-uniform grid, with the three-point formula. The end points repeat their
+    neighbour value.
+
+    Parameters
+    ----------
+    x : :obj:`numpy.ndarray`
+        Strictly monotonic abscissa (e.g. energy)
+    y : :obj:`numpy.ndarray`
+        Values, same length as ``x``
+    out : :obj:`numpy.ndarray`, optional
+        Contiguous float64 array where the result is written, by default None (a new array)
+
+    Returns
+    -------
+    out : :obj:`numpy.ndarray`
+        d²y/dx², same length as ``x``
+    """
+    x = _as_float_array(x)
+    y = _as_float_array(y)
+    n = len(x)
+
+    if out is None:
+        out = np.empty(n)
+
+    if n < 3:
+        out[:] = np.nan
+        return out
+
+    h = np.diff(x)
+    h1 = h[:-1]
+    h2 = h[1:]
+
+    # out[1:-1] = 2 (h2 y[i-1] - (h1 + h2) y[i] + h1 y[i+1]) / (h1 h2 (h1 + h2))
+    interior = out[1:-1]
+    np.multiply(h2, y[:-2], out=interior)
+    interior -= (h1 + h2) * y[1:-1]
+    interior += h1 * y[2:]
+    interior *= 2.0
+    interior /= h1 * h2 * (h1 + h2)
+
+    out[0] = out[1]
+    out[-1] = out[-2]
+
+    return out
+
+
+def savgol(x, y, window, polyorder=2, deriv=0, out=None):
+    """
+    Savitzky–Golay filter on a non-uniform grid: for each point, a polynomial of degree ``polyorder``
+    is fitted (least squares) to the ``window`` points around it, using their actual ``x`` positions,
+    and its value or derivative at the point is returned. Points closer than ``window // 2`` to the
+    ends use the first or last full window.
+
+    Parameters
+    ----------
+    x : :obj:`numpy.ndarray`
+        Strictly monotonic abscissa (e.g. energy)
+    y : :obj:`numpy.ndarray`
+        Values, same length as ``x``
+    window : :obj:`int`
+        Number of points of each fit, odd and greater than ``polyorder``
+    polyorder : :obj:`int`, optional
+        Degree of the fitted polynomials, by default 2
+    deriv : :obj:`int`, optional
+        Derivative order (0 smooths the values), by default 0
+    out : :obj:`numpy.ndarray`, optional
+        Contiguous float64 array where the result is written, by default None (a new array)
+
+    Returns
+    -------
+    out : :obj:`numpy.ndarray`
+        Smoothed values or derivative, same length as ``x``
+    """
+    if window % 2 == 0 or window <= polyorder:
+        raise ValueError("window must be odd and greater than polyorder")
+    if deriv > polyorder:
+        raise ValueError("deriv must be less than or equal to polyorder")
+
+    x = _as_float_array(x)
+    y = _as_float_array(y)
+    n = len(x)
+
+    if out is None:
+        out = np.empty(n)
+
+    if n < window:
+        out[:] = np.nan
+        return out
+
+    # First point of the window of each point
+    starts = np.clip(np.arange(n) - window // 2, 0, n - window)
+    columns = starts[:, np.newaxis] + np.arange(window)
+
+    # Positions relative to the point, scaled to the window span to keep the fit well conditioned
+    scale = (x[columns[:, -1]] - x[columns[:, 0]])[:, np.newaxis] / 2.0
+    offsets = (x[columns] - x[:, np.newaxis]) / scale
+
+    # Least squares fit of every window at once, through the normal equations (small, well conditioned systems)
+    vandermonde = offsets[:, :, np.newaxis] ** np.arange(polyorder + 1)
+    transposed = vandermonde.transpose(0, 2, 1)
+    coefficients = np.linalg.solve(np.matmul(transposed, vandermonde), np.matmul(transposed, y[columns][:, :, np.newaxis]))[:, :, 0]
+
+    # Derivative of the polynomial at offset 0
+    np.multiply(coefficients[:, deriv], float(np.prod(np.arange(1, deriv + 1))), out=out)
+    out /= scale[:, 0] ** deriv
+
+    return out
+
+
+def derivatives(x, y, window=None, polyorder=2, first=None, second=None):
+    """
+    First and second derivatives of ``y`` with respect to ``x``. If ``window`` is given, they are
+    computed by a Savitzky–Golay filter (see :py:func:`savgol`), otherwise by finite differences.
+
+    Returns
+    -------
+    out : :obj:`tuple` of :obj:`numpy.ndarray`
+        (dy/dx, d²y/dx²)
+    """
+    if window is None:
+        return first_derivative(x, y, first), second_derivative(x, y, second)
+
+    return savgol(x, y, window, polyorder, 1, first), savgol(x, y, window, max(polyorder, 2), 2, second)
+
+
+def find_edge(x, dy):
+    """
+    Absorption edge (E0): position of the maximum of the first derivative, refined by the vertex
+    of the parabola through the maximum and its neighbours.
+
+    Parameters
+    ----------
+    x : :obj:`numpy.ndarray`
+        Abscissa (e.g. energy)
+    dy : :obj:`numpy.ndarray`
+        First derivative, see :py:func:`first_derivative`
+
+    Returns
+    -------
+    out : :obj:`float`
+        Edge position, NaN if there are no valid points
+    """
+    x = _as_float_array(x)
+    dy = _as_float_array(dy)
+
+    if len(dy) == 0 or np.all(np.isnan(dy)):
+        return float("nan")
+
+    i = int(np.nanargmax(dy))
+    if i == 0 or i == len(dy) - 1 or np.isnan(dy[i - 1]) or np.isnan(dy[i + 1]):
+        return float(x[i])
+
+    # Parabola through (x[i-1], dy[i-1]), (x[i], dy[i]), (x[i+1], dy[i+1])
+    a, b, c = np.polyfit(x[i - 1:i + 2] - x[i], dy[i - 1:i + 2], 2)
+    if a >= 0:
+        return float(x[i])
+
+    return float(x[i] - b / (2.0 * a))
+
+
+class DerivativeTracker():
+    def __init__(self, window=None, polyorder=2, capacity=1024):
+        """
+        **Constructor**
+
+        Keeps the first and second derivatives of a spectrum that grows while it is measured.
+        Points are appended to contiguous arrays (doubling their capacity when needed) and only the
+        derivatives whose stencil (3 points, or ``window`` points when smoothing) includes new points
+        are computed again.
+
+        Parameters
+        ----------
+        window : :obj:`int`, optional
+            Savitzky–Golay window, by default None (finite differences, no smoothing)
+        polyorder : :obj:`int`, optional
+            Savitzky–Golay polynomial degree, by default 2
+        capacity : :obj:`int`, optional
+            Initial capacity in points, by default 1024
+
+        Examples
+        --------
+        >>> tracker = DerivativeTracker(window=7)
+        >>> tracker.append(energy[:100], intensity[:100])
+        0
+        >>> tracker.append(energy[100:], intensity[100:])
+        94
+        >>> tracker.edge()
+        7112.3
+        """
+        self.window = window
+        self.polyorder = polyorder
+
+        self._data = np.empty((4, capacity))
+        self.size = 0
+
+    @property
+    def x(self):
+        return self._data[0, :self.size]
+
+    @property
+    def y(self):
+        return self._data[1, :self.size]
+
+    @property
+    def first(self):
+        return self._data[2, :self.size]
+
+    @property
+    def second(self):
+        return self._data[3, :self.size]
+
+    def clear(self):
+        self.size = 0
+
+    def append(self, x, y):
+        """
+        Append points and update the derivatives.
+
+        Returns
+        -------
+        out : :obj:`int`
+            First index whose derivatives changed
+        """
+        x = _as_float_array(x)
+        y = _as_float_array(y)
+
+        old_size = self.size
+        new_size = old_size + len(x)
+
+        if new_size > self._data.shape[1]:
+            data = np.empty((4, max(new_size, 2 * self._data.shape[1])))
+            data[:, :old_size] = self._data[:, :old_size]
+            self._data = data
+
+        self._data[0, old_size:new_size] = x
+        self._data[1, old_size:new_size] = y
+        self.size = new_size
+
+        # Points whose stencil includes a new point, and the points needed to compute them
+        reach = 1 if self.window is None else self.window
+        start = max(0, old_size - reach)
+        context = max(0, start - reach)
+
+        first, second = derivatives(self.x[context:], self.y[context:], self.window, self.polyorder)
+
+        self._data[2, start:new_size] = first[start - context:]
+        self._data[3, start:new_size] = second[start - context:]
+
+        return start
+
+    def edge(self):
+        """
+        Edge position (E0) of the current spectrum, see :py:func:`find_edge`.
+        """
+        return find_edge(self.x, self.first)
@@ -6,20 +6,20 @@ import ipywidgets as widgets
 from IPython.display import display
 
 # Jupy4Syn
-from jupy4syn.Configuration import Configuration
+from jupy4syn.Configuration import default_configuration
 from jupy4syn.utils import logprint
 
 
 class interfaceButton(widgets.Button):
     
-    def __init__(self, interface, config=Configuration(), *args, **kwargs):
+    def __init__(self, interface, config=None, *args, **kwargs):
         """
         **Constructor**
 
         Parameters
         ----------
         config: `jupy4syn.Configuration`, optional
-            Configuration object that contains Jupyter Notebook runtime information, by default Configuration()
+            Configuration object that contains Jupyter Notebook runtime information, by default None (shared default Configuration)
 
         Examples
         ----------
@@ -32,6 +32,9 @@ class interfaceButton(widgets.Button):
         widgets.Button.__init__(self, *args, **kwargs)
         
         # Config
+        if config is None:
+            config = default_configuration()
+
         self.config = config
 
         # Interfaces
@@ -5,22 +5,22 @@ import time
 import ipywidgets as widgets
 from IPython.display import display
 
-# scan-utils
-import scan_utils.configuration as scan_utils
-
 # Jupy4Syn
-from jupy4syn.Configuration import Configuration
+from jupy4syn.Configuration import default_configuration, scan_utils_configuration
 from jupy4syn.utils import logprint
 
 
 class motorsButton(widgets.Button):
     
-    def __init__(self, m1="", m2="", m3="", m4="", m5="", user_flag=False, config=Configuration(), *args, **kwargs):
+    def __init__(self, m1="", m2="", m3="", m4="", m5="", user_flag=False, config=None, *args, **kwargs):
         widgets.Button.__init__(self, *args, **kwargs)
         
         # Config
+        if config is None:
+            config = default_configuration()
+
         self.config = config
-        self.yml_config = scan_utils.Configuration()
+        self.yml_config = scan_utils_configuration()
 
         # Motors
         self.m1 = self.get_pv_by_name(m1)
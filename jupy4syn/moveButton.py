@@ -9,20 +9,20 @@ from IPython.display import display
 from scan_utils import move
 
 # Jupy4Syn
-from jupy4syn.Configuration import Configuration
+from jupy4syn.Configuration import default_configuration
 from jupy4syn.utils import logprint
 
 
 class moveButton(widgets.Button):
     
-    def __init__(self, motor="<motor>", config=Configuration(), *args, **kwargs):
+    def __init__(self, motor="<motor>", config=None, *args, **kwargs):
         """
         **Constructor**
 
         Parameters
         ----------
         config: `jupy4syn.Configuration`, optional
-            Configuration object that contains Jupyter Notebook runtime information, by default Configuration()
+            Configuration object that contains Jupyter Notebook runtime information, by default None (shared default Configuration)
 
         Examples
         ----------
@@ -35,6 +35,9 @@ class moveButton(widgets.Button):
         widgets.Button.__init__(self, *args, **kwargs)
         
         # Config
+        if config is None:
+            config = default_configuration()
+
         self.config = config
         
         # class Button values for MonitorScanSave
@@ -0,0 +1,167 @@
+import os
+import time
+
+import pytest
+
+from jupy4syn.PVBroker import BrokerClient, PVBroker
+
+
+class MockPV():
+    # epics.PV stand-in: connects right away, put values are sent to the monitor callback
+    instances = {}
+
+    def __init__(self, pvname, callback=None, connection_callback=None):
+        self.pvname = pvname
+        self.callback = callback
+        self.type = "double"
+        self.count = 1
+        self.precision = 3
+        self.units = "mm"
+        self.enum_strs = None
+        self.connected = pvname != "IOC:OFFLINE"
+        self.puts = []
+        self.disconnected = False
+
+        MockPV.instances.setdefault(pvname, []).append(self)
+
+        if connection_callback is not None and self.connected:
+            connection_callback(pvname=pvname, conn=True, pv=self)
+
+    def get_ctrlvars(self):
+        return {}
+
+    def put(self, value, wait=False, timeout=30.0):
+        self.puts.append(value)
+        if self.callback is not None:
+            self.update(value)
+
+        return 1
+
+    def update(self, value):
+        self.callback(pvname=self.pvname, value=value, char_value=str(value), timestamp=time.time(), severity=0)
+
+    def disconnect(self):
+        self.disconnected = True
+
+
+def get_many(pvnames, as_string=False, timeout=None):
+    return [pvname + " value" for pvname in pvnames]
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+    return condition()
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    MockPV.instances = {}
+
+    return str(tmp_path / "broker.sock")
+
+
+@pytest.fixture
+def broker(socket_path):
+    broker = PVBroker(socket_path, pv_factory=MockPV, get_many=get_many, allow_puts=True)
+    broker.start()
+
+    yield broker
+
+    broker.stop()
+
+
+def test_fan_out_to_two_clients(broker, socket_path):
+    first = BrokerClient(socket_path)
+    second = BrokerClient(socket_path)
+
+    pvs = [first.pv("IOC:m1"), second.pv("IOC:m1")]
+    assert all(pv.wait_for_connection(2.0) for pv in pvs)
+    assert pvs[0].units == "mm"
+
+    # One broker PV for both kernels
+    assert len(MockPV.instances["IOC:m1"]) == 1
+    assert broker.stats()["subscriptions"] == 2
+
+    received = []
+    pvs[1].add_callback(lambda value, **kw: received.append(value))
+
+    MockPV.instances["IOC:m1"][0].update(1.5)
+    assert all(pv.get(timeout=2.0) == 1.5 for pv in pvs)
+    assert wait_until(lambda: received == [1.5])
+
+    first.close()
+    second.close()
+
+
+def test_put_and_get_many(broker, socket_path):
+    client = BrokerClient(socket_path)
+    pv = client.pv("IOC:m1")
+    assert pv.wait_for_connection(2.0)
+
+    assert pv.put(2.0, wait=True) == 1
+    assert MockPV.instances["IOC:m1"][0].puts == [2.0]
+    assert wait_until(lambda: pv.get() == 2.0)
+
+    assert client.get_many(["IOC:a", "IOC:b"]) == ["IOC:a value", "IOC:b value"]
+
+    client.close()
+
+
+def test_put_not_connected(broker, socket_path):
+    client = BrokerClient(socket_path)
+    pv = client.pv("IOC:OFFLINE")
+
+    with pytest.raises(RuntimeError, match="not connected"):
+        pv.put(1.0, wait=True)
+
+    client.close()
+
+
+def test_read_only_broker_puts_in_kernel(socket_path):
+    broker = PVBroker(socket_path, pv_factory=MockPV, get_many=get_many)
+    broker.start()
+
+    client = BrokerClient(socket_path, pv_factory=MockPV)
+    pv = client.pv("IOC:m1")
+    assert pv.wait_for_connection(2.0)
+    assert not client.allow_puts
+
+    # The broker refuses the put, the kernel puts with its own PV
+    with pytest.raises(RuntimeError, match="read-only"):
+        client.request({"op": "put", "pv": "IOC:m1", "value": 1.0})
+
+    pv.put(3.0, wait=True)
+    broker_pv, kernel_pv = MockPV.instances["IOC:m1"]
+    assert broker_pv.puts == []
+    assert kernel_pv.puts == [3.0]
+
+    client.close()
+    assert kernel_pv.disconnected
+    broker.stop()
+
+
+def test_socket_permissions_and_running_broker(broker, socket_path):
+    assert os.stat(socket_path).st_mode & 0o777 == 0o666
+
+    # The socket of a running broker isn't replaced
+    with pytest.raises(OSError, match="already running"):
+        PVBroker(socket_path, pv_factory=MockPV, get_many=get_many).start()
+
+
+def test_disconnect_when_broker_stops(socket_path):
+    broker = PVBroker(socket_path, pv_factory=MockPV, get_many=get_many)
+    broker.start()
+
+    client = BrokerClient(socket_path)
+    pv = client.pv("IOC:m1")
+    assert pv.wait_for_connection(2.0)
+
+    broker.stop()
+
+    assert wait_until(lambda: not pv.connected)
+    assert not os.path.exists(socket_path)
+
+    client.close()
@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("epics")
+
+from jupy4syn.PVPool import PVPool
+
+
+class MockPV():
+    # epics.PV stand-in: the PVs named in ``delays`` connect after that delay, the others never connect
+    delays = {}
+    created = []
+
+    def __init__(self, pvname):
+        self.pvname = pvname
+        self.type = "double"
+        self.enum_strs = None
+        self.connected = False
+        self.disconnected = False
+
+        MockPV.created.append(pvname)
+
+        delay = MockPV.delays.get(pvname)
+        if delay is not None:
+            threading.Timer(delay, self._connect).start()
+
+    def _connect(self):
+        self.connected = True
+
+    def wait_for_connection(self, timeout=None):
+        deadline = time.monotonic() + (timeout or 0.0)
+        while not self.connected and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+        return self.connected
+
+    def disconnect(self):
+        self.disconnected = True
+
+
+class MockConfig():
+    yml_motors = {"solm1": {"pv": "IOC:SOL:m1"}, "solm2": {"pv": "IOC:SOL:m2"}, "nopv": {}}
+    yml_counters = {"det1": {"pv": "IOC:DET:1"}}
+
+
+def get_many(pvnames, as_string=False):
+    return [pvname.split(".")[0] + " description" for pvname in pvnames]
+
+
+@pytest.fixture
+def pool():
+    MockPV.delays = {"IOC:SOL:m1": 0.0, "IOC:SOL:m2": 0.2, "IOC:DET:1": 0.2, "IOC:RAW": 0.2}
+    MockPV.created = []
+
+    return PVPool(connection_timeout=2.0, pv_factory=MockPV, get_many=get_many)
+
+
+def test_mnemonic_doesnt_wait_for_name_pv(pool):
+    started = time.monotonic()
+    pv = pool.resolve("solm1", MockConfig())
+
+    assert pv.pvname == "IOC:SOL:m1"
+    assert time.monotonic() - started < 0.5
+
+
+def test_mnemonic_name_pv_is_dropped(pool):
+    pool.resolve("solm2", MockConfig())
+
+    assert "solm2" not in pool._pvs
+    assert "IOC:SOL:m2" in pool._pvs
+
+
+def test_pv_name(pool):
+    assert pool.resolve("IOC:RAW", MockConfig()).pvname == "IOC:RAW"
+
+
+def test_errors(pool):
+    with pytest.raises(ValueError):
+        pool.resolve("unknown", MockConfig(), timeout=0.05)
+
+    with pytest.raises(ValueError):
+        pool.resolve("nopv", MockConfig(), timeout=0.05)
+
+    MockPV.delays.pop("IOC:DET:1")
+    with pytest.raises(Exception, match="connection not possible"):
+        pool.resolve("det1", MockConfig(), timeout=0.05)
+
+
+def test_prefetch_connects_concurrently(pool):
+    names = ["solm2", "det1", "IOC:RAW", "unknown"]
+
+    started = time.monotonic()
+    resolved = pool.prefetch(names, MockConfig(), timeout=1.0)
+    elapsed = time.monotonic() - started
+
+    # Three PVs connecting in 0.2 s each, and one that never connects, wait 1 s together
+    assert elapsed < 1.5
+    assert sorted(resolved) == ["IOC:RAW", "det1", "solm2"]
+    assert pool.description(resolved["det1"]) == "IOC:DET:1 description"
+
+    # Resolving again uses the prefetched PVs, without creating new ones
+    created = len(MockPV.created)
+    assert pool.resolve("solm2", MockConfig()) is resolved["solm2"]
+    assert len(MockPV.created) == created